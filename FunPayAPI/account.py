@@ -4,17 +4,18 @@
 """
 
 
-from bs4 import BeautifulSoup
-import requests
 import json
 import time
 
-from typing import TypedDict
+from threading import Lock
+from typing import TypedDict, Collection
 
 from .categories import Category
-from .enums import Links, OrderStatuses, CategoryTypes
+from .enums import Links, CategoryTypes
 from .orders import Order
 from .other import get_wait_time_from_raise_response, gen_rand_tag
+from .session import FunPaySession
+from . import parsers
 
 
 class RaiseCategoriesResponse(TypedDict):
@@ -32,7 +33,8 @@ class Account:
     Класс для работы с аккаунтом FunPay.
     """
     def __init__(self, app_data: dict, id_: int, username: str, balance: float, currency: str | None,
-                 active_orders: int, golden_key: str, csrf_token: str, session_id: str, last_update: int):
+                 active_orders: int, golden_key: str, csrf_token: str, session_id: str, last_update: int,
+                 session: FunPaySession | None = None):
         """
         :param app_data: словарь с данными из <body data-app-data=>.
         :param id_: id пользователя.
@@ -44,6 +46,7 @@ class Account:
         :param csrf_token: csrf токен.
         :param session_id: PHPSESSID.
         :param last_update: время последнего обновления.
+        :param session: HTTP-сессия аккаунта. Если не передана - будет создана новая.
         """
         self.app_data = app_data
         self.id = id_
@@ -55,8 +58,14 @@ class Account:
         self.csrf_token = csrf_token
         self.session_id = session_id
         self.last_update = last_update
-        # Сохраненные переписки. Для того, что бы при новом ордере заново не отправлять запрос на получение чатов.
-        self.chats_html: str | None = None
+        # HTTP-сессия, через которую отправляются все запросы аккаунта (пул соединений + куки).
+        self.session = session if session is not None else FunPaySession(golden_key, session_id)
+        # Индекс чатов: {никнейм собеседника: node_id}. Заполняется runner'ом и Account.get_node_id_by_username
+        # (из разных потоков), поэтому изменяется только через set_chat_node_id() под self.chats_index_lock.
+        self.chats_index: dict[str, int] = {}
+        self.chats_index_lock = Lock()
+        # Изменился ли индекс чатов с момента последнего сохранения (см. chats_index_snapshot()).
+        self.chats_index_changed = False
 
     def send_message(self, node_id: int, text: str, timeout: float = 10.0) -> dict:
         """
@@ -67,15 +76,26 @@ class Account:
         :param timeout: тайм-аут ожидания ответа.
         :return: ответ FunPay.
         """
-        if not text.strip():
-            raise Exception  # todo: создать и добавить кастомное исключение: пустое сообщение.
-
         headers = {
-            "accept": "*/*",
-            "cookie": f"golden_key={self.golden_key}; PHPSESSID={self.session_id}",
             "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
             "x-requested-with": "XMLHttpRequest"
         }
+        payload = self.build_message_payload(node_id, text)
+        response = self.session.post(Links.RUNNER, headers=headers, data=payload, timeout=timeout)
+        json_response = response.json()
+        return json_response
+
+    def build_message_payload(self, node_id: int, text: str) -> dict:
+        """
+        Собирает payload для отправки сообщения через runner.
+
+        :param node_id: ID переписки.
+        :param text: текст сообщения.
+        :return: payload для запроса.
+        """
+        if not text.strip():
+            raise Exception  # todo: создать и добавить кастомное исключение: пустое сообщение.
+
         request = {
             "action": "chat_message",
             "data": {
@@ -84,37 +104,92 @@ class Account:
                 "content": text
             }
         }
-        payload = {
+        return {
             "objects": "",
             "request": json.dumps(request),
             "csrf_token": self.csrf_token
         }
-        response = requests.post(Links.RUNNER, headers=headers, data=payload, timeout=timeout)
-        json_response = response.json()
-        return json_response
 
-    def get_node_id_by_username(self, username: str, force_request: bool = False) -> int | None:
+    def get_node_id_by_username(self, username: str, force_request: bool = False, user_id: int | None = None,
+                                timeout: float = 10.0) -> int | None:
         """
-        Парсит self.chats_html и ищет node_id чата по username'у.
-        Если self.chats_html is None -> делает запрос к FunPay (будет сделано в будущем).
+        Ищет node_id чата по username'у в индексе чатов (self.chats_index).
+        Если чата нет в индексе и передан user_id -> делает запрос к FunPay и добавляет найденный чат в индекс.
 
         :param username: никнейм пользователя (искомого чата).
-        :param force_request: пропустить ли поиск в self.chats_html и отправить ли сразу запрос к FunPay.
+        :param force_request: пропустить ли поиск в индексе и отправить ли сразу запрос к FunPay.
+        :param user_id: ID пользователя. Необходим для запроса к FunPay.
+        :param timeout: тайм-аут ожидания ответа.
         :return: node_id чата или None, если чат не найден.
         """
-        if not force_request and self.chats_html is not None:
-            parser = BeautifulSoup(self.chats_html, "lxml")
-            user_box = parser.find("div", {"class": "media-user-name"}, text=username)
-            if user_box is not None:
-                node_id = user_box.parent["data-id"]
-                return int(node_id)
-        return None
+        if not force_request:
+            with self.chats_index_lock:
+                node_id = self.chats_index.get(username)
+            if node_id is not None:
+                return node_id
+        if user_id is None:
+            return None
+
+        node_id = self.get_chat_node_id(user_id, timeout)
+        if node_id is not None:
+            self.set_chat_node_id(username, node_id)
+        return node_id
+
+    def set_chat_node_id(self, username: str, node_id: int) -> bool:
+        """
+        Добавляет (обновляет) чат в индексе чатов и отмечает индекс как измененный.
+
+        :param username: никнейм собеседника.
+        :param node_id: node_id чата.
+        :return: изменился ли индекс чатов.
+        """
+        with self.chats_index_lock:
+            if self.chats_index.get(username) == node_id:
+                return False
+            self.chats_index[username] = node_id
+            self.chats_index_changed = True
+            return True
+
+    def chats_index_snapshot(self) -> dict[str, int]:
+        """
+        Возвращает копию индекса чатов (для сохранения в кэш) и сбрасывает отметку об изменении индекса.
+        Если сохранить копию не удалось, нужно снова установить self.chats_index_changed = True.
+
+        :return: копия индекса чатов.
+        """
+        with self.chats_index_lock:
+            self.chats_index_changed = False
+            return dict(self.chats_index)
+
+    def get_chat_node_id(self, user_id: int, timeout: float = 10.0) -> int | None:
+        """
+        Получает node_id чата с пользователем с ID user_id (открывает страницу чата на FunPay).
+
+        :param user_id: ID пользователя.
+        :param timeout: тайм-аут ожидания ответа.
+        :return: node_id чата или None, если чат не найден.
+        """
+        response = self.session.get(f"{Links.BASE_URL}/chat/", params={"node": self.chat_name(user_id)},
+                                    timeout=timeout)
+        if response.status_code != 200:
+            raise Exception  # todo: создать и добавить кастомное исключение: не удалось получить данные с сайта.
+        return parsers.parse_chat_node_id(response.content.decode())
+
+    def chat_name(self, user_id: int) -> str:
+        """
+        Возвращает текстовое обозначение личного чата с пользователем (users-<меньший ID>-<больший ID>).
+
+        :param user_id: ID пользователя.
+        :return: текстовое обозначение чата.
+        """
+        return f"users-{min(self.id, user_id)}-{max(self.id, user_id)}"
 
     def get_account_orders(self,
                            include_outstanding: bool = True,
                            include_completed: bool = False,
                            include_refund: bool = False,
-                           exclude: list[str] | None = None,
+                           exclude: Collection[str] | None = None,
+                           stop_at: Collection[str] | None = None,
                            timeout: float = 10.0) -> list[Order]:
         """
         Получает список ордеров на аккаунте.
@@ -122,62 +197,19 @@ class Account:
         :param include_outstanding: включить в список оплаченные (но не завершенные) заказы.
         :param include_completed: включить в список завершенные заказы.
         :param include_refund: включить в список заказы, за которые оформлен возврат.
-        :param exclude: список ID заказов, которые нужно исключить из итогового списка.
+        :param exclude: ID заказов, которые нужно исключить из итогового списка (лучше передавать set / dict).
+        :param stop_at: ID заказов, на которых нужно остановить парсинг (например, уже обработанные ордеры: ордеры на
+        странице отсортированы от новых к старым).
         :param timeout: тайм-аут ожидания ответа.
         :return: Список с ордерами.
         """
-        exclude = exclude if exclude else []
-        headers = {"cookie": f"golden_key={self.golden_key};"}
-        if self.session_id:
-            headers["cookie"] += f" PHPSESSID={self.session_id};"
-
-        response = requests.get(Links.ORDERS, headers=headers, timeout=timeout)
+        response = self.session.get(Links.ORDERS, timeout=timeout)
         if response.status_code != 200:
             raise Exception  # todo: создать и добавить кастомное исключение: не удалось получить данные с сайта.
 
         html_response = response.content.decode()
-        parser = BeautifulSoup(html_response, "lxml")
-
-        check_user = parser.find("div", {"class": "user-link-name"})
-        if check_user is None:
-            raise Exception  # todo: создать и добавить кастомное исключение: невалидный токен.
-
-        order_divs = parser.find_all("a", {"class": "tc-item"})
-        if order_divs is None:
-            return []
-        parsed_orders = []
-
-        for div in order_divs:
-            order_div_classname = div.get("class")
-            if "warning" in order_div_classname:
-                if not include_refund:
-                    continue
-                status = OrderStatuses.REFUND
-            elif "info" in order_div_classname:
-                if not include_outstanding:
-                    continue
-                status = OrderStatuses.OUTSTANDING
-            else:
-                if not include_completed:
-                    continue
-                status = OrderStatuses.COMPLETED
-
-            order_id = div.find("div", {"class": "tc-order"}).text
-            if order_id in exclude:
-                continue
-            title = div.find("div", {"class": "order-desc"}).find("div").text
-            price = float(div.find("div", {"class": "tc-price"}).text.split(" ")[0])
-
-            buyer = div.find("div", {"class": "media-user-name"}).find("span")
-            buyer_name = buyer.text
-            buyer_id = int(buyer.get("data-href")[:-1].split("https://funpay.com/users/")[1])
-
-            order_object = Order(id_=order_id, title=title, price=price, buyer_username=buyer_name, buyer_id=buyer_id,
-                                 status=status)
-
-            parsed_orders.append(order_object)
-
-        return parsed_orders
+        return parsers.parse_orders_page(html_response, include_outstanding, include_completed, include_refund,
+                                         exclude, stop_at)
 
     def get_category_game_id(self, category: Category, timeout: float = 10.0) -> int:
         """
@@ -187,31 +219,14 @@ class Account:
         :param timeout: тайм-аут получения ответа.
         :return: ID игры, к которой относится категория.
         """
-        if category.type == CategoryTypes.LOT:
-            link = f"{Links.BASE_URL}/lots/{category.id}/trade"
-        else:
-            link = f"{Links.BASE_URL}/chips/{category.id}/trade"
-
-        headers = {"cookie": f"golden_key={self.golden_key}"}
-        response = requests.get(link, headers=headers, timeout=timeout)
+        response = self.session.get(self.category_trade_link(category), timeout=timeout)
         if response.status_code == 404:
             raise Exception  # todo: создать и добавить кастомное исключение: категория не найдена.
         if response.status_code != 200:
             raise Exception  # todo: создать и добавить кастомное исключение: не удалось получить данные с сайта.
 
         html_response = response.content.decode()
-        parser = BeautifulSoup(html_response, "lxml")
-
-        check_user = parser.find("div", {"class": "user-link-name"})
-        if check_user is None:
-            raise Exception  # todo: создать и добавить кастомное исключение: невалидный токен.
-
-        if category.type == CategoryTypes.LOT:
-            game_id = int(parser.find("div", {"class": "col-sm-6"}).find("button")["data-game"])
-        else:
-            game_id = int(parser.find("input", {"name": "game"})["value"])
-
-        return game_id
+        return parsers.parse_category_game_id(html_response, category.type)
 
     def request_lots_raise(self, category: Category, timeout: float = 10.0) -> dict:
         """
@@ -225,9 +240,7 @@ class Account:
         :return: ответ FunPay.
         """
         headers = {
-            "accept": "*/*",
             "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
-            "cookie": f"locale=ru; golden_key={self.golden_key}",
             "x-requested-with": "XMLHttpRequest"
         }
         payload = {
@@ -235,7 +248,7 @@ class Account:
             "node_id": category.id
         }
 
-        response = requests.post(Links.RAISE, headers=headers, data=payload, timeout=timeout)
+        response = self.session.post(Links.RAISE, headers=headers, data=payload, timeout=timeout)
         if response.status_code != 200:
             raise Exception  # todo: создать и добавить кастомное исключение: не удалось получить данные с сайта.
         response_dict = response.json()
@@ -253,8 +266,36 @@ class Account:
         :return: ответ FunPay.
         """
         check = self.request_lots_raise(category, timeout)
-        if check.get("error") and check.get("msg") and "Подождите" in check.get("msg"):
-            wait_time = get_wait_time_from_raise_response(check.get("msg"))
+        result = self.process_raise_check(check, category)
+        if result is not None or not check.get("modal"):
+            return result
+
+        # Если же появилась модалка, то парсим все чекбоксы и отправляем запрос на поднятие всех категорий, кроме тех,
+        # которые в exclude.
+        category_ids, category_names = parsers.parse_raise_modal(check.get("modal"), exclude)
+        headers = {
+            "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
+            "x-requested-with": "XMLHttpRequest"
+        }
+        payload = {
+            "game_id": category.game_id,
+            "node_id": category.id,
+            "node_ids[]": category_ids
+        }
+        response = self.session.post(Links.RAISE, headers=headers, data=payload, timeout=timeout).json()
+        return self.process_raise_response(response, category_names)
+
+    @staticmethod
+    def process_raise_check(check: dict, category: Category) -> RaiseCategoriesResponse | None:
+        """
+        Обрабатывает ответ FunPay на запрос modal-формы поднятия лотов (Account.request_lots_raise).
+
+        :param check: ответ FunPay.
+        :param category: экземпляр класса Category.
+        :return: результат поднятия или None, если FunPay прислал modal-форму и нужно отправить еще один запрос.
+        """
+        wait_time = get_wait_time_from_raise_response(check.get("msg")) if check.get("msg") else None
+        if check.get("error") and wait_time is not None:
             return {"complete": False, "wait": wait_time, "raised_category_names": [], "response": check}
         elif check.get("error"):
             # Если вернулся ответ с ошибкой и это не "Подождите n времени" - значит творится какая-то дичь.
@@ -262,36 +303,22 @@ class Account:
         elif check.get("error") is not None and not check.get("error"):
             # Если была всего 1 категория и FunPay ее поднял без отправки modal-окна
             return {"complete": True, "wait": 3600, "raised_category_names": [category.title], "response": check}
-        elif check.get("modal"):
-            # Если же появилась модалка, то парсим все чекбоксы и отправляем запрос на поднятие всех категорий, кроме тех,
-            # которые в exclude.
-            parser = BeautifulSoup(check.get("modal"), "lxml")
-            category_ids = []
-            category_names = []
-            checkboxes = parser.find_all("div", {"class": "checkbox"})
-            for cb in checkboxes:
-                category_id = cb.find("input")["value"]
-                if (exclude is not None and category_id not in exclude) or exclude is None:
-                    category_ids.append(category_id)
-                    category_name = cb.find("label").text
-                    category_names.append(category_name)
-
-            headers = {
-                "accept": "*/*",
-                "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
-                "cookie": f"locale=ru; golden_key={self.golden_key}",
-                "x-requested-with": "XMLHttpRequest"
-            }
-            payload = {
-                "game_id": category.game_id,
-                "node_id": category.id,
-                "node_ids[]": category_ids
-            }
-            response = requests.post(Links.RAISE, headers=headers, data=payload, timeout=timeout).json()
-            if not response.get("error"):
-                return {"complete": True, "wait": 3600, "raised_category_names": category_names, "response": response}
-            else:
-                return {"complete": False, "wait": 10, "raised_category_names": [], "response": response}
+        return None
+
+    @staticmethod
+    def process_raise_response(response: dict, category_names: list[str]) -> RaiseCategoriesResponse:
+        """
+        Обрабатывает ответ FunPay на запрос поднятия категорий, выбранных в modal-форме.
+
+        :param response: ответ FunPay.
+        :param category_names: названия категорий, которые были отправлены на поднятие.
+        :return: результат поднятия.
+        """
+        if not response.get("error"):
+            return {"complete": True, "wait": 3600, "raised_category_names": category_names, "response": response}
+        wait_time = get_wait_time_from_raise_response(response.get("msg")) if response.get("msg") else None
+        return {"complete": False, "wait": wait_time if wait_time is not None else 10, "raised_category_names": [],
+                "response": response}
 
     def get_lot_info(self, lot_id: int, game_id: int) -> list[dict[str, str]]:
         """
@@ -302,10 +329,8 @@ class Account:
         :return: словарь {"название поля": "значение поля"}.
         """
         headers = {
-            "accept": "*/*",
             "content-type": "application/json",
-            "x-requested-with": "XMLHttpRequest",
-            "cookie": f"golden_key={self.golden_key}; PHPSESSID={self.session_id}"
+            "x-requested-with": "XMLHttpRequest"
         }
         tag = gen_rand_tag()
         payload = {
@@ -316,34 +341,9 @@ class Account:
 
         query = f"?tag={tag}&offer={lot_id}&node={game_id}"
 
-        response = requests.get(f"{Links.BASE_URL}/lots/offerEdit{query}", headers=headers, data=payload)
+        response = self.session.get(f"{Links.BASE_URL}/lots/offerEdit{query}", headers=headers, data=payload)
         json_response = response.json()
-        parser = BeautifulSoup(json_response["html"], "lxml")
-
-        input_fields = parser.find_all("input")
-        text_fields = parser.find_all("textarea")
-        selection_fields = parser.find_all("select")
-        result = []
-        for field in input_fields:
-            name = field["name"]
-            value = field.get("value")
-            if value is None:
-                value = ""
-            result.append({"name": name, "value": value})
-
-        for field in text_fields:
-            name = field["name"]
-            text = field.text
-            if not text:
-                text = ""
-            result.append({"name": name, "value": text})
-
-        for field in selection_fields:
-            name = field["name"]
-            value = field.find("option", selected=True)["value"]
-            result.append({"name": name, "value": value})
-
-        return result
+        return parsers.parse_lot_fields(json_response["html"])
 
     def change_lot_state(self, lot_id: int, game_id: int, state: bool = True) -> dict:
         """
@@ -355,26 +355,56 @@ class Account:
         :return: ответ FunPay.
         """
         lot_info = self.get_lot_info(lot_id, game_id)
+        return self.save_lot_state(lot_info, state)
+
+    def save_lot_state(self, lot_info: list[dict[str, str]], state: bool = True) -> dict:
+        """
+        Сохраняет лот с нужным состоянием по уже полученным полям формы редактирования (без повторного запроса формы).
+
+        :param lot_info: значения полей лота (Account.get_lot_info).
+        :param state: целевое состояние лота.
+        :return: ответ FunPay.
+        """
+        payload = self.build_lot_state_payload(lot_info, state)
+        headers = {
+            "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
+            "x-requested-with": "XMLHttpRequest"
+        }
+        response = self.session.post(f"{Links.BASE_URL}/lots/offerSave", headers=headers, data=payload)
+        return response.json()
+
+    @staticmethod
+    def build_lot_state_payload(lot_info: list[dict[str, str]], state: bool) -> dict[str, str]:
+        """
+        Собирает payload для сохранения лота (offerSave) с нужным состоянием.
 
+        :param lot_info: значения полей лота (Account.get_lot_info).
+        :param state: целевое состояние лота.
+        :return: payload для запроса.
+        """
         payload = {}
+        # lot_info не изменяется: поля формы могут быть закэшированы и использоваться повторно.
         for field in lot_info:
             if field["name"] == "active":
                 if state:
-                    field["value"] = "on"
-                else:
-                    continue
+                    payload["active"] = "on"
+                continue
             payload[field["name"]] = field["value"]
 
         payload["location"] = "trade"
+        return payload
 
-        headers = {
-            "accept": "*/*",
-            "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
-            "x-requested-with": "XMLHttpRequest",
-            "cookie": f"golden_key={self.golden_key}; PHPSESSID={self.session_id}"
-        }
-        response = requests.post(f"{Links.BASE_URL}/lots/offerSave", headers=headers, data=payload)
-        return response.json()
+    @staticmethod
+    def category_trade_link(category: Category) -> str:
+        """
+        Возвращает ссылку на страницу редактирования лотов категории.
+
+        :param category: экземпляр класса Category.
+        :return: ссылка.
+        """
+        if category.type == CategoryTypes.LOT:
+            return f"{Links.BASE_URL}/lots/{category.id}/trade"
+        return f"{Links.BASE_URL}/chips/{category.id}/trade"
 
 
 def get_account(token: str, timeout: float = 10.0) -> Account:
@@ -385,34 +415,19 @@ def get_account(token: str, timeout: float = 10.0) -> Account:
     :param timeout: тайм-аут получения ответа.
     :return: экземпляр класса Account.
     """
-    headers = {"cookie": f"golden_key={token}"}
+    session = FunPaySession(token)
 
-    response = requests.get(Links.BASE_URL, headers=headers, timeout=timeout)
+    response = session.get(Links.BASE_URL, timeout=timeout)
     if response.status_code != 200:
         raise Exception  # todo: создать и добавить кастомное исключение: не удалось получить данные с сайта.
 
     html_response = response.content.decode()
-    parser = BeautifulSoup(html_response, "lxml")
-
-    username = parser.find("div", {"class": "user-link-name"})
-    if username is None:
-        raise Exception  # todo: создать и добавить кастомное исключение: невалидный токен.
-    username = username.text
-
-    app_data = json.loads(parser.find("body")["data-app-data"])
-    userid = app_data["userId"]
-    csrf_token = app_data["csrf-token"]
-
-    active_sales = parser.find("span", {"class": "badge badge-trade"})
-    active_sales = int(active_sales.text) if active_sales else 0
-
-    balance = parser.find("span", {"class": "badge badge-balance"})
-    balance_count = float(balance.text.split(" ")[0]) if balance else 0
-    balance_currency = balance.text.split(" ")[1] if balance else None
+    info = parsers.parse_account_page(html_response)
 
     cookies = response.cookies.get_dict()
     session_id = cookies["PHPSESSID"]
 
-    return Account(app_data=app_data, id_=userid, username=username, balance=balance_count, currency=balance_currency,
-                   active_orders=active_sales, golden_key=token, csrf_token=csrf_token, session_id=session_id,
-                   last_update=int(time.time()))
+    return Account(app_data=info["app_data"], id_=info["id"], username=info["username"], balance=info["balance"],
+                   currency=info["currency"], active_orders=info["active_orders"], golden_key=token,
+                   csrf_token=info["csrf_token"], session_id=session_id, last_update=int(time.time()),
+                   session=session)
@@ -0,0 +1,300 @@
+"""
+В данном модуле написан асинхронный (asyncio + aiohttp) вариант класса Account.
+Все методы, отправляющие запросы к FunPay, являются корутинами, поэтому один поток может держать сотни
+одновременных запросов. Для всех функций и методов требуется golden_key аккаунта FunPay.
+"""
+
+
+import time
+import aiohttp
+import contextlib
+from typing import Collection, AsyncIterator
+
+from .account import Account, RaiseCategoriesResponse
+from .categories import Category
+from .enums import Links
+from .limiter import RequestLimiter
+from .orders import Order
+from .other import gen_rand_tag
+from .session import FunPaySession
+from . import parsers
+
+
+class AsyncAccount(Account):
+    """
+    Асинхронный класс для работы с аккаунтом FunPay.
+    Хранит те же данные, что и Account, но методы, отправляющие запросы, необходимо вызывать через await.
+    После завершения работы необходимо закрыть сессию (await account.close() или async with account).
+    Все запросы проходят через тот же ограничитель частоты запросов, что и запросы синхронной сессии
+    (self.session.limiter).
+    """
+    def __init__(self, *args, aio_session: aiohttp.ClientSession | None = None, pool_size: int = 100,
+                 limiter: RequestLimiter | None = None, **kwargs):
+        """
+        Принимает те же параметры, что и Account.
+
+        :param aio_session: aiohttp-сессия аккаунта. Если не передана - будет создана при первом запросе.
+        :param pool_size: максимальное кол-во одновременно открытых соединений с FunPay.
+        :param limiter: общий ограничитель частоты запросов к FunPay. Если не передан - используется ограничитель
+        HTTP-сессии аккаунта (если он задан).
+        """
+        super(AsyncAccount, self).__init__(*args, **kwargs)
+        self.pool_size = pool_size
+        self.aio_session = aio_session
+        if limiter is not None:
+            self.session.limiter = limiter
+
+    def get_aio_session(self) -> aiohttp.ClientSession:
+        """
+        Возвращает aiohttp-сессию аккаунта (создает ее, если она еще не создана или уже закрыта).
+        Должна вызываться внутри запущенного event loop'а.
+
+        :return: aiohttp-сессия.
+        """
+        if self.aio_session is None or self.aio_session.closed:
+            self.aio_session = create_aio_session(self.golden_key, self.session_id, self.pool_size)
+        return self.aio_session
+
+    @contextlib.asynccontextmanager
+    async def request(self, method: str, url: str, **kwargs) -> AsyncIterator[aiohttp.ClientResponse]:
+        """
+        Отправляет запрос через aiohttp-сессию аккаунта, предварительно дождавшись своей очереди в ограничителе
+        частоты запросов. Ответ 429 приостанавливает все запросы через ограничитель (RequestLimiter.report()).
+        Использование: async with account.request("GET", url) as response: ...
+
+        :param method: HTTP-метод.
+        :param url: ссылка.
+        :return: ответ FunPay.
+        """
+        limiter = self.session.limiter
+        if limiter is not None:
+            await limiter.acquire_async(RequestLimiter.classify(method, url, kwargs.get("data")))
+        async with self.get_aio_session().request(method, url, **kwargs) as response:
+            if limiter is not None:
+                limiter.report(response.status, FunPaySession.retry_after(response))
+            yield response
+
+    async def close(self) -> None:
+        """
+        Закрывает aiohttp-сессию аккаунта.
+        """
+        if self.aio_session is not None and not self.aio_session.closed:
+            await self.aio_session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def send_message(self, node_id: int, text: str, timeout: float = 10.0) -> dict:
+        """
+        Отправляет сообщение в переписку с ID node_id.
+
+        :param node_id: ID переписки.
+        :param text: текст сообщения.
+        :param timeout: тайм-аут ожидания ответа.
+        :return: ответ FunPay.
+        """
+        headers = {
+            "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
+            "x-requested-with": "XMLHttpRequest"
+        }
+        payload = self.build_message_payload(node_id, text)
+        async with self.request("POST", Links.RUNNER, headers=headers, data=payload,
+                                timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            return await response.json(content_type=None)
+
+    async def get_account_orders(self,
+                                 include_outstanding: bool = True,
+                                 include_completed: bool = False,
+                                 include_refund: bool = False,
+                                 exclude: Collection[str] | None = None,
+                                 stop_at: Collection[str] | None = None,
+                                 timeout: float = 10.0) -> list[Order]:
+        """
+        Получает список ордеров на аккаунте.
+
+        :param include_outstanding: включить в список оплаченные (но не завершенные) заказы.
+        :param include_completed: включить в список завершенные заказы.
+        :param include_refund: включить в список заказы, за которые оформлен возврат.
+        :param exclude: ID заказов, которые нужно исключить из итогового списка (лучше передавать set / dict).
+        :param stop_at: ID заказов, на которых нужно остановить парсинг (например, уже обработанные ордеры: ордеры на
+        странице отсортированы от новых к старым).
+        :param timeout: тайм-аут ожидания ответа.
+        :return: Список с ордерами.
+        """
+        async with self.request("GET", Links.ORDERS,
+                                timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status != 200:
+                raise Exception  # todo: создать и добавить кастомное исключение: не удалось получить данные с сайта.
+            html_response = await response.text()
+
+        return parsers.parse_orders_page(html_response, include_outstanding, include_completed, include_refund,
+                                         exclude, stop_at)
+
+    async def get_category_game_id(self, category: Category, timeout: float = 10.0) -> int:
+        """
+        Получает ID игры, к которой относится категория.
+
+        :param category: экземпляр класса Category.
+        :param timeout: тайм-аут получения ответа.
+        :return: ID игры, к которой относится категория.
+        """
+        async with self.request("GET", self.category_trade_link(category),
+                                timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status == 404:
+                raise Exception  # todo: создать и добавить кастомное исключение: категория не найдена.
+            if response.status != 200:
+                raise Exception  # todo: создать и добавить кастомное исключение: не удалось получить данные с сайта.
+            html_response = await response.text()
+
+        return parsers.parse_category_game_id(html_response, category.type)
+
+    async def request_lots_raise(self, category: Category, timeout: float = 10.0) -> dict:
+        """
+        Отправляет запрос на получение modal-формы для поднятия лотов категории category.id.
+        !ВНИМЕНИЕ! Для отправки запроса необходимо, чтобы category.game_id != None.
+
+        :param category: экземпляр класса Category.
+        :param timeout: тайм-аут получения ответа.
+        :return: ответ FunPay.
+        """
+        headers = {
+            "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
+            "x-requested-with": "XMLHttpRequest"
+        }
+        payload = {
+            "game_id": category.game_id,
+            "node_id": category.id
+        }
+        async with self.request("POST", Links.RAISE, headers=headers, data=payload,
+                                timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status != 200:
+                raise Exception  # todo: создать и добавить кастомное исключение: не удалось получить данные с сайта.
+            return await response.json(content_type=None)
+
+    async def raise_game_categories(self, category: Category, exclude: list[str] | None = None,
+                                    timeout: float = 10.0) -> RaiseCategoriesResponse:
+        """
+        Поднимает лоты всех категорий игры category.game_id.
+        !ВНИМЕНИЕ! Для поднятия лотов необходимо, чтобы category.game_id != None.
+
+        :param category: экземпляр класса Category.
+        :param exclude: список из названий категорий, которые не нужно поднимать.
+        :param timeout: тайм-аут ожидания ответа.
+        :return: ответ FunPay.
+        """
+        check = await self.request_lots_raise(category, timeout)
+        result = self.process_raise_check(check, category)
+        if result is not None or not check.get("modal"):
+            return result
+
+        category_ids, category_names = parsers.parse_raise_modal(check.get("modal"), exclude)
+        headers = {
+            "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
+            "x-requested-with": "XMLHttpRequest"
+        }
+        payload = {
+            "game_id": category.game_id,
+            "node_id": category.id,
+            "node_ids[]": category_ids
+        }
+        async with self.request("POST", Links.RAISE, headers=headers, data=payload,
+                                timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            json_response = await response.json(content_type=None)
+        return self.process_raise_response(json_response, category_names)
+
+    async def get_lot_info(self, lot_id: int, game_id: int, timeout: float = 10.0) -> list[dict[str, str]]:
+        """
+        Получает значения всех полей лота (в окне редактирования лота).
+
+        :param lot_id: ID лота.
+        :param game_id: ID игры, к которой относится лот.
+        :param timeout: тайм-аут ожидания ответа.
+        :return: словарь {"название поля": "значение поля"}.
+        """
+        headers = {
+            "x-requested-with": "XMLHttpRequest"
+        }
+        params = {
+            "tag": gen_rand_tag(),
+            "offer": lot_id,
+            "node": game_id
+        }
+        async with self.request("GET", f"{Links.BASE_URL}/lots/offerEdit", headers=headers, params=params,
+                                timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            json_response = await response.json(content_type=None)
+        return parsers.parse_lot_fields(json_response["html"])
+
+    async def change_lot_state(self, lot_id: int, game_id: int, state: bool = True, timeout: float = 10.0) -> dict:
+        """
+        Изменяет состояние лота (активное / неактивное).
+
+        :param lot_id: ID лота.
+        :param game_id: ID игры, к которой относится лот.
+        :param state: Целевое состояние лота.
+        :param timeout: тайм-аут ожидания ответа.
+        :return: ответ FunPay.
+        """
+        lot_info = await self.get_lot_info(lot_id, game_id, timeout)
+        payload = self.build_lot_state_payload(lot_info, state)
+        headers = {
+            "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
+            "x-requested-with": "XMLHttpRequest"
+        }
+        async with self.request("POST", f"{Links.BASE_URL}/lots/offerSave", headers=headers, data=payload,
+                                timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            return await response.json(content_type=None)
+
+
+def create_aio_session(golden_key: str, session_id: str | None = None,
+                       pool_size: int = 100) -> aiohttp.ClientSession:
+    """
+    Создает aiohttp-сессию с пулом соединений, куки аккаунта и стандартными заголовками.
+    Должна вызываться внутри запущенного event loop'а.
+
+    :param golden_key: golden_key (токен) аккаунта.
+    :param session_id: PHPSESSID.
+    :param pool_size: максимальное кол-во одновременно открытых соединений с FunPay.
+    :return: aiohttp-сессия.
+    """
+    cookies = {"golden_key": golden_key, "locale": "ru"}
+    if session_id is not None:
+        cookies["PHPSESSID"] = session_id
+    return aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=pool_size), cookies=cookies,
+                                 headers={"accept": "*/*"})
+
+
+async def get_account(token: str, timeout: float = 10.0, pool_size: int = 100,
+                      limiter: RequestLimiter | None = None) -> AsyncAccount:
+    """
+    Авторизируется с помощью токена и получает общие данные об аккаунте.
+
+    :param token: golden_key (токен) аккаунта.
+    :param timeout: тайм-аут получения ответа.
+    :param pool_size: максимальное кол-во одновременно открытых соединений с FunPay.
+    :param limiter: общий ограничитель частоты запросов к FunPay.
+    :return: экземпляр класса AsyncAccount.
+    """
+    aio_session = create_aio_session(token, pool_size=pool_size)
+    try:
+        if limiter is not None:
+            await limiter.acquire_async(RequestLimiter.classify("GET", Links.BASE_URL))
+        async with aio_session.get(Links.BASE_URL, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status != 200:
+                raise Exception  # todo: создать и добавить кастомное исключение: не удалось получить данные с сайта.
+            if limiter is not None:
+                limiter.report(response.status, FunPaySession.retry_after(response))
+            html_response = await response.text()
+            session_id = response.cookies["PHPSESSID"].value
+        info = parsers.parse_account_page(html_response)
+    except:
+        await aio_session.close()
+        raise
+
+    return AsyncAccount(app_data=info["app_data"], id_=info["id"], username=info["username"],
+                        balance=info["balance"], currency=info["currency"], active_orders=info["active_orders"],
+                        golden_key=token, csrf_token=info["csrf_token"], session_id=session_id,
+                        last_update=int(time.time()), aio_session=aio_session, pool_size=pool_size,
+                        limiter=limiter)
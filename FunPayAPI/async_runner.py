@@ -0,0 +1,36 @@
+"""
+В данном модуле написан асинхронный (asyncio + aiohttp) вариант класса Runner.
+"""
+
+
+import aiohttp
+
+from .async_account import AsyncAccount
+from .enums import Links
+from .runner import Runner, MessageEvent, OrderEvent
+
+
+class AsyncRunner(Runner):
+    """
+    Асинхронный класс runner'а. Работает так же, как и Runner, но get_updates() - корутина.
+    """
+    def __init__(self, account: AsyncAccount, timeout: float = 10.0):
+        """
+        :param account: экземпляр AsyncAccount.
+        :param timeout: тайм-аут ожидания ответа.
+        """
+        super(AsyncRunner, self).__init__(account, timeout)
+
+    async def get_updates(self) -> list[MessageEvent | OrderEvent]:
+        """
+        Получает список обновлений от FunPay.
+        :return: список эвентов.
+        """
+        headers = {
+            "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
+            "x-requested-with": "XMLHttpRequest"
+        }
+        async with self.account.request("POST", Links.RUNNER, headers=headers, data=self.build_payload(),
+                                        timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+            json_response = await response.json(content_type=None)
+        return self.parse_updates(json_response)
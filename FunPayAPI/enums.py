@@ -49,3 +49,22 @@ class EventTypes(Enum):
     """
     NEW_MESSAGE = 0
     NEW_ORDER = 1
+
+
+class RequestTypes(Enum):
+    """
+    Классы запросов к FunPay (для ограничителя частоты запросов).
+
+    RequestTypes.RUNNER - запрос к runner'у (получение новых сообщений / ордеров).
+    RequestTypes.CHAT_SEND - отправка сообщения.
+    RequestTypes.ORDERS - получение списка ордеров.
+    RequestTypes.RAISE - поднятие лотов.
+    RequestTypes.LOT_EDIT - получение / сохранение полей лота (восстановление лотов).
+    RequestTypes.OTHER - остальные запросы.
+    """
+    RUNNER = 0
+    CHAT_SEND = 1
+    ORDERS = 2
+    RAISE = 3
+    LOT_EDIT = 4
+    OTHER = 5
@@ -0,0 +1,241 @@
+"""
+В данном модуле написан общий ограничитель частоты запросов к FunPay.
+"""
+
+
+import time
+import bisect
+import asyncio
+import itertools
+from threading import Condition
+
+from .enums import Links, RequestTypes
+
+
+# Приоритеты классов запросов (чем меньше, тем раньше выполняется запрос): выдача товара и ответы покупателям
+# не ждут восстановления лотов и поднятия.
+DEFAULT_PRIORITIES = {
+    RequestTypes.CHAT_SEND: 0,
+    RequestTypes.ORDERS: 1,
+    RequestTypes.RUNNER: 2,
+    RequestTypes.OTHER: 3,
+    RequestTypes.RAISE: 4,
+    RequestTypes.LOT_EDIT: 5
+}
+
+# Собственные ограничения классов запросов (запросов в секунду) - в дополнение к общему ограничению.
+DEFAULT_TYPE_RATES = {
+    RequestTypes.RAISE: 1,
+    RequestTypes.LOT_EDIT: 2
+}
+
+
+class TokenBucket:
+    """
+    Корзина токенов: пополняется со скоростью rate токенов в секунду, вмещает не более burst токенов.
+    Не потокобезопасна: используется под блокировкой RequestLimiter.
+    """
+    def __init__(self, rate: float, burst: float):
+        """
+        :param rate: скорость пополнения (токенов в секунду).
+        :param burst: вместимость корзины.
+        """
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def delay(self, now: float) -> float:
+        """
+        :param now: текущее время (time.monotonic()).
+        :return: время (в секундах), через которое в корзине появится токен.
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+
+class RequestLimiter:
+    """
+    Общий для всего процесса ограничитель частоты запросов к FunPay (token bucket).
+    Каждый запрос расходует токен общей корзины и (если задано) токен корзины своего класса (RequestTypes).
+    Если токенов нет, запросы ждут в очереди: первым выполняется запрос с наименьшим приоритетом, чья корзина класса
+    не пуста (при равных приоритетах - в порядке поступления).
+    Если FunPay ответил 429 (Too Many Requests), все запросы приостанавливаются на время из Retry-After (или на
+    экспоненциально растущее время, если заголовка нет) - см. backoff().
+    """
+    def __init__(self, rate: float = 5, burst: float = 10, type_rates: dict[RequestTypes, float] | None = None,
+                 priorities: dict[RequestTypes, int] | None = None):
+        """
+        :param rate: общее максимальное кол-во запросов в секунду. 0 - без ограничений.
+        :param burst: максимальное кол-во запросов, которые могут быть отправлены подряд без ожидания.
+        :param type_rates: максимальное кол-во запросов в секунду для отдельных классов запросов.
+        :param priorities: приоритеты классов запросов.
+        """
+        self.bucket = TokenBucket(rate, burst) if rate > 0 else None
+        type_rates = DEFAULT_TYPE_RATES if type_rates is None else type_rates
+        self.type_buckets = {k: TokenBucket(v, 1) for k, v in type_rates.items() if v > 0}
+        self.priorities = DEFAULT_PRIORITIES if priorities is None else priorities
+        self.cond = Condition()
+        # Очередь ожидающих запросов [(приоритет, порядковый номер, класс запроса)], отсортированная по приоритету.
+        self.waiters: list[tuple[int, int, RequestTypes]] = []
+        self.counter = itertools.count()
+        # Время (time.monotonic()), до которого запросы приостановлены после ответа 429.
+        self.paused_until = 0.0
+        # Кол-во ответов 429 подряд и последняя пауза (для экспоненциального роста паузы).
+        self.strikes = 0
+        self.last_pause = 0.0
+        self.throttled = 0
+
+        # Метрики: {класс запроса: [кол-во запросов, суммарное время ожидания, максимальное время ожидания]}
+        self.metrics: dict[RequestTypes, list] = {i: [0, 0.0, 0.0] for i in RequestTypes}
+
+    @staticmethod
+    def classify(method: str, url: str, data=None) -> RequestTypes:
+        """
+        Определяет класс запроса по методу, ссылке и данным.
+
+        :param method: HTTP-метод.
+        :param url: ссылка.
+        :param data: данные запроса.
+        :return: класс запроса.
+        """
+        if url.startswith(Links.RUNNER):
+            # Сообщения отправляются через runner: в таком запросе request != False.
+            if method.upper() == "POST" and isinstance(data, dict) and data.get("request"):
+                return RequestTypes.CHAT_SEND
+            return RequestTypes.RUNNER
+        elif url.startswith(Links.RAISE):
+            return RequestTypes.RAISE
+        elif url.startswith(f"{Links.BASE_URL}/lots/offer"):
+            return RequestTypes.LOT_EDIT
+        elif url.startswith(Links.ORDERS):
+            return RequestTypes.ORDERS
+        return RequestTypes.OTHER
+
+    def __select(self, now: float) -> tuple[tuple[int, int, RequestTypes] | None, float]:
+        """
+        Выбирает запрос, который может быть выполнен прямо сейчас. Вызывается под self.cond.
+
+        :param now: текущее время (time.monotonic()).
+        :return: (выбранный запрос или None, время до появления свободного токена).
+        """
+        if self.paused_until > now:
+            return None, self.paused_until - now
+        delay = self.bucket.delay(now) if self.bucket is not None else 0.0
+        if delay:
+            return None, delay
+        min_delay = None
+        for waiter in self.waiters:
+            bucket = self.type_buckets.get(waiter[2])
+            type_delay = bucket.delay(now) if bucket is not None else 0.0
+            if not type_delay:
+                return waiter, 0.0
+            min_delay = type_delay if min_delay is None else min(min_delay, type_delay)
+        return None, min_delay
+
+    def acquire(self, request_type: RequestTypes = RequestTypes.OTHER) -> float:
+        """
+        Ждет, пока запрос класса request_type не сможет быть выполнен.
+
+        :param request_type: класс запроса.
+        :return: время ожидания (в секундах).
+        """
+        start = time.monotonic()
+        with self.cond:
+            waiter = (self.priorities.get(request_type, 0), next(self.counter), request_type)
+            bisect.insort(self.waiters, waiter)
+            while True:
+                now = time.monotonic()
+                selected, delay = self.__select(now)
+                if selected is waiter:
+                    break
+                if selected is not None:
+                    # Токен достанется другому запросу: будим его и ждем своей очереди.
+                    self.cond.notify_all()
+                self.cond.wait(delay or None)
+
+            self.waiters.remove(waiter)
+            if self.bucket is not None:
+                self.bucket.take()
+            if request_type in self.type_buckets:
+                self.type_buckets[request_type].take()
+            self.cond.notify_all()
+
+            wait = now - start
+            metrics = self.metrics[request_type]
+            metrics[0] += 1
+            metrics[1] += wait
+            metrics[2] = max(metrics[2], wait)
+        return wait
+
+    async def acquire_async(self, request_type: RequestTypes = RequestTypes.OTHER) -> float:
+        """
+        Асинхронный вариант acquire() (для AsyncAccount): ожидание выполняется в пуле потоков event loop'а, поэтому
+        не блокирует его, а очередь и корзины токенов - общие с синхронными запросами.
+
+        :param request_type: класс запроса.
+        :return: время ожидания (в секундах).
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, self.acquire, request_type)
+
+    def report(self, status_code: int, retry_after: float | None = None) -> None:
+        """
+        Учитывает код ответа FunPay: 429 приостанавливает все запросы (backoff()), успешный ответ сбрасывает счетчик
+        ответов 429 подряд.
+
+        :param status_code: код ответа.
+        :param retry_after: время паузы из заголовка Retry-After (в секундах).
+        """
+        if status_code == 429:
+            self.backoff(retry_after)
+        elif self.strikes:
+            self.reset_backoff()
+
+    def backoff(self, retry_after: float | None = None, max_pause: float = 60) -> float:
+        """
+        Приостанавливает все запросы после ответа 429 (Too Many Requests).
+
+        :param retry_after: время паузы из заголовка Retry-After (в секундах). Если не указано, пауза удваивается с
+        каждым ответом 429 подряд (начиная с 1 секунды).
+        :param max_pause: максимальная пауза (в секундах).
+        :return: время паузы (в секундах).
+        """
+        with self.cond:
+            self.strikes += 1
+            self.throttled += 1
+            if retry_after is None:
+                retry_after = self.last_pause * 2 if self.strikes > 1 and self.last_pause else 1
+            pause = min(max(retry_after, 0), max_pause)
+            self.last_pause = pause
+            self.paused_until = max(self.paused_until, time.monotonic() + pause)
+            # После паузы запросы не должны уйти пачкой: опустошаем общую корзину.
+            if self.bucket is not None:
+                self.bucket.tokens = min(self.bucket.tokens, 0)
+            self.cond.notify_all()
+        return pause
+
+    def reset_backoff(self) -> None:
+        """
+        Сбрасывает счетчик ответов 429 подряд (вызывается после успешного ответа).
+        """
+        with self.cond:
+            self.strikes = 0
+            self.last_pause = 0.0
+
+    def stats(self) -> dict:
+        """
+        :return: метрики ограничителя (для мониторинга): кол-во запросов, среднее и максимальное время ожидания
+        каждого класса запросов, а также кол-во запросов в очереди.
+        """
+        with self.cond:
+            return {
+                "queued": len(self.waiters),
+                "throttled": self.throttled,
+                "types": {k.name.lower(): {"requests": v[0], "avg_wait": v[1] / v[0] if v[0] else 0.0,
+                                           "max_wait": v[2]}
+                          for k, v in self.metrics.items()}
+            }
@@ -3,32 +3,54 @@
 """
 
 
+import re
 import string
 import random
 
 
-def get_wait_time_from_raise_response(response: str) -> int:
+# Единицы времени в ответах FunPay (начала слов): "2 часа", "1 минуту", "30 секунд", "an hour", "5 minutes", ...
+WAIT_TIME_UNITS = {
+    "час": 3600, "hour": 3600, "hr": 3600,
+    "мин": 60, "minute": 60, "min": 60,
+    "сек": 1, "second": 1, "sec": 1
+}
+# Время ожидания - число с единицей времени ("2 часа", "30 sec") или единица времени без числа целым словом
+# ("Подождите минуту.", "Please wait an hour."). Единица без числа внутри слова ("Минимальная цена") - не время.
+WAIT_TIME_RE = re.compile(r"\b(\d+)\s*(час|hour|hr|мин|minute|min|сек|second|sec)\w*"
+                          r"|\b(час|минуту|секунду|hour|minute|second)\b", re.IGNORECASE)
+
+
+def parse_wait_time(response: str) -> tuple[int, int] | None:
+    """
+    Парсит время ожидания из ответа FunPay на запрос о поднятии лотов (русская и английская локализации).
+    Например: "Подождите 2 часа 30 минут.", "Подождите минуту.", "Please wait 45 seconds.".
+
+    :param response: текст ответа.
+    :return: (время ожидания в секундах, точность - наименьшая единица времени в ответе в секундах) или None,
+    если в ответе нет времени ожидания.
+    """
+    wait_time = 0
+    precision = None
+    for amount, unit, single_unit in WAIT_TIME_RE.findall(response):
+        unit = (unit or single_unit).lower()
+        unit_seconds = next(v for k, v in WAIT_TIME_UNITS.items() if unit.startswith(k))
+        # "Подождите минуту." / "Please wait an hour." - число не указано.
+        wait_time += (int(amount) if amount else 1) * unit_seconds
+        precision = unit_seconds if precision is None else min(precision, unit_seconds)
+    return (wait_time, precision) if precision is not None else None
+
+
+def get_wait_time_from_raise_response(response: str) -> int | None:
     """
     Парсит ответ FunPay на запрос о поднятии лотов.
+    Внимание: раньше, если в ответе не было времени ожидания, функция возвращала 10. Теперь она возвращает None,
+    поэтому плагины, использующие результат как число, должны обрабатывать None (например: wait = ... or 10).
 
     :param response: текст ответа.
-    :return: Примерное время ожидание до следующего поднятия лотов (в секундах).
+    :return: время ожидания до следующего поднятия лотов (в секундах) или None, если в ответе нет времени ожидания.
     """
-    if "секунду." in response:
-        return 1
-    elif "сек" in response:
-        response = response.split()
-        return int(response[1])
-    elif "минуту." in response:
-        return 60
-    elif "мин" in response:
-        response = response.split()
-        # ["Подождите", "n", "минут."]
-        return (int(response[1])-1) * 60
-    elif "час" in response:
-        return 3600
-    else:
-        return 10
+    result = parse_wait_time(response)
+    return result[0] if result is not None else None
 
 
 def gen_rand_tag() -> str:
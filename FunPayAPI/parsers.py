@@ -0,0 +1,648 @@
+"""
+В данном модуле написаны парсеры HTML-страниц и HTML-фрагментов FunPay.
+Парсеры не отправляют запросов, поэтому используются и синхронным (FunPayAPI.account.Account),
+и асинхронным (FunPayAPI.async_account.AsyncAccount) клиентами.
+
+Доступно 2 бэкенда:
+LxmlParser - (по умолчанию) достает только нужные узлы с помощью XPath, а страницу с ордерами разбирает потоково
+(lxml.etree.iterparse), не держа в памяти все дерево.
+BS4Parser - строит полное дерево BeautifulSoup (старый способ парсинга).
+
+Бэкенд можно сменить с помощью set_parser().
+"""
+
+
+import io
+import re
+import json
+from abc import ABC, abstractmethod
+
+from lxml import etree, html as lxml_html
+from typing import TypedDict, Collection
+
+from .categories import Category
+from .enums import OrderStatuses, CategoryTypes
+from .lots import Lot
+from .orders import Order
+
+
+class AccountInfoFormat(TypedDict):
+    """
+    Type-класс, описывающий структуру словаря, возвращаемого функцией parse_account_page.
+    """
+    app_data: dict
+    id: int
+    username: str
+    csrf_token: str
+    active_orders: int
+    balance: float
+    currency: str | None
+
+
+class UsersLotsInfoFormat(TypedDict):
+    categories: list[Category]
+    lots: list[Lot]
+
+
+class BaseParser(ABC):
+    """
+    Базовый класс парсера. Описывает интерфейс, который должен реализовывать каждый бэкенд (экземпляр бэкенда, не
+    реализующего хотя бы 1 метод, создать нельзя).
+    """
+    @abstractmethod
+    def parse_account_page(self, html: str) -> AccountInfoFormat:
+        raise NotImplementedError
+
+    @abstractmethod
+    def parse_orders_page(self, html: str, include_outstanding: bool = True, include_completed: bool = False,
+                          include_refund: bool = False, exclude: Collection[str] | None = None,
+                          stop_at: Collection[str] | None = None) -> list[Order]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def parse_category_game_id(self, html: str, category_type: CategoryTypes) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def parse_raise_modal(self, html: str, exclude: list[str] | None = None) -> tuple[list[str], list[str]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def parse_lot_fields(self, html: str) -> list[dict[str, str]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def parse_user_lots_page(self, html: str, include_currency: bool = False) -> UsersLotsInfoFormat:
+        raise NotImplementedError
+
+    @abstractmethod
+    def parse_chat_bookmarks(self, html: str) -> list[tuple[int, str, str]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def parse_chat_node_id(self, html: str) -> int | None:
+        raise NotImplementedError
+
+
+class BS4Parser(BaseParser):
+    """
+    Парсер, строящий полное дерево BeautifulSoup для каждой страницы.
+    """
+    @staticmethod
+    def soup(html: str):
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(html, "lxml")
+
+    def parse_account_page(self, html: str) -> AccountInfoFormat:
+        """
+        Парсит главную страницу FunPay (для авторизированного пользователя).
+
+        :param html: HTML код страницы.
+        :return: общие данные об аккаунте.
+        """
+        parser = self.soup(html)
+
+        username = parser.find("div", {"class": "user-link-name"})
+        if username is None:
+            raise Exception  # todo: создать и добавить кастомное исключение: невалидный токен.
+        username = username.text
+
+        app_data = json.loads(parser.find("body")["data-app-data"])
+
+        active_sales = parser.find("span", {"class": "badge badge-trade"})
+        active_sales = int(active_sales.text) if active_sales else 0
+
+        balance = parser.find("span", {"class": "badge badge-balance"})
+        balance_count = float(balance.text.split(" ")[0]) if balance else 0
+        balance_currency = balance.text.split(" ")[1] if balance else None
+
+        return {"app_data": app_data, "id": app_data["userId"], "username": username,
+                "csrf_token": app_data["csrf-token"], "active_orders": active_sales, "balance": balance_count,
+                "currency": balance_currency}
+
+    def parse_orders_page(self, html: str,
+                          include_outstanding: bool = True,
+                          include_completed: bool = False,
+                          include_refund: bool = False,
+                          exclude: Collection[str] | None = None,
+                          stop_at: Collection[str] | None = None) -> list[Order]:
+        """
+        Парсит страницу с продажами (https://funpay.com/orders/trade).
+
+        :param html: HTML код страницы.
+        :param include_outstanding: включить в список оплаченные (но не завершенные) заказы.
+        :param include_completed: включить в список завершенные заказы.
+        :param include_refund: включить в список заказы, за которые оформлен возврат.
+        :param exclude: ID заказов, которые нужно исключить из итогового списка (лучше передавать set / dict).
+        :param stop_at: ID заказов, на которых нужно остановить парсинг. Ордеры на странице отсортированы от новых к
+        старым, поэтому, встретив уже известный ордер, можно не парсить остальные.
+        :return: список с ордерами.
+        """
+        exclude = exclude if exclude else []
+        stop_at = stop_at if stop_at else []
+        parser = self.soup(html)
+
+        check_user = parser.find("div", {"class": "user-link-name"})
+        if check_user is None:
+            raise Exception  # todo: создать и добавить кастомное исключение: невалидный токен.
+
+        order_divs = parser.find_all("a", {"class": "tc-item"})
+        if order_divs is None:
+            return []
+        parsed_orders = []
+
+        for div in order_divs:
+            # stop_at проверяется до фильтров: парсинг останавливается на известном ордере, даже если он не
+            # попадает в итоговый список.
+            order_id = div.find("div", {"class": "tc-order"}).text
+            if order_id in stop_at:
+                break
+            order_div_classname = div.get("class")
+            if "warning" in order_div_classname:
+                if not include_refund:
+                    continue
+                status = OrderStatuses.REFUND
+            elif "info" in order_div_classname:
+                if not include_outstanding:
+                    continue
+                status = OrderStatuses.OUTSTANDING
+            else:
+                if not include_completed:
+                    continue
+                status = OrderStatuses.COMPLETED
+
+            if order_id in exclude:
+                continue
+            title = div.find("div", {"class": "order-desc"}).find("div").text
+            price = float(div.find("div", {"class": "tc-price"}).text.split(" ")[0])
+
+            buyer = div.find("div", {"class": "media-user-name"}).find("span")
+            buyer_name = buyer.text
+            buyer_id = int(buyer.get("data-href")[:-1].split("https://funpay.com/users/")[1])
+
+            order_object = Order(id_=order_id, title=title, price=price, buyer_username=buyer_name, buyer_id=buyer_id,
+                                 status=status)
+
+            parsed_orders.append(order_object)
+
+        return parsed_orders
+
+    def parse_category_game_id(self, html: str, category_type: CategoryTypes) -> int:
+        """
+        Парсит страницу редактирования лотов категории и достает из нее ID игры.
+
+        :param html: HTML код страницы.
+        :param category_type: тип категории.
+        :return: ID игры, к которой относится категория.
+        """
+        parser = self.soup(html)
+
+        check_user = parser.find("div", {"class": "user-link-name"})
+        if check_user is None:
+            raise Exception  # todo: создать и добавить кастомное исключение: невалидный токен.
+
+        if category_type == CategoryTypes.LOT:
+            return int(parser.find("div", {"class": "col-sm-6"}).find("button")["data-game"])
+        return int(parser.find("input", {"name": "game"})["value"])
+
+    def parse_raise_modal(self, html: str, exclude: list[str] | None = None) -> tuple[list[str], list[str]]:
+        """
+        Парсит modal-форму выбора категорий для поднятия.
+
+        :param html: HTML код modal-формы.
+        :param exclude: список из ID категорий, которые не нужно поднимать.
+        :return: (список ID категорий, список названий категорий).
+        """
+        parser = self.soup(html)
+        category_ids = []
+        category_names = []
+        checkboxes = parser.find_all("div", {"class": "checkbox"})
+        for cb in checkboxes:
+            category_id = cb.find("input")["value"]
+            if (exclude is not None and category_id not in exclude) or exclude is None:
+                category_ids.append(category_id)
+                category_name = cb.find("label").text
+                category_names.append(category_name)
+        return category_ids, category_names
+
+    def parse_lot_fields(self, html: str) -> list[dict[str, str]]:
+        """
+        Парсит форму редактирования лота.
+
+        :param html: HTML код формы.
+        :return: список словарей {"name": "название поля", "value": "значение поля"}.
+        """
+        parser = self.soup(html)
+
+        input_fields = parser.find_all("input")
+        text_fields = parser.find_all("textarea")
+        selection_fields = parser.find_all("select")
+        result = []
+        for field in input_fields:
+            name = field["name"]
+            value = field.get("value")
+            if value is None:
+                value = ""
+            result.append({"name": name, "value": value})
+
+        for field in text_fields:
+            name = field["name"]
+            text = field.text
+            if not text:
+                text = ""
+            result.append({"name": name, "value": text})
+
+        for field in selection_fields:
+            name = field["name"]
+            value = field.find("option", selected=True)["value"]
+            result.append({"name": name, "value": value})
+
+        return result
+
+    def parse_user_lots_page(self, html: str, include_currency: bool = False) -> UsersLotsInfoFormat:
+        """
+        Парсит публичную страницу пользователя.
+
+        :param html: HTML код страницы.
+        :param include_currency: включать ли в список категории / лоты, относящиеся к игровой валюте.
+        :return: {"categories": [категории пользователя], "lots": лоты пользователя.}
+        """
+        parser = self.soup(html)
+        categories = []
+        lots = []
+
+        # Если категорий не найдено - возвращаем пустые списки
+        category_divs = parser.find_all("div", {"class": "offer-list-title-container"})
+        if category_divs is None:
+            return {"categories": [], "lots": []}
+
+        # Парсим категории
+        for div in category_divs:
+            info_div = div.find("div", {"class": "offer-list-title"})
+            category_link = info_div.find("a")
+            public_link = category_link["href"]
+            if "chips" in public_link:
+                # 'chips' в ссылке означает, что данная категория - игровая валюта.
+                # Например: https://funpay.com/chips/125/ - Серебро Black Desert Mobile.
+                if not include_currency:
+                    continue
+                category_type = CategoryTypes.CURRENCY
+            else:
+                category_type = CategoryTypes.LOT
+
+            edit_lots_link = public_link + "trade"
+            title = category_link.text
+            category_id = int(public_link.split("/")[-2])
+            category_object = Category(id_=category_id, game_id=None, title=title, edit_lots_link=edit_lots_link,
+                                       public_link=public_link, type_=category_type)
+            categories.append(category_object)
+
+            # Парсим лоты внутри текущей категории
+            lot_divs = div.parent.find_all("a", {"class": "tc-item"})
+            for lot_div in lot_divs:
+                lot_id = int(lot_div["href"].split("id=")[1])
+                server = lot_div.find("div", {"class": "tc-server"})
+                server = server.text if server is not None else None
+                lot_title = lot_div.find("div", {"class": "tc-desc-text"}).text
+                price = lot_div.find("div", {"class": "tc-price"})["data-s"]
+
+                lot_obj = Lot(category_id, None, lot_id, server, lot_title, price)
+                lots.append(lot_obj)
+
+        return {"categories": categories, "lots": lots}
+
+    def parse_chat_bookmarks(self, html: str) -> list[tuple[int, str, str]]:
+        """
+        Парсит HTML список чатов, полученный от runner'а (chat_bookmarks).
+
+        :param html: HTML код списка чатов.
+        :return: список кортежей (node_id, текст последнего сообщения, никнейм собеседника).
+        """
+        parser = self.soup(html)
+        result = []
+        for msg in parser.find_all("a", {"class": "contact-item"}):
+            node_id = int(msg["data-id"])
+            message_text = msg.find("div", {"class": "contact-item-message"}).text
+            sender_username = msg.find("div", {"class": "media-user-name"}).text
+            result.append((node_id, message_text, sender_username))
+        return result
+
+    def parse_chat_node_id(self, html: str) -> int | None:
+        """
+        Парсит страницу чата и достает из нее node_id открытого чата.
+
+        :param html: HTML код страницы.
+        :return: node_id чата или None, если чат не найден.
+        """
+        parser = self.soup(html)
+        chat = parser.find("div", {"class": "chat", "data-id": True})
+        if chat is None or not chat["data-id"].isdigit():
+            return None
+        return int(chat["data-id"])
+
+
+def _has_class(class_name: str) -> str:
+    """
+    Генерирует XPath-условие "у элемента есть CSS класс class_name" (аналог {"class": class_name} в BeautifulSoup).
+
+    :param class_name: название CSS класса.
+    :return: XPath-условие.
+    """
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+def _text(element) -> str:
+    """
+    Возвращает весь текст элемента (аналог .text в BeautifulSoup).
+
+    :param element: lxml элемент.
+    :return: текст элемента.
+    """
+    return "".join(element.itertext())
+
+
+class LxmlParser(BaseParser):
+    """
+    Парсер, достающий только нужные узлы с помощью предкомпилированных XPath выражений.
+    Страница с ордерами разбирается потоково: уже обработанные ордеры сразу удаляются из памяти.
+    """
+    # Предкомпилированные XPath выражения.
+    user_link_name = etree.XPath(f"//div[{_has_class('user-link-name')}]")
+    body = etree.XPath("//body")
+    badge_trade = etree.XPath(f"//span[{_has_class('badge')} and {_has_class('badge-trade')}]")
+    badge_balance = etree.XPath(f"//span[{_has_class('badge')} and {_has_class('badge-balance')}]")
+    order_desc = etree.XPath(f".//div[{_has_class('order-desc')}]/div[1]")
+    order_id = etree.XPath(f".//div[{_has_class('tc-order')}]")
+    order_price = etree.XPath(f".//div[{_has_class('tc-price')}]")
+    order_buyer = etree.XPath(f".//div[{_has_class('media-user-name')}]//span[1]")
+    lot_game_id = etree.XPath(f"(//div[{_has_class('col-sm-6')}])[1]//button[1]/@data-game")
+    currency_game_id = etree.XPath("//input[@name='game'][1]/@value")
+    checkboxes = etree.XPath(f"//div[{_has_class('checkbox')}]")
+    category_containers = etree.XPath(f"//div[{_has_class('offer-list-title-container')}]")
+    category_link = etree.XPath(f".//div[{_has_class('offer-list-title')}]//a[1]")
+    lot_items = etree.XPath(f".//a[{_has_class('tc-item')}]")
+    lot_server = etree.XPath(f".//div[{_has_class('tc-server')}]")
+    lot_title = etree.XPath(f".//div[{_has_class('tc-desc-text')}]")
+    lot_price = etree.XPath(f".//div[{_has_class('tc-price')}]/@data-s")
+    contact_items = etree.XPath(f"//a[{_has_class('contact-item')}]")
+    contact_message = etree.XPath(f".//div[{_has_class('contact-item-message')}]")
+    contact_username = etree.XPath(f".//div[{_has_class('media-user-name')}]")
+    chat_node_id = etree.XPath(f"//div[{_has_class('chat')}]/@data-id")
+
+    @staticmethod
+    def tree(html: str):
+        return lxml_html.fromstring(html)
+
+    def parse_account_page(self, html: str) -> AccountInfoFormat:
+        tree = self.tree(html)
+
+        username = self.user_link_name(tree)
+        if not username:
+            raise Exception  # todo: создать и добавить кастомное исключение: невалидный токен.
+        username = _text(username[0])
+
+        app_data = json.loads(self.body(tree)[0].get("data-app-data"))
+
+        active_sales = self.badge_trade(tree)
+        active_sales = int(_text(active_sales[0])) if active_sales else 0
+
+        balance = self.badge_balance(tree)
+        balance_text = _text(balance[0]) if balance else None
+        balance_count = float(balance_text.split(" ")[0]) if balance else 0
+        balance_currency = balance_text.split(" ")[1] if balance else None
+
+        return {"app_data": app_data, "id": app_data["userId"], "username": username,
+                "csrf_token": app_data["csrf-token"], "active_orders": active_sales, "balance": balance_count,
+                "currency": balance_currency}
+
+    def parse_orders_page(self, html: str,
+                          include_outstanding: bool = True,
+                          include_completed: bool = False,
+                          include_refund: bool = False,
+                          exclude: Collection[str] | None = None,
+                          stop_at: Collection[str] | None = None) -> list[Order]:
+        exclude = exclude if exclude else []
+        stop_at = stop_at if stop_at else []
+        check_user = False
+        parsed_orders = []
+
+        events = etree.iterparse(io.BytesIO(html.encode("utf-8")), events=("end", ), tag=("a", "div"), html=True,
+                                 encoding="utf-8")
+        for _, element in events:
+            classes = element.get("class", "").split()
+            if element.tag == "div":
+                if "user-link-name" in classes:
+                    check_user = True
+                continue
+            if "tc-item" not in classes:
+                continue
+
+            order_id = _text(self.order_id(element)[0])
+            if order_id in stop_at:
+                break
+            order = self.__parse_order(element, order_id, classes, include_outstanding, include_completed,
+                                       include_refund, exclude)
+            if order is not None:
+                parsed_orders.append(order)
+
+            # Удаляем уже обработанные узлы, чтобы не держать в памяти все дерево.
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+        if not check_user:
+            raise Exception  # todo: создать и добавить кастомное исключение: невалидный токен.
+        return parsed_orders
+
+    def __parse_order(self, element, order_id: str, classes: list[str], include_outstanding: bool,
+                      include_completed: bool, include_refund: bool, exclude: Collection[str]) -> Order | None:
+        """
+        Парсит 1 ордер (<a class="tc-item">) со страницы продаж.
+
+        :return: экземпляр Order или None, если ордер не подходит под фильтры.
+        """
+        if "warning" in classes:
+            if not include_refund:
+                return None
+            status = OrderStatuses.REFUND
+        elif "info" in classes:
+            if not include_outstanding:
+                return None
+            status = OrderStatuses.OUTSTANDING
+        else:
+            if not include_completed:
+                return None
+            status = OrderStatuses.COMPLETED
+
+        if order_id in exclude:
+            return None
+        title = _text(self.order_desc(element)[0])
+        price = float(_text(self.order_price(element)[0]).split(" ")[0])
+
+        buyer = self.order_buyer(element)[0]
+        buyer_name = _text(buyer)
+        buyer_id = int(buyer.get("data-href")[:-1].split("https://funpay.com/users/")[1])
+
+        return Order(id_=order_id, title=title, price=price, buyer_username=buyer_name, buyer_id=buyer_id,
+                     status=status)
+
+    def parse_category_game_id(self, html: str, category_type: CategoryTypes) -> int:
+        tree = self.tree(html)
+        if not self.user_link_name(tree):
+            raise Exception  # todo: создать и добавить кастомное исключение: невалидный токен.
+
+        if category_type == CategoryTypes.LOT:
+            return int(self.lot_game_id(tree)[0])
+        return int(self.currency_game_id(tree)[0])
+
+    def parse_raise_modal(self, html: str, exclude: list[str] | None = None) -> tuple[list[str], list[str]]:
+        tree = self.tree(html)
+        category_ids = []
+        category_names = []
+        for cb in self.checkboxes(tree):
+            category_id = cb.find(".//input").get("value")
+            if (exclude is not None and category_id not in exclude) or exclude is None:
+                category_ids.append(category_id)
+                category_names.append(_text(cb.find(".//label")))
+        return category_ids, category_names
+
+    def parse_lot_fields(self, html: str) -> list[dict[str, str]]:
+        tree = self.tree(html)
+        result = []
+        for field in tree.iter("input"):
+            result.append({"name": field.get("name"), "value": field.get("value") or ""})
+
+        for field in tree.iter("textarea"):
+            result.append({"name": field.get("name"), "value": _text(field)})
+
+        for field in tree.iter("select"):
+            result.append({"name": field.get("name"), "value": field.xpath(".//option[@selected][1]/@value")[0]})
+        return result
+
+    def parse_user_lots_page(self, html: str, include_currency: bool = False) -> UsersLotsInfoFormat:
+        tree = self.tree(html)
+        categories = []
+        lots = []
+
+        for div in self.category_containers(tree):
+            category_link = self.category_link(div)[0]
+            public_link = category_link.get("href")
+            if "chips" in public_link:
+                if not include_currency:
+                    continue
+                category_type = CategoryTypes.CURRENCY
+            else:
+                category_type = CategoryTypes.LOT
+
+            category_id = int(public_link.split("/")[-2])
+            categories.append(Category(id_=category_id, game_id=None, title=_text(category_link),
+                                       edit_lots_link=public_link + "trade", public_link=public_link,
+                                       type_=category_type))
+
+            for lot_div in self.lot_items(div.getparent()):
+                lot_id = int(lot_div.get("href").split("id=")[1])
+                server = self.lot_server(lot_div)
+                server = _text(server[0]) if server else None
+                lot_title = _text(self.lot_title(lot_div)[0])
+                price = self.lot_price(lot_div)[0]
+                lots.append(Lot(category_id, None, lot_id, server, lot_title, price))
+
+        return {"categories": categories, "lots": lots}
+
+    def parse_chat_bookmarks(self, html: str) -> list[tuple[int, str, str]]:
+        tree = self.tree(html)
+        result = []
+        for msg in self.contact_items(tree):
+            node_id = int(msg.get("data-id"))
+            message_text = _text(self.contact_message(msg)[0])
+            sender_username = _text(self.contact_username(msg)[0])
+            result.append((node_id, message_text, sender_username))
+        return result
+
+    def parse_chat_node_id(self, html: str) -> int | None:
+        node_id = self.chat_node_id(self.tree(html))
+        if not node_id or not node_id[0].isdigit():
+            return None
+        return int(node_id[0])
+
+
+# Регулярные выражения для разбиения списка чатов на фрагменты без построения дерева.
+CONTACT_ITEM_RE = re.compile(r"<a\b[^>]*\bcontact-item\b[^>]*>.*?</a>", re.S)
+DATA_ID_RE = re.compile(r"<a\b[^>]*?\bdata-id=\"(\d+)\"")
+
+
+def split_chat_bookmarks(html: str) -> list[tuple[int, str]]:
+    """
+    Разбивает HTML список чатов на фрагменты (по 1 на чат) без построения дерева.
+    Текст сообщений в списке экранирован, поэтому тэг </a> внутри фрагмента встретиться не может.
+
+    :param html: HTML код списка чатов.
+    :return: список кортежей (node_id, HTML фрагмент чата).
+    """
+    result = []
+    for match in CONTACT_ITEM_RE.finditer(html):
+        fragment = match.group(0)
+        node_id = DATA_ID_RE.match(fragment)
+        if node_id is None:
+            return []
+        result.append((int(node_id.group(1)), fragment))
+    return result
+
+
+# Текущий бэкенд парсинга.
+_parser: BaseParser = LxmlParser()
+PARSERS = {
+    "lxml": LxmlParser,
+    "bs4": BS4Parser
+}
+
+
+def set_parser(parser: BaseParser | str) -> None:
+    """
+    Устанавливает бэкенд парсинга.
+
+    :param parser: экземпляр парсера или название бэкенда из PARSERS ("lxml", "bs4").
+    """
+    global _parser
+    _parser = PARSERS[parser]() if isinstance(parser, str) else parser
+
+
+def get_parser() -> BaseParser:
+    """
+    :return: текущий бэкенд парсинга.
+    """
+    return _parser
+
+
+def parse_account_page(html: str) -> AccountInfoFormat:
+    return _parser.parse_account_page(html)
+
+
+def parse_orders_page(html: str, include_outstanding: bool = True, include_completed: bool = False,
+                      include_refund: bool = False, exclude: Collection[str] | None = None,
+                      stop_at: Collection[str] | None = None) -> list[Order]:
+    return _parser.parse_orders_page(html, include_outstanding, include_completed, include_refund, exclude, stop_at)
+
+
+def parse_category_game_id(html: str, category_type: CategoryTypes) -> int:
+    return _parser.parse_category_game_id(html, category_type)
+
+
+def parse_raise_modal(html: str, exclude: list[str] | None = None) -> tuple[list[str], list[str]]:
+    return _parser.parse_raise_modal(html, exclude)
+
+
+def parse_lot_fields(html: str) -> list[dict[str, str]]:
+    return _parser.parse_lot_fields(html)
+
+
+def parse_user_lots_page(html: str, include_currency: bool = False) -> UsersLotsInfoFormat:
+    return _parser.parse_user_lots_page(html, include_currency)
+
+
+def parse_chat_bookmarks(html: str) -> list[tuple[int, str, str]]:
+    return _parser.parse_chat_bookmarks(html)
+
+
+def parse_chat_node_id(html: str) -> int | None:
+    return _parser.parse_chat_node_id(html)
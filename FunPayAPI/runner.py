@@ -4,11 +4,11 @@
 
 
 import json
-import requests
-from bs4 import BeautifulSoup
+import time
 import logging
 
 from .other import gen_rand_tag
+from .parsers import parse_chat_bookmarks, split_chat_bookmarks
 from .account import Account
 from .enums import Links, EventTypes
 
@@ -44,6 +44,8 @@ class MessageEvent(Event):
         self.sender_username = sender_username
         self.message_text = message_text
         self.tag = tag
+        # Название команды авто-ответчика, которой соответствует сообщение (заполняется Кардиналом).
+        self.command: str | None = None
 
 
 class OrderEvent(Event):
@@ -58,13 +60,22 @@ class OrderEvent(Event):
         super(OrderEvent, self).__init__(EventTypes.NEW_ORDER)
         self.buyer = buyer
         self.seller = seller
+        # Новые ордеры, найденные Кардиналом по этому эвенту (сравнением с ID обработанных ордеров).
+        # None - список ордеров не обновлялся (или его не удалось обновить).
+        self.new_orders: list | None = None
 
 
 class Runner:
     """
     Класс runner'а.
     """
-    def __init__(self, account: Account, timeout: float = 10.0):
+    def __init__(self, account: Account, timeout: float = 10.0, incremental: bool = True):
+        """
+        :param account: экземпляр Account.
+        :param timeout: тайм-аут ожидания ответа.
+        :param incremental: парсить ли только изменившиеся чаты (по хэшу HTML фрагмента каждого чата).
+        Если False - при каждом обновлении парсится весь список чатов.
+        """
         self.message_tag: str = gen_rand_tag()
         self.order_tag: str = gen_rand_tag()
         # Во время первого запроса все данные, полученные от FunPay не возвращаются в self.get_updates(), а сохраняются
@@ -75,6 +86,12 @@ class Runner:
         self.timeout = timeout
 
         self.last_messages: dict[int, MessageEvent] = {}
+        self.incremental = incremental
+        # Хэши HTML фрагментов чатов из последнего списка чатов: {node_id: хэш}.
+        self.bookmarks_hashes: dict[int, int] = {}
+        # Время (в секундах) HTTP-запроса и парсинга ответа последнего вызова get_updates() (для метрик).
+        self.last_request_time = 0.0
+        self.last_parse_time = 0.0
 
         self.logger = logging.getLogger(__name__)
         self.logger.addHandler(logging.NullHandler())
@@ -84,6 +101,26 @@ class Runner:
         Получает список обновлений от FunPay.
         :return: список эвентов.
         """
+        headers = {
+            "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
+            "x-requested-with": "XMLHttpRequest"
+        }
+        start = time.perf_counter()
+        response = self.account.session.post(Links.RUNNER, headers=headers, data=self.build_payload(),
+                                             timeout=self.timeout)
+        json_response = response.json()
+        parse_start = time.perf_counter()
+        self.last_request_time = parse_start - start
+        events = self.parse_updates(json_response)
+        self.last_parse_time = time.perf_counter() - parse_start
+        return events
+
+    def build_payload(self) -> dict:
+        """
+        Собирает payload для запроса к runner'у.
+
+        :return: payload для запроса.
+        """
         orders = {
             "type": "orders_counters",
             "id": self.account.id,
@@ -96,19 +133,19 @@ class Runner:
             "tag": self.message_tag,
             "data": False
         }
-        payload = {
+        return {
             "objects": json.dumps([orders, chats]),
             "request": False,
             "csrf_token": self.account.csrf_token
         }
-        headers = {
-            "accept": "*/*",
-            "cookie": f"golden_key={self.account.golden_key}; PHPSESSID={self.account.session_id}",
-            "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
-            "x-requested-with": "XMLHttpRequest"
-        }
-        response = requests.post(Links.RUNNER, headers=headers, data=payload, timeout=self.timeout)
-        json_response = response.json()
+
+    def parse_updates(self, json_response: dict) -> list[MessageEvent | OrderEvent]:
+        """
+        Обрабатывает ответ runner'а и формирует список эвентов.
+
+        :param json_response: ответ FunPay.
+        :return: список эвентов.
+        """
         self.logger.debug(json_response)
         events = []
         for obj in json_response["objects"]:
@@ -120,13 +157,14 @@ class Runner:
                     events.append(order_obj)
 
             elif obj.get("type") == "chat_bookmarks":
+                # Если тэг не изменился - список чатов тоже не изменился, парсить нечего.
+                if self.incremental and not self.first_request and obj.get("tag") == self.message_tag:
+                    continue
+                if not obj.get("data"):
+                    continue
                 self.message_tag = obj.get("tag")
-                self.account.chats_html = obj["data"]["html"]
-                parser = BeautifulSoup(obj["data"]["html"], "lxml")
-                messages = parser.find_all("a", {"class": "contact-item"})
-                for msg in messages:
-                    node_id = int(msg["data-id"])
-                    message_text = msg.find("div", {"class": "contact-item-message"}).text
+                for node_id, message_text, sender_username in self.parse_chat_bookmarks(obj["data"]["html"]):
+                    self.account.set_chat_node_id(sender_username, node_id)
 
                     # Если это старое сообщение (сохранено в self.last_messages) -> пропускаем.
                     if node_id in self.last_messages:
@@ -134,8 +172,6 @@ class Runner:
                         if check_msg.message_text == message_text:
                             continue
 
-                    sender_username = msg.find("div", {"class": "media-user-name"}).text
-
                     msg_object = MessageEvent(node_id=node_id, message_text=message_text, sender_username=sender_username,
                                               tag=self.message_tag)
                     self.update_lat_message(msg_object)
@@ -149,6 +185,34 @@ class Runner:
 
         return events
 
+    def parse_chat_bookmarks(self, html: str) -> list[tuple[int, str, str]]:
+        """
+        Парсит список чатов. В инкрементальном режиме парсит только те чаты, HTML фрагмент которых изменился
+        с прошлого обновления.
+
+        :param html: HTML код списка чатов.
+        :return: список кортежей (node_id, текст последнего сообщения, никнейм собеседника).
+        """
+        if not self.incremental:
+            return parse_chat_bookmarks(html)
+
+        fragments = split_chat_bookmarks(html)
+        if not fragments:
+            # Не удалось разбить список на фрагменты (например, FunPay изменил верстку) - парсим целиком.
+            return parse_chat_bookmarks(html)
+
+        changed = []
+        for node_id, fragment in fragments:
+            fragment_hash = hash(fragment)
+            if self.bookmarks_hashes.get(node_id) == fragment_hash:
+                continue
+            self.bookmarks_hashes[node_id] = fragment_hash
+            changed.append(fragment)
+
+        if not changed:
+            return []
+        return parse_chat_bookmarks("".join(changed))
+
     def update_lat_message(self, msg: MessageEvent) -> None:
         """
         Вручную обновляет объект последнего сообщения в self.last_messages
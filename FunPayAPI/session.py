@@ -0,0 +1,92 @@
+"""
+В данном модуле описан класс HTTP-сессии, через которую отправляются все запросы к FunPay.
+"""
+
+
+import time
+from urllib.parse import urlparse
+from typing import Callable
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .enums import Links, RequestTypes
+from .limiter import RequestLimiter
+
+
+class FunPaySession(requests.Session):
+    """
+    HTTP-сессия аккаунта FunPay.
+    Держит пул keep-alive соединений с funpay.com, куки аккаунта (golden_key, PHPSESSID, locale) и стандартные
+    заголовки, благодаря чему каждый запрос не открывает новое TCP + TLS соединение.
+    Если задан ограничитель (limiter), каждый запрос перед отправкой ждет своей очереди в нем, а ответ 429
+    приостанавливает все запросы через ограничитель (RequestLimiter.backoff()).
+    Если задан хук on_response, после каждого запроса он вызывается с классом запроса, ответом (None, если запрос
+    завершился исключением) и временем выполнения запроса (без учета ожидания в ограничителе).
+    """
+    def __init__(self, golden_key: str | None = None, session_id: str | None = None, locale: str | None = "ru",
+                 pool_size: int = 10, limiter: RequestLimiter | None = None,
+                 on_response: Callable[[RequestTypes, requests.Response | None, float], None] | None = None):
+        """
+        :param golden_key: golden_key (токен) аккаунта.
+        :param session_id: PHPSESSID.
+        :param locale: язык, на котором FunPay будет возвращать ответы.
+        :param pool_size: максимальное кол-во одновременно открытых соединений с FunPay.
+        :param limiter: общий ограничитель частоты запросов к FunPay.
+        :param on_response: хук, вызываемый после каждого запроса (для метрик).
+        """
+        super(FunPaySession, self).__init__()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+        self.headers.update({"accept": "*/*"})
+        self.domain = urlparse(Links.BASE_URL).hostname
+        self.limiter = limiter
+        self.on_response = on_response
+
+        if golden_key is not None:
+            self.set_cookie("golden_key", golden_key)
+        if session_id is not None:
+            self.set_cookie("PHPSESSID", session_id)
+        if locale is not None:
+            self.set_cookie("locale", locale)
+
+    def set_cookie(self, name: str, value: str) -> None:
+        """
+        Устанавливает (или заменяет) куки для домена FunPay.
+
+        :param name: название куки.
+        :param value: значение куки.
+        """
+        self.cookies.set(name, value, domain=self.domain, path="/")
+
+    @staticmethod
+    def retry_after(response) -> float | None:
+        """
+        :param response: ответ FunPay (requests.Response или aiohttp.ClientResponse).
+        :return: время (в секундах) из заголовка Retry-After или None, если заголовка нет / он не является числом.
+        """
+        try:
+            return float(response.headers["Retry-After"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def request(self, method, url, *args, **kwargs):
+        if self.limiter is None and self.on_response is None:
+            return super(FunPaySession, self).request(method, url, *args, **kwargs)
+        data = kwargs.get("data", args[1] if len(args) > 1 else None)
+        request_type = RequestLimiter.classify(method, url, data)
+        if self.limiter is not None:
+            self.limiter.acquire(request_type)
+
+        start = time.perf_counter()
+        response = None
+        try:
+            response = super(FunPaySession, self).request(method, url, *args, **kwargs)
+            return response
+        finally:
+            if self.limiter is not None and response is not None:
+                self.limiter.report(response.status_code, self.retry_after(response))
+            if self.on_response is not None:
+                self.on_response(request_type, response, time.perf_counter() - start)
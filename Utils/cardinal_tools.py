@@ -4,9 +4,9 @@
 
 
 import os
+import ast
 import json
 from datetime import datetime
-import itertools
 
 
 import FunPayAPI.account
@@ -14,57 +14,78 @@ import FunPayAPI.categories
 import FunPayAPI.runner
 import FunPayAPI.orders
 
-import Utils.exceptions as excs
+from Utils import products_store, templates
+from Utils.categories_cache import CategoriesCache
 
 
 def cache_categories(category_list: list[FunPayAPI.categories.Category]) -> None:
     """
     Кэширует данные о категориях аккаунта в файл storage/cache/categories.json. Необходимо для того, чтобы каждый раз
     при запуске бота не отправлять запросы на получение game_id каждой категории.
+    Время обновления записи меняется, только если запись новая или ID игры изменился.
 
     :param category_list: список категорий, которые необходимо кэшировать.
     :return: None
     """
-    result = {}
+    cache = CategoriesCache()
+    cache.load()
     for cat in category_list:
         # Если у объекта категории game_id = None, то и нет смысла кэшировать данную категорию.
         if cat.game_id is None:
             continue
+        entry = cache.entries.get(cache.key(cat))
+        if entry is None or entry["game_id"] != cat.game_id:
+            cache.set(cache.key(cat), cat.game_id)
+    cache.save()
 
-        # Имя категории для кэширования = id категории_тип категории (lot - 0, currency - 1).
-        # Например:
-        # 146_0 = https://funpay.com/lots/146/
-        # 146_1 = https://funpay.com/chips/146/
-        category_cached_name = f"{cat.id}_{cat.type.value}"
-        result[category_cached_name] = cat.game_id
 
-    # Создаем папку для хранения кэшированных данных.
+def load_cached_categories() -> dict:
+    """
+    Загружает данные о категориях аккаунта из файла storage/cache/categories.json. Необходимо для того, чтобы каждый раз
+    при запуске бота не отправлять запросы на получение game_id каждой категории.
+
+    :return: словарь загруженных категорий {ID категории_тип категории: ID игры}.
+    """
+    cache = CategoriesCache()
+    cache.load()
+    return {k: v["game_id"] for k, v in cache.entries.items()}
+
+
+def cache_chats(chats_index: dict[str, int]) -> None:
+    """
+    Кэширует индекс чатов аккаунта ({никнейм собеседника: node_id}) в файл storage/cache/chats.json.
+    Необходимо для того, чтобы после перезапуска бота сразу находить чат покупателя без запросов к FunPay.
+
+    :param chats_index: индекс чатов.
+    :return: None
+    """
     if not os.path.exists("storage/cache"):
         os.makedirs("storage/cache")
 
-    # Записываем данные в кэш.
-    with open("storage/cache/categories.json", "w", encoding="utf-8") as f:
-        f.write(json.dumps(result, indent=4))
+    # Атомарная запись (через временный файл): при падении во время записи старый кэш не повреждается.
+    data = json.dumps(chats_index, indent=4, ensure_ascii=False)
+    with open("storage/cache/chats.json.tmp", "w", encoding="utf-8") as f:
+        f.write(data)
+    os.replace("storage/cache/chats.json.tmp", "storage/cache/chats.json")
 
 
-def load_cached_categories() -> dict:
+def load_cached_chats() -> dict[str, int]:
     """
-    Загружает данные о категориях аккаунта из файла storage/cache/categories.json. Необходимо для того, чтобы каждый раз
-    при запуске бота не отправлять запросы на получение game_id каждой категории.
+    Загружает индекс чатов аккаунта из файла storage/cache/chats.json.
 
-    :return: словарь загруженных категорий.
+    :return: индекс чатов {никнейм собеседника: node_id}.
     """
-    if not os.path.exists("storage/cache/categories.json"):
+    if not os.path.exists("storage/cache/chats.json"):
         return {}
 
-    with open("storage/cache/categories.json", "r", encoding="utf-8") as f:
-        cached_categories = f.read()
+    with open("storage/cache/chats.json", "r", encoding="utf-8") as f:
+        cached_chats = f.read()
 
     try:
-        cached_categories = json.loads(cached_categories)
+        cached_chats = json.loads(cached_chats)
     except json.decoder.JSONDecodeError:
         return {}
-    return cached_categories
+    return cached_chats
 
 
 def create_greetings(account: FunPayAPI.account):
@@ -148,61 +169,26 @@ def time_to_str(time_: int):
 
 def get_product(path: str) -> list[str | int] | None:
     """
-    Берет 1 единицу товара из файла.
+    Берет 1 единицу товара из файла (через хранилище товаров Utils.products_store).
 
     :param path: путь до файла с товарами.
     :return: [Товар, оставшееся кол-во товара]
     """
-    with open(path, "r", encoding="utf-8") as f:
-        products = f.read()
-
-    if path.endswith(".json"):
-        products = json.loads(products)
-    else:
-        products = products.split("\n")
-
-    # Убираем пустые элементы
-    products = list(itertools.filterfalse(lambda el: not el, products))
-
-    if not len(products):
-        raise excs.NoProductsError(path)
-
-    product = str(products[0])
-    products.pop(0)
-    amount = len(products)
-
-    with open(path, "w", encoding="utf-8") as f:
-        if path.endswith(".json"):
-            f.write(json.dumps(products, indent=4, ensure_ascii=False))
-        else:
-            f.write("\n".join(products))
-
+    store = products_store.get_store()
+    reservation_id, product, amount = store.reserve(path)
+    store.commit(reservation_id)
     return [product, amount]
 
 
 def add_product(path: str, product: str) -> None:
     """
-    Добавляет 1 единицу товара в файл.
+    Добавляет 1 единицу товара в файл (через хранилище товаров Utils.products_store).
 
     :param path: путь до файла с товарами.
     :param product: товар.
     :return:
     """
-    with open(path, "r", encoding="utf-8") as f:
-        products = f.read()
-
-    if path.endswith(".json"):
-        products = json.loads(products)
-    else:
-        products = products.split("\n")
-
-    products.append(product)
-
-    with open(path, "w", encoding="utf-8") as f:
-        if path.endswith(".json"):
-            f.write(json.dumps(products, indent=4, ensure_ascii=False))
-        else:
-            f.write("\n".join(products))
+    products_store.get_store().add(path, [product])
 
 
 def format_msg_text(text: str, msg: FunPayAPI.runner.MessageEvent) -> str:
@@ -213,57 +199,91 @@ def format_msg_text(text: str, msg: FunPayAPI.runner.MessageEvent) -> str:
     :param msg: экземпляр MessageEvent.
     :return: форматированый текст.
     """
-    date_obj = datetime.now()
-    month_name = get_month_name(date_obj.month)
-    date = date_obj.strftime("%d.%m.%Y")
-    str_date = f"{date_obj.day} {month_name}"
-    str_full_date = str_date + f" {date_obj.year} года"
-
-    time_ = date_obj.strftime("%H:%M")
-    time_full = date_obj.strftime("%H:%M:%S")
-
-    variables = {
-        "$full_date_text": str_full_date,
-        "$date_text": str_date,
-        "$date": date,
-        "$time": time_,
-        "$full_time": time_full,
-        "$username": msg.sender_username,
-        "$message_text": msg.message_text
-    }
-
-    for var in variables:
-        text = text.replace(var, variables[var])
-    return text
-
-
-def format_order_text(text: str, order: FunPayAPI.orders.Order) -> str:
+    return templates.render(text, templates.TemplateContext(msg=msg))
+
+
+def format_order_text(text: str, order: FunPayAPI.orders.Order, product: str | None = None) -> str:
     """
     Форматирует текст, подставляя значения переменных, доступных для Order.
 
     :param text: текст для форматирования.
     :param order: экземпляр Order.
+    :param product: текст товара (для переменной $product).
     :return: форматированый текст.
     """
-    date_obj = datetime.now()
-    month_name = get_month_name(date_obj.month)
-    date = date_obj.strftime("%d.%m.%Y")
-    str_date = f"{date_obj.day} {month_name}"
-    str_full_date = str_date + f" {date_obj.year} года"
-
-    time_ = date_obj.strftime("%H:%M")
-    time_full = date_obj.strftime("%H:%M:%S")
-
-    variables = {
-        "$full_date_text": str_full_date,
-        "$date_text": str_date,
-        "$date": date,
-        "$time": time_,
-        "$full_time": time_full,
-        "$username": order.buyer_name,
-        "$order_name": order.title,
-    }
-
-    for var in variables:
-        text = text.replace(var, variables[var])
-    return text
+    return templates.render(text, templates.TemplateContext(order=order, product=product))
+
+
+def username_variable(ctx: templates.TemplateContext) -> str | None:
+    """
+    :return: значение переменной $username (никнейм собеседника / покупателя).
+    """
+    if ctx.msg is not None:
+        return ctx.msg.sender_username
+    return ctx.order.buyer_name if ctx.order is not None else None
+
+
+# Стандартные переменные шаблонов.
+templates.register_variable("$full_date_text", lambda ctx: f"{ctx.now.day} {get_month_name(ctx.now.month)} "
+                                                           f"{ctx.now.year} года")
+templates.register_variable("$date_text", lambda ctx: f"{ctx.now.day} {get_month_name(ctx.now.month)}")
+templates.register_variable("$date", lambda ctx: ctx.now.strftime("%d.%m.%Y"))
+templates.register_variable("$time", lambda ctx: ctx.now.strftime("%H:%M"))
+templates.register_variable("$full_time", lambda ctx: ctx.now.strftime("%H:%M:%S"))
+templates.register_variable("$username", username_variable)
+templates.register_variable("$message_text", lambda ctx: ctx.msg.message_text if ctx.msg is not None else None)
+templates.register_variable("$order_name", lambda ctx: ctx.order.title if ctx.order is not None else None)
+templates.register_variable("$product", lambda ctx: ctx.extra.get("product"))
+
+
+def read_plugin_manifest(path: str) -> set[str] | None:
+    """
+    Определяет, на какие эвенты подписан плагин, не выполняя его: ищет в синтаксическом дереве файла присваивания
+    переменным REGISTER_TO_..._EVENT на верхнем уровне модуля. Пустые списки ([]) не считаются подпиской.
+
+    Подписки считаются известными, только если каждая переменная REGISTER_TO_... объявлена литералом списка / кортежа
+    на верхнем уровне модуля и больше нигде не упоминается. Любое другое использование (append / extend / insert,
+    +=, присваивание не литерала или внутри if / функции, декораторы, импорт, строки с названием переменной) делает
+    подписки неизвестными.
+
+    :param path: путь до файла плагина.
+    :return: названия переменных, на которые подписан плагин, или None, если подписки определить не удалось
+    (синтаксическая ошибка, подписки изменяются кодом или плагин не объявляет ни одной такой переменной) - такой
+    плагин нужно загрузить сразу.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        source = f.read()
+    try:
+        tree = ast.parse(source, filename=path)
+    except SyntaxError:
+        return None
+
+    # {название переменной: подписан ли плагин (непустой литерал)} - по последнему присваиванию.
+    declared = {}
+    # Узлы-цели присваиваний литералов на верхнем уровне: единственные допустимые упоминания переменных.
+    allowed = set()
+    for node in tree.body:
+        if not isinstance(node, (ast.Assign, ast.AnnAssign)) or not isinstance(node.value, (ast.List, ast.Tuple)):
+            continue
+        targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+        for target in targets:
+            if isinstance(target, ast.Name) and target.id.startswith("REGISTER_TO_"):
+                declared[target.id] = bool(node.value.elts)
+                allowed.add(id(target))
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id.startswith("REGISTER_TO_") and id(node) not in allowed:
+            return None
+        if isinstance(node, ast.Attribute) and node.attr.startswith("REGISTER_TO_"):
+            return None
+        if isinstance(node, ast.Constant) and isinstance(node.value, str) and "REGISTER_TO_" in node.value:
+            return None
+        if isinstance(node, ast.alias) and (node.name == "*" or node.name.startswith("REGISTER_TO_") or
+                                            (node.asname or "").startswith("REGISTER_TO_")):
+            return None
+        if isinstance(node, (ast.Global, ast.Nonlocal)) and any(i.startswith("REGISTER_TO_") for i in node.names):
+            return None
+
+    if not declared:
+        return None
+    return {name for name, subscribed in declared.items() if subscribed}
@@ -0,0 +1,144 @@
+"""
+В данном модуле написан кэш ID игр категорий аккаунта (storage/cache/categories.json).
+"""
+
+
+import os
+import json
+import time
+import logging
+from threading import Lock
+
+
+logger = logging.getLogger("Cardinal.cache")
+
+
+class CategoriesCache:
+    """
+    Кэш ID игр категорий: {ID категории_тип категории: ID игры}.
+    Для каждой записи хранится время последнего обновления. Записи старше ttl считаются устаревшими: они по-прежнему
+    используются (запуск не требует запросов к FunPay), но должны быть перепроверены в фоне.
+
+    Формат файла (версия 2):
+    {"version": 2, "entries": {"146_0": {"game_id": 41, "updated": 1672531200}}}
+    Файл старого формата ({"146_0": 41}) мигрирует автоматически: все его записи считаются устаревшими.
+    """
+    VERSION = 2
+
+    def __init__(self, path: str = "storage/cache/categories.json", ttl: int = 7 * 24 * 60 * 60):
+        """
+        :param path: путь до файла кэша.
+        :param ttl: время жизни записи (в секундах).
+        """
+        self.path = path
+        self.ttl = ttl
+        self.lock = Lock()
+        # {ID категории_тип категории: {"game_id": ID игры, "updated": время обновления}}
+        self.entries: dict[str, dict] = {}
+
+        # Счетчики.
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.refreshes = 0
+
+    @staticmethod
+    def key(category) -> str:
+        """
+        Имя категории в кэше = ID категории_тип категории (lot - 0, currency - 1).
+        Например:
+        146_0 = https://funpay.com/lots/146/
+        146_1 = https://funpay.com/chips/146/
+
+        :param category: экземпляр категории.
+        :return: имя категории в кэше.
+        """
+        return f"{category.id}_{category.type.value}"
+
+    def load(self) -> None:
+        """
+        Загружает кэш из файла (с миграцией старого формата). Поврежденный файл игнорируется.
+        """
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.loads(f.read())
+        except (OSError, json.decoder.JSONDecodeError):
+            logger.warning(f"Файл кэша {self.path} поврежден и будет перезаписан.")
+            return
+
+        if not isinstance(data, dict):
+            return
+        if "version" not in data:
+            # Версия 1: {ID категории_тип категории: ID игры}
+            entries = {k: {"game_id": v, "updated": 0} for k, v in data.items() if isinstance(v, int)}
+        elif data["version"] == self.VERSION:
+            entries = {k: v for k, v in data.get("entries", {}).items()
+                       if isinstance(v, dict) and isinstance(v.get("game_id"), int)}
+        else:
+            logger.warning(f"Неизвестная версия кэша {self.path}: {data['version']}. Кэш будет перезаписан.")
+            return
+        with self.lock:
+            self.entries = entries
+
+    def save(self) -> None:
+        """
+        Атомарно записывает кэш в файл (через временный файл).
+        """
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        with self.lock:
+            data = json.dumps({"version": self.VERSION, "entries": self.entries}, indent=4)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def get(self, key: str) -> int | None:
+        """
+        :param key: имя категории в кэше.
+        :return: ID игры или None, если категории нет в кэше.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if self.is_stale(entry):
+                self.stale += 1
+            return entry["game_id"]
+
+    def set(self, key: str, game_id: int) -> None:
+        """
+        Сохраняет (обновляет) запись.
+
+        :param key: имя категории в кэше.
+        :param game_id: ID игры.
+        """
+        with self.lock:
+            self.entries[key] = {"game_id": game_id, "updated": int(time.time())}
+
+    def is_stale(self, entry: dict) -> bool:
+        return time.time() - entry.get("updated", 0) > self.ttl
+
+    def stale_keys(self) -> list[str]:
+        """
+        :return: имена устаревших записей.
+        """
+        with self.lock:
+            return [k for k, v in self.entries.items() if self.is_stale(v)]
+
+    def stats(self) -> dict:
+        """
+        :return: счетчики кэша (для мониторинга).
+        """
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "refreshes": self.refreshes
+        }
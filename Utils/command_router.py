@@ -0,0 +1,78 @@
+"""
+В данном модуле написан поиск команд авто-ответчика по тексту сообщения.
+"""
+
+
+import re
+import configparser
+
+
+class CommandRouter:
+    """
+    Ищет команду авто-ответчика, соответствующую тексту сообщения.
+    Таблицы команд строятся 1 раз (при загрузке конфига). Текст сообщения и названия команд нормализуются одинаково
+    (strip() + lower()).
+
+    Режим поиска задается параметром matchMode секции команды:
+    exact (по умолчанию) - сообщение полностью совпадает с командой;
+    prefix - сообщение начинается с команды;
+    regex - название команды - регулярное выражение, которому должно полностью соответствовать сообщение.
+
+    Порядок поиска: точное совпадение, затем самый длинный префикс, затем регулярные выражения в порядке их
+    следования в конфиге.
+    """
+    def __init__(self, config: configparser.ConfigParser):
+        """
+        :param config: конфиг авто-ответчика.
+        """
+        # {нормализованная команда: название секции}
+        self.exact: dict[str, str] = {}
+        # {нормализованный префикс: название секции}
+        self.prefixes: dict[str, str] = {}
+        # Длины префиксов (от длинных к коротким).
+        self.prefix_lengths: list[int] = []
+        # [(регулярное выражение, название секции)]
+        self.regexes: list[tuple[re.Pattern, str]] = []
+
+        for section in config.sections():
+            mode = config[section].get("matchMode", "exact").strip()
+            if mode == "regex":
+                self.regexes.append((re.compile(section.strip(), re.IGNORECASE | re.DOTALL), section))
+            elif mode == "prefix":
+                self.prefixes.setdefault(self.normalize(section), section)
+            else:
+                self.exact.setdefault(self.normalize(section), section)
+        self.prefix_lengths = sorted({len(i) for i in self.prefixes}, reverse=True)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Нормализует текст сообщения / название команды.
+
+        :param text: текст.
+        :return: нормализованный текст.
+        """
+        return text.strip().lower()
+
+    def resolve(self, text: str) -> str | None:
+        """
+        Ищет команду, соответствующую тексту сообщения.
+
+        :param text: текст сообщения.
+        :return: название секции команды в конфиге авто-ответчика или None, если сообщение не является командой.
+        """
+        normalized = self.normalize(text)
+        command = self.exact.get(normalized)
+        if command is not None:
+            return command
+
+        for length in self.prefix_lengths:
+            command = self.prefixes.get(normalized[:length])
+            if command is not None:
+                return command
+
+        stripped = text.strip()
+        for regex, command in self.regexes:
+            if regex.fullmatch(stripped):
+                return command
+        return None
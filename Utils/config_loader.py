@@ -5,6 +5,7 @@
 import configparser
 import codecs
 import os
+import re
 import json
 import itertools
 
@@ -87,6 +88,13 @@ def load_main_config(config_path: str) -> configparser.ConfigParser:
         }
     }
 
+    # Необязательные числовые параметры.
+    optional_numbers = {
+        "FunPay": ["runnerMinDelay", "runnerMaxDelay", "requestsPerSecond", "requestsBurst"],
+        "Other": ["handlersWorkers", "startupWorkers", "metricsPort",
+                  "handlerProfiling", "slowHandlerThreshold", "offloadSlowHandlers"]
+    }
+
     for section in values:
         if section not in config.sections():
             raise SectionNotExists(section, "_main.cfg")
@@ -96,9 +104,42 @@ def load_main_config(config_path: str) -> configparser.ConfigParser:
                 check_param(param, section, "_main.cfg", config[section])
             else:
                 check_param(param, section, "_main.cfg", config[section], valid_values=values[section][param])
+
+    for section in optional_numbers:
+        for param in optional_numbers[section]:
+            check_number_param(param, section, "_main.cfg", config[section])
     return config
 
 
+def check_number_param(param_name: str,
+                       section_name: str,
+                       config_name: str,
+                       obj: dict | configparser.SectionProxy) -> float | None:
+    """
+    Проверяет необязательный числовой параметр: если он указан, его значение должно быть неотрицательным числом.
+
+    :param param_name: название ключа.
+    :param section_name: название секции (для исключений).
+    :param config_name: название конфига (для исключений).
+    :param obj: словарь.
+
+    :raise ParamValueEmpty: если значения ключа пустое.
+    :raise ParamValueNotValid: если значение ключа не является неотрицательным числом.
+
+    :return: значение ключа или None, если ключ не найден.
+    """
+    value = check_param(param_name, section_name, config_name, obj, raise_ex_if_not_exists=False)
+    if value is None:
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        raise ParamValueNotValid(section_name, param_name, ["неотрицательное число"], config_name)
+    if number < 0:
+        raise ParamValueNotValid(section_name, param_name, ["неотрицательное число"], config_name)
+    return number
+
+
 def load_lots_config(config_path: str) -> configparser.ConfigParser:
     """
     Парсит и проверяет на правильность конфиг лотов.
@@ -130,6 +171,17 @@ def load_auto_response_config(config_path: str) -> configparser.ConfigParser:
         check_param("telegramNotification", command, "auto_response.cfg", config[command],
                     valid_values=["0", "1"], raise_ex_if_not_exists=False)
         check_param("notificationText", command, "auto_response.cfg", config[command], raise_ex_if_not_exists=False)
+        match_mode = check_param("matchMode", command, "auto_response.cfg", config[command],
+                                 valid_values=["exact", "prefix", "regex"], raise_ex_if_not_exists=False)
+
+        # Название regex-команды - регулярное выражение ("|" в нем не разделяет команды).
+        if match_mode == "regex":
+            try:
+                re.compile(command.strip())
+            except re.error:
+                valid_values = ["exact", "prefix", "regex (название команды - корректное регулярное выражение)"]
+                raise ParamValueNotValid(command, "matchMode", valid_values, "auto_response.cfg")
+            continue
 
         # Если в названии команды есть "|" - значит это несколько команд.
         if "|" in command:
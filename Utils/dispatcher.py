@@ -0,0 +1,156 @@
+"""
+В данном модуле написан диспетчер эвентов - пул потоков, в котором выполняются хэндлеры.
+"""
+
+
+import time
+import logging
+import traceback
+from collections import deque
+from threading import Thread, Condition, Lock
+from typing import Callable, Hashable
+
+
+logger = logging.getLogger("Cardinal.dispatcher")
+
+
+class EventDispatcher:
+    """
+    Диспетчер эвентов. Выполняет задачи в общем пуле потоков.
+    У каждого ключа (например, node_id чата) своя очередь задач: задачи одного ключа выполняются строго в порядке
+    добавления и не более чем в одном потоке одновременно, задачи разных ключей - параллельно. Свободный поток берет
+    задачу любого ключа, который сейчас не выполняется, поэтому медленная задача одного ключа не задерживает
+    задачи других ключей. Ключи обслуживаются по кругу: после каждой задачи ключ встает в конец очереди готовых.
+    Общее кол-во задач в очередях ограничено: если очереди переполнены, submit() ждет, пока не освободится место.
+    """
+    def __init__(self, workers: int = 4, queue_size: int = 400):
+        """
+        :param workers: кол-во потоков-обработчиков.
+        :param queue_size: максимальное кол-во задач во всех очередях.
+        """
+        self.workers = max(1, workers)
+        self.max_size = queue_size
+        self.condition = Condition()
+        # {ключ: очередь задач [(время добавления, функция, аргументы)]}
+        self.queues: dict[Hashable, deque[tuple[float, Callable, tuple]]] = {}
+        # Ключи, у которых есть задачи и которые сейчас не выполняются (в порядке обслуживания).
+        self.ready: deque[Hashable] = deque()
+        # Ключи, задачи которых сейчас выполняются.
+        self.active: set[Hashable] = set()
+        # Кол-во задач во всех очередях.
+        self.pending = 0
+        self.threads: list[Thread] = []
+        self.running = False
+
+        # Метрики.
+        self.stats_lock = Lock()
+        # Кол-во добавленных задач.
+        self.submitted = 0
+        # Кол-во выполненных задач.
+        self.processed = 0
+        # Кол-во добавлений, которым пришлось ждать места в очереди.
+        self.blocked = 0
+        # Суммарное и максимальное время ожидания задач в очереди (в секундах).
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def start(self) -> None:
+        """
+        Запускает потоки-обработчики.
+        """
+        if self.running:
+            return
+        self.running = True
+        for index in range(self.workers):
+            thread = Thread(target=self.__worker, name=f"CardinalWorker-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self) -> None:
+        """
+        Останавливает потоки-обработчики (после выполнения уже добавленных задач).
+        """
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+
+    def submit(self, key: Hashable, func: Callable, *args, force: bool = False) -> None:
+        """
+        Добавляет задачу в очередь ключа key.
+
+        :param key: ключ упорядочивания. Задачи с одинаковым ключом выполняются по очереди.
+        :param func: функция.
+        :param args: аргументы функции.
+        :param force: добавить задачу, даже если очереди переполнены (для задач, добавляемых из самих
+        потоков-обработчиков: ожидание места в очереди может привести к взаимной блокировке).
+        """
+        with self.condition:
+            if not force and self.pending >= self.max_size:
+                with self.stats_lock:
+                    self.blocked += 1
+                logger.warning("Очередь хэндлеров переполнена, жду освобождения места...")
+                while self.pending >= self.max_size:
+                    self.condition.wait()
+            tasks = self.queues.setdefault(key, deque())
+            if not tasks and key not in self.active:
+                self.ready.append(key)
+            tasks.append((time.time(), func, args))
+            self.pending += 1
+            self.condition.notify_all()
+        with self.stats_lock:
+            self.submitted += 1
+
+    def __worker(self) -> None:
+        """
+        Цикл потока-обработчика.
+        """
+        while True:
+            with self.condition:
+                while not self.ready and self.running:
+                    self.condition.wait()
+                if not self.ready:
+                    return
+                key = self.ready.popleft()
+                added, func, args = self.queues[key].popleft()
+                self.active.add(key)
+                self.pending -= 1
+                self.condition.notify_all()
+
+            wait = time.time() - added
+            with self.stats_lock:
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            try:
+                func(*args)
+            except:
+                logger.error("Произошла ошибка при выполнении задачи в пуле хэндлеров.")
+                logger.debug(traceback.format_exc())
+            with self.stats_lock:
+                self.processed += 1
+
+            with self.condition:
+                self.active.discard(key)
+                if self.queues[key]:
+                    self.ready.append(key)
+                    self.condition.notify()
+                else:
+                    del self.queues[key]
+
+    def stats(self) -> dict:
+        """
+        :return: метрики диспетчера (для мониторинга).
+        """
+        with self.condition:
+            queued, keys, active = self.pending, len(self.queues), len(self.active)
+        with self.stats_lock:
+            return {
+                "workers": self.workers,
+                "queued": queued,
+                "keys": keys,
+                "active": active,
+                "submitted": self.submitted,
+                "processed": self.processed,
+                "blocked": self.blocked,
+                "avg_wait": self.total_wait / self.processed if self.processed else 0.0,
+                "max_wait": self.max_wait
+            }
@@ -128,6 +128,21 @@ class NoSuchProductFileError(Exception):
         return f"Файл с товарами {self.file_path} для авто-выдачи лота [{self.lot_name}] не найден."
 
 
+class ChatNotFoundError(Exception):
+    """
+    Исключение, которое райзится, когда не удалось найти чат с пользователем (например, для выдачи товара).
+    """
+    def __init__(self, username: str):
+        """
+        :param username: никнейм пользователя.
+        """
+        self.username = username
+        super(ChatNotFoundError, self).__init__()
+
+    def __str__(self):
+        return f"Не удалось найти чат с пользователем {self.username}."
+
+
 class JSONParseError(Exception):
     """
     Исключение, которое райзится, когда райзится json.decoder.JSONDecodeError при обработке файла с товарами для
@@ -0,0 +1,257 @@
+"""
+В данном модуле написан профилировщик хэндлеров: замер времени выполнения, сторож медленных хэндлеров и вынос
+медленных хэндлеров в отдельный пул потоков.
+"""
+
+
+import sys
+import time
+import logging
+import traceback
+from contextlib import contextmanager
+from threading import Thread, Lock, Event, get_ident
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable
+
+from Utils.metrics import MetricsRegistry
+
+
+logger = logging.getLogger("Cardinal.profiler")
+
+
+def handler_name(func: Callable) -> str:
+    """
+    :param func: хэндлер.
+    :return: название хэндлера (модуль.функция).
+    """
+    return f"{getattr(func, '__module__', None)}.{getattr(func, '__qualname__', func)}"
+
+
+class _HandlerStats:
+    """
+    Статистика 1 хэндлера.
+    """
+    def __init__(self, module: str):
+        self.module = module
+        self.calls = 0
+        self.errors = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.max_wall = 0.0
+        # Кол-во вызовов дольше порога медленного хэндлера.
+        self.slow = 0
+        self.offloaded = False
+
+
+class _Call:
+    """
+    Выполняющийся вызов хэндлера (для сторожа).
+    """
+    def __init__(self, name: str, thread_id: int):
+        self.name = name
+        self.thread_id = thread_id
+        self.start = time.perf_counter()
+        self.reported = False
+
+
+class HandlerProfiler:
+    """
+    Профилировщик хэндлеров.
+
+    Время выполнения каждого хэндлера всегда записывается в метрики (handler_seconds). Если включено профилирование,
+    дополнительно собирается статистика (кол-во вызовов, ошибок, время выполнения и процессорное время) по каждому
+    хэндлеру и по каждому модулю (плагину).
+    Если задан порог медленного хэндлера, фоновый поток-сторож сообщает о хэндлерах, выполняющихся дольше порога,
+    и записывает в лог стек потока, в котором выполняется хэндлер (где именно он "завис").
+    Если включен вынос медленных хэндлеров, хэндлеры плагинов, превысившие порог offload_after раз, в дальнейшем
+    выполняются в отдельном пуле потоков и не задерживают обработку эвентов (но и не ждут завершения
+    предыдущих хэндлеров).
+    """
+    def __init__(self, metrics: MetricsRegistry | None = None, profiling: bool = False, slow_threshold: float = 0,
+                 offload: bool = False, offload_after: int = 3, offload_workers: int = 2):
+        """
+        :param metrics: реестр метрик.
+        :param profiling: собирать ли статистику по хэндлерам и модулям.
+        :param slow_threshold: порог медленного хэндлера (в секундах). 0 - сторож выключен.
+        :param offload: выносить ли медленные хэндлеры плагинов в отдельный пул потоков.
+        :param offload_after: после скольких медленных вызовов хэндлер выносится в отдельный пул потоков.
+        :param offload_workers: кол-во потоков пула для медленных хэндлеров.
+        """
+        self.metrics = metrics
+        self.profiling = profiling
+        self.slow_threshold = slow_threshold
+        self.offload_enabled = offload and slow_threshold > 0
+        self.offload_after = max(offload_after, 1)
+        self.offload_workers = max(offload_workers, 1)
+
+        self.lock = Lock()
+        # {название хэндлера: статистика}
+        self.handlers: dict[str, _HandlerStats] = {}
+        # {id вызова: вызов} - выполняющиеся сейчас хэндлеры.
+        self.active: dict[int, _Call] = {}
+        # Названия хэндлеров, вынесенных в отдельный пул потоков.
+        self.offloaded: set[str] = set()
+        self.pool: ThreadPoolExecutor | None = None
+        self.stop_event = Event()
+        self.watchdog: Thread | None = None
+
+    def start(self) -> None:
+        """
+        Запускает поток-сторож (если задан порог медленного хэндлера).
+        """
+        if self.slow_threshold <= 0 or self.watchdog is not None:
+            return
+        self.stop_event.clear()
+        self.watchdog = Thread(target=self.__watchdog_loop, name="CardinalWatchdog", daemon=True)
+        self.watchdog.start()
+
+    def stop(self) -> None:
+        """
+        Останавливает поток-сторож и пул потоков медленных хэндлеров.
+        """
+        self.stop_event.set()
+        self.watchdog = None
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+            self.pool = None
+
+    def __stats(self, name: str, func: Callable) -> _HandlerStats:
+        """
+        Возвращает статистику хэндлера (создает, если ее нет). Вызывается под self.lock.
+        """
+        stats = self.handlers.get(name)
+        if stats is None:
+            stats = self.handlers[name] = _HandlerStats(str(getattr(func, "__module__", None)))
+        return stats
+
+    @contextmanager
+    def profile(self, func: Callable):
+        """
+        Профилирует выполнение хэндлера func в блоке with. Исключения не перехватываются.
+
+        :param func: хэндлер.
+        """
+        name = handler_name(func)
+        call = None
+        if self.slow_threshold > 0:
+            call = _Call(name, get_ident())
+            with self.lock:
+                self.active[id(call)] = call
+        cpu_start = time.thread_time() if self.profiling else 0.0
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except:
+            error = True
+            raise
+        finally:
+            wall = time.perf_counter() - start
+            cpu = time.thread_time() - cpu_start if self.profiling else 0.0
+            if self.metrics is not None:
+                self.metrics.observe("handler_seconds", wall, handler=name)
+                if error:
+                    self.metrics.inc("handler_errors_total", handler=name)
+            if self.profiling or call is not None:
+                self.__record(func, name, call, wall, cpu, error)
+
+    def __record(self, func: Callable, name: str, call: _Call | None, wall: float, cpu: float, error: bool) -> None:
+        """
+        Записывает результат вызова хэндлера в статистику.
+        """
+        slow = self.slow_threshold > 0 and wall >= self.slow_threshold
+        with self.lock:
+            if call is not None:
+                self.active.pop(id(call), None)
+            if not self.profiling and not slow:
+                return
+            stats = self.__stats(name, func)
+            if self.profiling:
+                stats.calls += 1
+                stats.errors += error
+                stats.wall += wall
+                stats.cpu += cpu
+                stats.max_wall = max(stats.max_wall, wall)
+            if not slow:
+                return
+            stats.slow += 1
+            offload = self.offload_enabled and not stats.offloaded and stats.slow >= self.offload_after and \
+                stats.module.startswith("plugins.")
+            if offload:
+                stats.offloaded = True
+                self.offloaded.add(name)
+        logger.warning(f"Хэндлер $YELLOW{name}$color выполнялся {wall:.1f} сек.")
+        if offload:
+            logger.warning(f"Хэндлер $YELLOW{name}$color превысил порог {self.slow_threshold} сек. "
+                           f"{stats.slow} раз(а). Теперь он будет выполняться в отдельном пуле потоков.")
+
+    def is_offloaded(self, func: Callable) -> bool:
+        """
+        :param func: хэндлер.
+        :return: вынесен ли хэндлер в отдельный пул потоков.
+        """
+        return bool(self.offloaded) and handler_name(func) in self.offloaded
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """
+        Выполняет функцию в пуле потоков медленных хэндлеров.
+
+        :param fn: функция.
+        :param args: аргументы функции.
+        :return: Future с результатом функции.
+        """
+        with self.lock:
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(max_workers=self.offload_workers, thread_name_prefix="CardinalOffload")
+            pool = self.pool
+        return pool.submit(fn, *args)
+
+    def __watchdog_loop(self) -> None:
+        """
+        Цикл потока-сторожа: ищет хэндлеры, выполняющиеся дольше порога, и записывает в лог их стек.
+        """
+        interval = min(max(self.slow_threshold / 2, 0.1), 1.0)
+        while not self.stop_event.wait(interval):
+            now = time.perf_counter()
+            with self.lock:
+                hung = [i for i in self.active.values() if not i.reported and now - i.start >= self.slow_threshold]
+                for call in hung:
+                    call.reported = True
+            if not hung:
+                continue
+            frames = sys._current_frames()
+            for call in hung:
+                frame = frames.get(call.thread_id)
+                stack = "".join(traceback.format_stack(frame)) if frame is not None else "стек недоступен\n"
+                location = traceback.extract_stack(frame, limit=1)[-1] if frame is not None else None
+                where = f" ({location.filename}:{location.lineno}, {location.name})" if location else ""
+                logger.warning(f"Хэндлер $YELLOW{call.name}$color выполняется уже {now - call.start:.1f} сек.{where}")
+                logger.debug(f"Стек потока хэндлера {call.name}:\n{stack.rstrip()}")
+
+    def handler_stats(self) -> dict[str, dict]:
+        """
+        :return: статистика по каждому хэндлеру.
+        """
+        with self.lock:
+            return {name: {"module": i.module, "calls": i.calls, "errors": i.errors, "wall": i.wall, "cpu": i.cpu,
+                           "max_wall": i.max_wall, "slow": i.slow, "offloaded": i.offloaded}
+                    for name, i in self.handlers.items()}
+
+    def stats(self) -> dict[str, dict]:
+        """
+        :return: статистика по каждому модулю (плагину): суммарные значения по хэндлерам модуля.
+        """
+        modules = {}
+        with self.lock:
+            for i in self.handlers.values():
+                module = modules.setdefault(i.module, {"handlers": 0, "calls": 0, "errors": 0, "wall": 0.0,
+                                                       "cpu": 0.0, "max_wall": 0.0, "slow": 0, "offloaded": 0})
+                module["handlers"] += 1
+                module["calls"] += i.calls
+                module["errors"] += i.errors
+                module["wall"] += i.wall
+                module["cpu"] += i.cpu
+                module["max_wall"] = max(module["max_wall"], i.max_wall)
+                module["slow"] += i.slow
+                module["offloaded"] += i.offloaded
+        return modules
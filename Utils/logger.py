@@ -4,26 +4,51 @@
 
 
 import re
+import copy
+import json
+import queue
+import atexit
 import logging
 import logging.handlers
 from colorama import Fore, Back, Style
 
 
+COLORS = {
+    "$YELLOW": Fore.YELLOW,
+    "$CYAN": Fore.CYAN,
+    "$MAGENTA": Fore.MAGENTA,
+    "$BLUE": Fore.BLUE,
+}
+
+# Поля эвентов, которые можно передать в лог через extra (например, logger.info(..., extra={"node_id": 123})).
+# Выводятся только в JSON-логах.
+EVENT_FIELDS = ("node_id", "order_id", "latency")
+
+
 def add_colors(text: str) -> str:
-    colors = {
-        "$YELLOW": Fore.YELLOW,
-        "$CYAN": Fore.CYAN,
-        "$MAGENTA": Fore.MAGENTA,
-        "$BLUE": Fore.BLUE,
-    }
-    for c in colors:
-        text = text.replace(c, colors[c])
+    for c in COLORS:
+        text = text.replace(c, COLORS[c])
+    return text
+
+
+def append_exception(formatter: logging.Formatter, record: logging.LogRecord, text: str) -> str:
+    """
+    Добавляет к тексту лога traceback исключения и стек (как logging.Formatter.format).
+    """
+    if record.exc_info and not record.exc_text:
+        record.exc_text = formatter.formatException(record.exc_info)
+    if record.exc_text:
+        text = f"{text}\n{record.exc_text}"
+    if record.stack_info:
+        text = f"{text}\n{formatter.formatStack(record.stack_info)}"
     return text
 
 
 class CLILoggerFormatter(logging.Formatter):
     """
     Форматтер для вывода логов в консоль.
+    Строка формата для каждого уровня собирается 1 раз; запись лога не изменяется (другие хэндлеры получают
+    исходный текст без цветов).
     """
     log_format = f"{Fore.BLACK + Style.BRIGHT}[%(asctime)s]{Style.RESET_ALL}" \
                  f"{Fore.CYAN}>{Style.RESET_ALL} $color%(levelname)s:$spaces %(message)s{Style.RESET_ALL}"
@@ -40,17 +65,24 @@ class CLILoggerFormatter(logging.Formatter):
     max_level_name_length = 10
 
     def __init__(self):
-        super(CLILoggerFormatter, self).__init__()
+        super(CLILoggerFormatter, self).__init__(datefmt=self.time_format)
+        # {(уровень, название уровня): строка формата}
+        self.formats: dict[tuple[int, str], str] = {}
+
+    def get_format(self, record: logging.LogRecord) -> str:
+        key = (record.levelno, record.levelname)
+        log_format = self.formats.get(key)
+        if log_format is None:
+            log_format = self.log_format.replace("$color", self.colors.get(record.levelno, ""))\
+                .replace("$spaces", " " * (self.max_level_name_length - len(record.levelname)))
+            self.formats[key] = log_format
+        return log_format
 
     def format(self, record: logging.LogRecord) -> str:
-        msg = record.getMessage()
-        msg = add_colors(msg)
-        msg = msg.replace("$color", self.colors[record.levelno])
-        record.msg = msg
-        log_format = self.log_format.replace("$color", self.colors[record.levelno])\
-            .replace("$spaces", " " * (self.max_level_name_length - len(record.levelname)))
-        formatter = logging.Formatter(log_format, self.time_format)
-        return formatter.format(record)
+        msg = add_colors(record.getMessage()).replace("$color", self.colors.get(record.levelno, ""))
+        text = self.get_format(record) % {"asctime": self.formatTime(record, self.time_format),
+                                          "levelname": record.levelname, "message": msg}
+        return append_exception(self, record, text)
 
 
 class FileLoggerFormatter(logging.Formatter):
@@ -59,24 +91,86 @@ class FileLoggerFormatter(logging.Formatter):
     """
     log_format = "[%(asctime)s][%(filename)s][%(funcName)s][%(lineno)d]> %(levelname)s: %(message)s"
     max_level_name_length = 12
-    clear_expression = re.compile(r"(\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~]))|(\n)|(\r)")
+    clear_expression = re.compile(r"(\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~]))|(\r)|"
+                                  r"(\$(?:YELLOW|CYAN|MAGENTA|BLUE|color))")
 
     def __init__(self):
         super(FileLoggerFormatter, self).__init__()
 
+    def clear(self, msg: str) -> str:
+        """
+        Удаляет из текста цвета (ANSI и $-метки), многострочный текст записывается в 1 строку.
+        """
+        return self.clear_expression.sub("", msg).replace("\n", " ")
+
     def format(self, record: logging.LogRecord) -> str:
-        msg = record.getMessage()
-        msg = self.clear_expression.sub("", msg)
-        record.msg = msg
-        formatter = logging.Formatter(self.log_format)
-        return formatter.format(record)
+        text = self.log_format % {"asctime": self.formatTime(record), "filename": record.filename,
+                                  "funcName": record.funcName, "lineno": record.lineno,
+                                  "levelname": record.levelname, "message": self.clear(record.getMessage())}
+        return append_exception(self, record, text)
+
+
+class JSONLoggerFormatter(FileLoggerFormatter):
+    """
+    Форматтер для сохранения логов в файл в формате JSON lines (1 JSON объект на строку).
+    Помимо стандартных полей записывает поля эвентов (EVENT_FIELDS), если они переданы через extra.
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "file": record.filename,
+            "func": record.funcName,
+            "line": record.lineno,
+            "message": self.clear_expression.sub("", record.getMessage())
+        }
+        for field in EVENT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        if record.exc_info or record.exc_text:
+            data["exception"] = append_exception(self, record, "").strip()
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class AsyncFileHandler(logging.handlers.QueueHandler):
+    """
+    Хэндлер, записывающий логи в файл в фоновом потоке (QueueHandler + QueueListener): поток, вызвавший логгер,
+    только кладет запись в очередь, форматирование и запись в файл выполняются потоком-слушателем.
+    Параметры - как у logging.handlers.TimedRotatingFileHandler.
+    """
+    def __init__(self, filename: str, when: str = "h", encoding: str | None = None, **kwargs):
+        super(AsyncFileHandler, self).__init__(queue.SimpleQueue())
+        self.file_handler = logging.handlers.TimedRotatingFileHandler(filename, when=when, encoding=encoding, **kwargs)
+        self.listener = logging.handlers.QueueListener(self.queue, self.file_handler, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.close)
+
+    def setFormatter(self, fmt: logging.Formatter | None) -> None:
+        # Форматирует записи хэндлер файла (в потоке-слушателе).
+        self.file_handler.setFormatter(fmt)
+
+    def close(self) -> None:
+        # Дописывает оставшиеся в очереди записи и закрывает файл (может быть вызван повторно).
+        if self.listener._thread is not None:
+            self.listener.stop()
+            self.file_handler.close()
+        super(AsyncFileHandler, self).close()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Текст вычисляется сразу (аргументы могут измениться до записи), запись копируется, а не изменяется.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
 
 
 CONFIG = {
     "version": 1,
     "handlers": {
         "file_handler": {
-            "class": "logging.handlers.TimedRotatingFileHandler",
+            "class": "Utils.logger.AsyncFileHandler",
             "level": "DEBUG",
             "formatter": "file_formatter",
             "filename": "logs/log.log",
@@ -96,6 +190,10 @@ CONFIG = {
             "()": "Utils.logger.FileLoggerFormatter"
         },
 
+        "json_formatter": {
+            "()": "Utils.logger.JSONLoggerFormatter"
+        },
+
         "cli_formatter": {
             "()": "Utils.logger.CLILoggerFormatter"
         }
@@ -125,3 +223,16 @@ CONFIG = {
         }
     }
 }
+
+
+def get_config(json_logs: bool = False) -> dict:
+    """
+    Возвращает конфиг логгера.
+
+    :param json_logs: записывать ли лог файл в формате JSON lines.
+    :return: конфиг для logging.config.dictConfig.
+    """
+    config = copy.deepcopy(CONFIG)
+    if json_logs:
+        config["handlers"]["file_handler"]["formatter"] = "json_formatter"
+    return config
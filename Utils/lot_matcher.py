@@ -0,0 +1,84 @@
+"""
+В данном модуле написан поиск лота из конфига авто-выдачи по названию ордера (алгоритм Ахо-Корасик).
+"""
+
+
+class LotMatcher:
+    """
+    Ищет в названии ордера названия лотов из конфига авто-выдачи.
+    Автомат строится 1 раз (при загрузке конфига), после чего поиск занимает время, пропорциональное длине названия
+    ордера, независимо от кол-ва лотов в конфиге.
+
+    Если в названии ордера найдено несколько лотов, выбирается самый длинный (наиболее точный), а при равной длине -
+    тот, который указан в конфиге раньше.
+    """
+    def __init__(self, lot_names: list[str]):
+        """
+        :param lot_names: названия лотов (в порядке их следования в конфиге).
+        """
+        self.lot_names = list(lot_names)
+        # Переходы автомата: [{символ: индекс узла}]
+        self.goto: list[dict[str, int]] = [{}]
+        # Суффиксные ссылки: [индекс узла]
+        self.fail: list[int] = [0]
+        # Лучший лот, заканчивающийся в узле (с учетом суффиксных ссылок): [индекс лота или -1]
+        self.output: list[int] = [-1]
+
+        for index, name in enumerate(self.lot_names):
+            if not name:
+                continue
+            node = 0
+            for char in name:
+                next_node = self.goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][char] = next_node
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(-1)
+                node = next_node
+            if self.output[node] == -1:
+                self.output[node] = index
+
+        # Строим суффиксные ссылки обходом в ширину.
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fail = self.fail[node]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                fail = self.goto[fail].get(char, 0)
+                self.fail[child] = fail if fail != child else 0
+                self.output[child] = self.__best(self.output[child], self.output[self.fail[child]])
+
+    def __best(self, first: int, second: int) -> int:
+        """
+        :return: индекс более приоритетного лота (длиннее, при равной длине - раньше в конфиге).
+        """
+        if first == -1:
+            return second
+        if second == -1:
+            return first
+        first_len, second_len = len(self.lot_names[first]), len(self.lot_names[second])
+        if first_len != second_len:
+            return first if first_len > second_len else second
+        return min(first, second)
+
+    def match(self, title: str) -> str | None:
+        """
+        Ищет лот в названии ордера.
+
+        :param title: название (краткое описание) ордера.
+        :return: название найденного лота или None.
+        """
+        goto, fail, output = self.goto, self.fail, self.output
+        node = 0
+        best = -1
+        for char in title:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node] != -1:
+                best = self.__best(best, output[node])
+        return self.lot_names[best] if best != -1 else None
@@ -0,0 +1,131 @@
+"""
+В данном модуле написано восстановление (активация) деактивированных лотов.
+"""
+
+
+import hashlib
+import logging
+import traceback
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+
+import FunPayAPI.account
+import FunPayAPI.lots
+
+
+logger = logging.getLogger("Cardinal.lot_restorer")
+
+
+class LotRestorer:
+    """
+    Восстанавливает деактивированные лоты.
+
+    Поля формы редактирования лота (offerEdit) кэшируются, поэтому повторное восстановление лота требует 1 запрос
+    (offerSave) вместо 2. Кэш лота сбрасывается, если изменились публичные данные лота (название, цена, сервер) или
+    FunPay отклонил сохранение закэшированной формы (в этом случае форма запрашивается заново).
+    """
+    def __init__(self, workers: int = 4):
+        """
+        :param workers: максимальное кол-во лотов, восстанавливаемых одновременно.
+        """
+        self.workers = max(workers, 1)
+        self.lock = Lock()
+        # {ID лота: (хэш публичных данных лота, поля формы редактирования лота)}
+        self.forms: dict[int, tuple[str, list[dict[str, str]]]] = {}
+        # {ID лота: хэш публичных данных лота}. Обновляется по странице пользователя, пока лот активен.
+        self.hashes: dict[int, str] = {}
+
+    @staticmethod
+    def lot_hash(lot: FunPayAPI.lots.Lot) -> str:
+        """
+        :param lot: экземпляр лота.
+        :return: хэш публичных данных лота.
+        """
+        return hashlib.md5(f"{lot.title}\n{lot.price}\n{lot.server}".encode("utf-8")).hexdigest()
+
+    def update(self, active_lots: list[FunPayAPI.lots.Lot]) -> None:
+        """
+        Запоминает публичные данные активных лотов. Закэшированные формы измененных лотов удаляются.
+
+        :param active_lots: активные лоты (со страницы пользователя).
+        """
+        with self.lock:
+            for lot in active_lots:
+                lot_hash = self.lot_hash(lot)
+                self.hashes[lot.id] = lot_hash
+                form = self.forms.get(lot.id)
+                if form is not None and form[0] != lot_hash:
+                    del self.forms[lot.id]
+
+    def restore(self, account: FunPayAPI.account.Account, lots: list[FunPayAPI.lots.Lot],
+                active_lots: list[FunPayAPI.lots.Lot]) -> list[int]:
+        """
+        Восстанавливает лоты из списка lots, которых нет среди активных лотов.
+
+        :param account: экземпляр аккаунта.
+        :param lots: лоты, которые должны быть активны.
+        :param active_lots: активные лоты (со страницы пользователя).
+        :return: ID восстановленных лотов.
+        """
+        self.update(active_lots)
+        active_ids = {i.id for i in active_lots}
+        missing = [i for i in lots if i.id not in active_ids]
+        if not missing:
+            return []
+        if len(missing) == 1:
+            results = [self.restore_lot(account, missing[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(missing))) as executor:
+                results = list(executor.map(lambda lot: self.restore_lot(account, lot), missing))
+        return [lot.id for lot, restored in zip(missing, results) if restored]
+
+    def restore_lot(self, account: FunPayAPI.account.Account, lot: FunPayAPI.lots.Lot) -> bool:
+        """
+        Восстанавливает лот.
+
+        :param account: экземпляр аккаунта.
+        :param lot: экземпляр лота.
+        :return: True, если лот восстановлен, иначе False.
+        """
+        try:
+            with self.lock:
+                lot_hash = self.hashes.get(lot.id) or self.lot_hash(lot)
+                form = self.forms.get(lot.id)
+            cached = form is not None and form[0] == lot_hash
+            fields = form[1] if cached else self.__fetch_form(account, lot, lot_hash)
+
+            response = account.save_lot_state(fields)
+            if response.get("error") and cached:
+                # Форма могла измениться на стороне FunPay: запрашиваем ее заново.
+                logger.debug(f"FunPay отклонил закэшированную форму лота {lot.id}: {response}")
+                fields = self.__fetch_form(account, lot, lot_hash)
+                response = account.save_lot_state(fields)
+            if response.get("error"):
+                with self.lock:
+                    self.forms.pop(lot.id, None)
+                logger.error(f"Не удалось активировать лот {lot.id}.")
+                logger.debug(response)
+                return False
+            logger.info(f"Активировал лот {lot.id}.")
+            return True
+        except:
+            with self.lock:
+                self.forms.pop(lot.id, None)
+            logger.error(f"Не удалось активировать лот {lot.id}.")
+            logger.debug(traceback.format_exc())
+            return False
+
+    def __fetch_form(self, account: FunPayAPI.account.Account, lot: FunPayAPI.lots.Lot,
+                     lot_hash: str) -> list[dict[str, str]]:
+        """
+        Запрашивает форму редактирования лота и кэширует ее поля.
+
+        :param account: экземпляр аккаунта.
+        :param lot: экземпляр лота.
+        :param lot_hash: хэш публичных данных лота.
+        :return: поля формы редактирования лота.
+        """
+        fields = account.get_lot_info(lot.id, lot.game_id)
+        with self.lock:
+            self.forms[lot.id] = (lot_hash, fields)
+        return fields
@@ -0,0 +1,290 @@
+"""
+В данном модуле написан реестр метрик Кардинала и HTTP-сервер, отдающий их в формате Prometheus.
+"""
+
+
+import time
+import bisect
+import logging
+import traceback
+from contextlib import contextmanager
+from threading import Lock, Thread
+from typing import Callable, TYPE_CHECKING
+
+# http.server импортируется только при запуске сервера метрик (см. MetricsServer.start).
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+
+logger = logging.getLogger("Cardinal.metrics")
+
+
+# Границы корзин гистограмм времени выполнения (в секундах).
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Префикс названий всех метрик.
+PREFIX = "cardinal_"
+
+
+def format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    """
+    :param labels: метки ((название, значение), ...).
+    :return: метки в формате Prometheus ({name="value",...}).
+    """
+    if not labels:
+        return ""
+    values = []
+    for k, v in labels:
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        values.append(f'{k}="{v}"')
+    return "{" + ",".join(values) + "}"
+
+
+class _Histogram:
+    """
+    Гистограмма 1 набора меток. Не потокобезопасна: используется под блокировкой MetricsRegistry.
+    """
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик: счетчики, гистограммы времени выполнения и коллекторы - функции, возвращающие текущее
+    состояние компонента (например, stats() диспетчера или очереди сообщений), значения которых выводятся как gauge.
+
+    Метрики создаются при первом обращении, отдельно регистрировать их не нужно. Все методы потокобезопасны.
+    """
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        :param buckets: границы корзин гистограмм (в секундах).
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.lock = Lock()
+        # {название: {метки: значение}}
+        self.counters: dict[str, dict[tuple, float]] = {}
+        # {название: {метки: гистограмма}}
+        self.histograms: dict[str, dict[tuple, _Histogram]] = {}
+        # {название: описание}
+        self.help: dict[str, str] = {}
+        # {название компонента: функция, возвращающая словарь с его состоянием}
+        self.collectors: dict[str, Callable[[], dict]] = {}
+        self.started = time.time()
+
+    def describe(self, name: str, text: str) -> None:
+        """
+        Задает описание метрики (выводится в HELP).
+
+        :param name: название метрики (без префикса).
+        :param text: описание.
+        """
+        self.help[name] = text
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """
+        Увеличивает счетчик.
+
+        :param name: название счетчика (без префикса).
+        :param value: на сколько увеличить.
+        :param labels: метки.
+        """
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            counter = self.counters.setdefault(name, {})
+            counter[key] = counter.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """
+        Добавляет значение в гистограмму.
+
+        :param name: название гистограммы (без префикса).
+        :param value: значение (в секундах).
+        :param labels: метки.
+        """
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            histograms = self.histograms.setdefault(name, {})
+            histogram = histograms.get(key)
+            if histogram is None:
+                histogram = histograms[key] = _Histogram(self.buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """
+        Замеряет время выполнения блока with и добавляет его в гистограмму (в т.ч. если было выброшено исключение).
+
+        :param name: название гистограммы (без префикса).
+        :param labels: метки.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def add_collector(self, name: str, func: Callable[[], dict]) -> None:
+        """
+        Регистрирует коллектор.
+
+        :param name: название компонента (префикс метрик компонента).
+        :param func: функция, возвращающая словарь с состоянием компонента (числа, списки чисел, вложенные словари).
+        """
+        self.collectors[name] = func
+
+    def histogram_stats(self, name: str) -> dict[tuple, tuple[int, float, float]]:
+        """
+        :param name: название гистограммы (без префикса).
+        :return: {метки: (кол-во значений, среднее, максимальное)}.
+        """
+        with self.lock:
+            return {k: (v.count, v.sum / v.count if v.count else 0.0, v.max)
+                    for k, v in self.histograms.get(name, {}).items()}
+
+    def counter_values(self, name: str) -> dict[tuple, float]:
+        """
+        :param name: название счетчика (без префикса).
+        :return: {метки: значение}.
+        """
+        with self.lock:
+            return dict(self.counters.get(name, {}))
+
+    def collect(self) -> dict[str, dict]:
+        """
+        Опрашивает коллекторы.
+
+        :return: {название компонента: состояние}. Компоненты, коллектор которых выбросил исключение, пропускаются.
+        """
+        result = {}
+        for name, func in list(self.collectors.items()):
+            try:
+                result[name] = func()
+            except:
+                logger.debug(f"Не удалось получить метрики компонента {name}.")
+                logger.debug(traceback.format_exc())
+        return result
+
+    @staticmethod
+    def flatten(name: str, value, labels: tuple = ()) -> list[tuple[str, tuple, float]]:
+        """
+        Преобразует состояние компонента в список значений gauge.
+        Ключи вложенных словарей добавляются к названию, если это идентификаторы (иначе - становятся меткой "key"),
+        элементы списков получают метку "index".
+
+        :return: [(название, метки, значение)].
+        """
+        if isinstance(value, bool):
+            return [(name, labels, int(value))]
+        if isinstance(value, (int, float)):
+            return [(name, labels, value)]
+        result = []
+        if isinstance(value, dict):
+            for k, v in value.items():
+                if isinstance(k, str) and k.isidentifier():
+                    result.extend(MetricsRegistry.flatten(f"{name}_{k}", v, labels))
+                else:
+                    result.extend(MetricsRegistry.flatten(name, v, labels + (("key", k),)))
+        elif isinstance(value, (list, tuple)):
+            for index, v in enumerate(value):
+                result.extend(MetricsRegistry.flatten(name, v, labels + (("index", index),)))
+        return result
+
+    def render(self) -> str:
+        """
+        :return: все метрики в текстовом формате Prometheus.
+        """
+        lines = [f"# TYPE {PREFIX}uptime_seconds gauge", f"{PREFIX}uptime_seconds {time.time() - self.started:.3f}"]
+        with self.lock:
+            for name, values in self.counters.items():
+                if name in self.help:
+                    lines.append(f"# HELP {PREFIX}{name} {self.help[name]}")
+                lines.append(f"# TYPE {PREFIX}{name} counter")
+                for labels, value in values.items():
+                    lines.append(f"{PREFIX}{name}{format_labels(labels)} {value}")
+
+            for name, values in self.histograms.items():
+                if name in self.help:
+                    lines.append(f"# HELP {PREFIX}{name} {self.help[name]}")
+                lines.append(f"# TYPE {PREFIX}{name} histogram")
+                for labels, histogram in values.items():
+                    total = 0
+                    for bound, count in zip(self.buckets + (float("inf"),), histogram.counts):
+                        total += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{PREFIX}{name}_bucket{format_labels(labels + (('le', le),))} {total}")
+                    lines.append(f"{PREFIX}{name}_sum{format_labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{PREFIX}{name}_count{format_labels(labels)} {histogram.count}")
+
+        for component, state in self.collect().items():
+            # Значения одного семейства (например, элементы списка словарей) могут идти вперемешку с другими:
+            # группируем их по названию, чтобы строка # TYPE и все значения семейства шли подряд.
+            families: dict[str, list[str]] = {}
+            for name, labels, value in self.flatten(f"{PREFIX}{component}", state):
+                families.setdefault(name, []).append(f"{name}{format_labels(labels)} {value}")
+            for name, samples in families.items():
+                lines.append(f"# TYPE {name} gauge")
+                lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    HTTP-сервер, отдающий метрики по адресу /metrics (для Prometheus / curl). Работает в фоновом потоке.
+    """
+    def __init__(self, registry: MetricsRegistry, port: int, host: str = "127.0.0.1"):
+        """
+        :param registry: реестр метрик.
+        :param port: порт.
+        :param host: адрес (по умолчанию - только локальные подключения).
+        """
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.server: "ThreadingHTTPServer | None" = None
+
+    def start(self) -> None:
+        """
+        Запускает сервер.
+        """
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        Thread(target=self.server.serve_forever, name="CardinalMetrics", daemon=True).start()
+        logger.info(f"$CYANМетрики доступны по адресу "
+                    f"$YELLOWhttp://{self.host}:{self.server.server_port}/metrics$CYAN.")
+
+    def stop(self) -> None:
+        """
+        Останавливает сервер.
+        """
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
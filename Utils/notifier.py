@@ -0,0 +1,282 @@
+"""
+В данном модуле написана очередь уведомлений Telegram.
+"""
+
+
+import time
+import logging
+import traceback
+from collections import deque
+from threading import Thread, Condition
+from typing import Callable
+
+from telebot import types
+from telebot.apihelper import ApiTelegramException
+
+from FunPayAPI.limiter import RequestLimiter
+
+
+logger = logging.getLogger("TGBot.notifier")
+
+
+# Ограничения Telegram: максимальная длина сообщения - 4096 символов (с запасом на заголовок дайджеста),
+# максимальное кол-во кнопок - 100.
+MAX_DIGEST_LENGTH = 4000
+MAX_DIGEST_BUTTONS = 100
+# Сколько раз уведомление возвращается в очередь, если Telegram повторно ответил 429.
+MAX_REQUEUES = 3
+
+
+class _Notification:
+    """
+    Уведомление в очереди.
+    """
+    def __init__(self, text: str, reply_markup: types.InlineKeyboardMarkup | None, digest_key: str | None,
+                 chat_ids: list[int] | None = None, not_before: float = 0.0, added: list[float] | None = None,
+                 requeues: int = 0):
+        """
+        :param text: текст уведомления.
+        :param reply_markup: клавиатура.
+        :param digest_key: ключ дайджеста.
+        :param chat_ids: чаты, в которые нужно отправить уведомление (None - все чаты для уведомлений).
+        :param not_before: время, раньше которого уведомление не отправляется.
+        :param added: время добавления каждого из объединенных в уведомление уведомлений (для метрик).
+        :param requeues: сколько раз уведомление возвращалось в очередь.
+        """
+        self.text = text
+        self.reply_markup = reply_markup
+        self.digest_key = digest_key
+        self.chat_ids = chat_ids
+        self.not_before = not_before
+        self.added = time.time()
+        self.added_times = added if added is not None else [self.added]
+        self.requeues = requeues
+
+
+class TelegramNotifier:
+    """
+    Очередь уведомлений Telegram. Уведомления отправляются во все чаты для уведомлений 1 фоновым потоком.
+
+    Очередь ограничена по размеру: при переполнении отбрасывается самое старое уведомление.
+    Частота отправки соответствует ограничениям Telegram: не более 1 сообщения в секунду в личный чат, 1 сообщения в
+    3 секунды в групповой чат (20 в минуту) и 30 сообщений в секунду суммарно. Если Telegram все же ответил 429,
+    отправка повторяется через указанное им время; если и повторная попытка получила 429, уведомление возвращается в
+    очередь (только для чатов, в которые оно не отправлено) и отправляется не раньше, чем через указанное время.
+    После MAX_REQUEUES возвратов уведомление отбрасывается (учитывается в dropped).
+    Уведомления с одинаковым ключом дайджеста (например, о новых сообщениях), добавленные в течение digest_window
+    секунд, объединяются в 1 уведомление.
+    """
+    def __init__(self, send: Callable[[int, str, types.InlineKeyboardMarkup | None], None],
+                 chat_ids: Callable[[], list[int]], queue_size: int = 200, digest_window: float = 3.0):
+        """
+        :param send: функция отправки сообщения: (ID чата, текст MarkdownV2, клавиатура).
+        :param chat_ids: функция, возвращающая список чатов для уведомлений.
+        :param queue_size: максимальное кол-во уведомлений в очереди.
+        :param digest_window: время (в секундах), в течение которого уведомления с одинаковым ключом дайджеста
+        объединяются.
+        """
+        self.send = send
+        self.chat_ids = chat_ids
+        self.queue: deque[_Notification] = deque()
+        self.queue_size = queue_size
+        self.digest_window = digest_window
+        self.cond = Condition()
+        # Не более 30 сообщений в секунду суммарно (тот же token bucket, что и для запросов к FunPay).
+        self.limiter = RequestLimiter(rate=30, burst=1, type_rates={})
+        # {ID чата: время, с которого в чат можно отправить следующее сообщение}
+        self.chat_ready: dict[int, float] = {}
+        self.thread: Thread | None = None
+
+        # Метрики.
+        self.enqueued = 0
+        self.sent = 0
+        self.dropped = 0
+        self.requeued = 0
+        self.digested = 0
+        self.errors = 0
+        self.throttled = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def start(self) -> None:
+        """
+        Запускает поток-отправитель.
+        """
+        if self.thread is not None:
+            return
+        self.thread = Thread(target=self.__worker, name="TGNotifier", daemon=True)
+        self.thread.start()
+
+    def enqueue(self, text: str, reply_markup: types.InlineKeyboardMarkup | None = None,
+                digest_key: str | None = None) -> None:
+        """
+        Добавляет уведомление в очередь.
+
+        :param text: текст уведомления (MarkdownV2, уже экранированный).
+        :param reply_markup: клавиатура.
+        :param digest_key: ключ дайджеста.
+        """
+        with self.cond:
+            self.__push(_Notification(text, reply_markup, digest_key))
+            self.enqueued += 1
+
+    def __push(self, notification: _Notification) -> None:
+        """
+        Добавляет уведомление в конец очереди (при переполнении отбрасывает самое старое). Вызывается под self.cond.
+        """
+        if len(self.queue) >= self.queue_size:
+            dropped = self.queue.popleft()
+            self.dropped += len(dropped.added_times)
+            logger.warning("Очередь уведомлений Telegram переполнена, самое старое уведомление отброшено.")
+        self.queue.append(notification)
+        self.cond.notify()
+
+    def __ready_time(self, notification: _Notification) -> float:
+        if notification.digest_key is None:
+            return max(notification.added, notification.not_before)
+        return notification.added + self.digest_window
+
+    def __take(self) -> _Notification:
+        """
+        Ждет готовое к отправке уведомление и извлекает его из очереди (вместе с уведомлениями того же дайджеста).
+
+        :return: уведомление (для дайджеста - новое уведомление, объединяющее уведомления дайджеста).
+        """
+        with self.cond:
+            while True:
+                now = time.time()
+                ready = [i for i in self.queue if self.__ready_time(i) <= now]
+                if ready:
+                    break
+                self.cond.wait(min(self.__ready_time(i) for i in self.queue) - now if self.queue else None)
+
+            first = ready[0]
+            if first.digest_key is None:
+                self.queue.remove(first)
+                return first
+
+            # Дайджест не должен превышать ограничение длины сообщения Telegram.
+            batch = []
+            length = 0
+            for i in self.queue:
+                if i.digest_key != first.digest_key:
+                    continue
+                if batch and length + len(i.text) + 2 > MAX_DIGEST_LENGTH:
+                    break
+                batch.append(i)
+                length += len(i.text) + 2
+            for i in batch:
+                self.queue.remove(i)
+        if len(batch) == 1:
+            return first
+
+        self.digested += len(batch) - 1
+        text = f"📨 *{len(batch)}* новых уведомлений:\n\n" + "\n\n".join(i.text for i in batch)
+        markup = None
+        buttons = [button for i in batch if i.reply_markup is not None
+                   for row in i.reply_markup.keyboard for button in row]
+        if buttons:
+            markup = types.InlineKeyboardMarkup()
+            for button in buttons[:MAX_DIGEST_BUTTONS]:
+                markup.row(button)
+        return _Notification(text, markup, None, added=[i.added for i in batch])
+
+    def __send(self, chat_id: int, text: str, reply_markup: types.InlineKeyboardMarkup | None) -> float | None:
+        """
+        Отправляет сообщение с учетом ограничений Telegram.
+
+        :return: None, если сообщение отправлено, или время (в секундах), через которое Telegram разрешил повторить
+        отправку, если обе попытки получили 429.
+        """
+        delay = self.chat_ready.get(chat_id, 0) - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        retry_after = None
+        for attempt in range(2):
+            self.limiter.acquire()
+            try:
+                self.send(chat_id, text, reply_markup)
+                retry_after = None
+                break
+            except ApiTelegramException as e:
+                if e.error_code != 429:
+                    raise
+                self.throttled += 1
+                retry_after = (e.result_json or {}).get("parameters", {}).get("retry_after", 1)
+                if not attempt:
+                    logger.warning(f"Telegram ограничил частоту отправки уведомлений. "
+                                   f"Повторю через {retry_after} сек.")
+                    time.sleep(retry_after)
+        # Групповые чаты (ID < 0) - не более 20 сообщений в минуту.
+        self.chat_ready[chat_id] = time.time() + max(retry_after or 0, 3 if chat_id < 0 else 1)
+        return retry_after
+
+    def __requeue(self, notification: _Notification, chat_ids: list[int], delay: float) -> bool:
+        """
+        Возвращает уведомление в очередь для чатов, в которые его не удалось отправить из-за 429.
+
+        :return: True, если уведомление возвращено в очередь, False - если отброшено (превышено MAX_REQUEUES).
+        """
+        with self.cond:
+            if notification.requeues >= MAX_REQUEUES:
+                self.dropped += len(notification.added_times)
+                logger.warning(f"Уведомление не отправлено в чаты {chat_ids}: Telegram {MAX_REQUEUES + 1} раз(а) "
+                               f"ограничил частоту отправки. Уведомление отброшено.")
+                return False
+            self.requeued += 1
+            self.__push(_Notification(notification.text, notification.reply_markup, None, chat_ids=chat_ids,
+                                      not_before=time.time() + delay, added=notification.added_times,
+                                      requeues=notification.requeues + 1))
+        logger.warning(f"Telegram повторно ограничил частоту отправки уведомлений. Уведомление будет отправлено в "
+                       f"чаты {chat_ids} через {delay} сек.")
+        return True
+
+    def __worker(self) -> None:
+        """
+        Цикл потока-отправителя.
+        """
+        while True:
+            notification = self.__take()
+            chat_ids = notification.chat_ids if notification.chat_ids is not None else list(self.chat_ids())
+            throttled = []
+            retry_after = 0
+            for chat_id in chat_ids:
+                try:
+                    delay = self.__send(chat_id, notification.text, notification.reply_markup)
+                except:
+                    self.errors += 1
+                    logger.error("Произошла ошибка при отправке уведомления в Telegram.")
+                    logger.debug(traceback.format_exc())
+                    continue
+                if delay is not None:
+                    throttled.append(chat_id)
+                    retry_after = max(retry_after, delay)
+            if throttled:
+                # Уведомление возвращено в очередь (будет учтено в sent после отправки) или отброшено (учтено в
+                # dropped).
+                self.__requeue(notification, throttled, retry_after)
+                continue
+            now = time.time()
+            with self.cond:
+                self.sent += len(notification.added_times)
+                for i in notification.added_times:
+                    self.total_latency += now - i
+                    self.max_latency = max(self.max_latency, now - i)
+
+    def stats(self) -> dict:
+        """
+        :return: метрики очереди уведомлений (для мониторинга).
+        """
+        with self.cond:
+            return {
+                "queued": len(self.queue),
+                "enqueued": self.enqueued,
+                "sent": self.sent,
+                "dropped": self.dropped,
+                "requeued": self.requeued,
+                "digested": self.digested,
+                "errors": self.errors,
+                "throttled": self.throttled,
+                "avg_latency": self.total_latency / self.sent if self.sent else 0.0,
+                "max_latency": self.max_latency
+            }
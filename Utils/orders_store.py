@@ -0,0 +1,171 @@
+"""
+В данном модуле написано хранилище обработанных ордеров (SQLite, storage/orders.db).
+"""
+
+
+import os
+import time
+import sqlite3
+from threading import Lock
+from typing import Iterator
+
+import FunPayAPI.orders
+from FunPayAPI.enums import OrderStatuses
+
+
+class OrdersStore:
+    """
+    Хранилище обработанных ордеров и результатов выдачи товара.
+    Работает как словарь {ID ордера: ордер} (поэтому может использоваться в качестве Cardinal.processed_orders):
+    ID всех ордеров держатся в памяти (set), сами ордеры - в SQLite и читаются только по запросу.
+    """
+    def __init__(self, path: str = "storage/orders.db"):
+        """
+        :param path: путь до файла базы данных.
+        """
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self.path = path
+        self.lock = Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS orders (
+            id TEXT PRIMARY KEY,
+            title TEXT,
+            price REAL,
+            buyer_username TEXT,
+            buyer_id INTEGER,
+            status INTEGER,
+            processed_at REAL,
+            delivered INTEGER,
+            delivered_at REAL
+        )""")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.connection.commit()
+        self.ids: set[str] = {row[0] for row in self.connection.execute("SELECT id FROM orders")}
+        if self.ids and not self.is_initialised():
+            # База данных создана до появления таблицы meta: ордеры в ней уже есть, значит, первая загрузка была.
+            self.mark_initialised()
+
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self.ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.ids)
+
+    def __getitem__(self, order_id: str) -> FunPayAPI.orders.Order:
+        order = self.get(order_id)
+        if order is None:
+            raise KeyError(order_id)
+        return order
+
+    def __setitem__(self, order_id: str, order: FunPayAPI.orders.Order) -> None:
+        self.add_many([order])
+
+    def keys(self) -> set[str]:
+        """
+        :return: ID всех обработанных ордеров (set, проверка наличия - O(1)).
+        """
+        return self.ids
+
+    def get(self, order_id: str, default: FunPayAPI.orders.Order | None = None) -> FunPayAPI.orders.Order | None:
+        """
+        Загружает ордер из базы данных.
+
+        :param order_id: ID ордера.
+        :param default: значение, которое нужно вернуть, если ордер не найден.
+        :return: экземпляр Order.
+        """
+        if order_id not in self.ids:
+            return default
+        with self.lock:
+            row = self.connection.execute("SELECT id, title, price, buyer_username, buyer_id, status FROM orders "
+                                          "WHERE id = ?", (order_id, )).fetchone()
+        if row is None:
+            return default
+        return FunPayAPI.orders.Order(id_=row[0], title=row[1], price=row[2], buyer_username=row[3], buyer_id=row[4],
+                                      status=OrderStatuses(row[5]))
+
+    def add_many(self, orders: list[FunPayAPI.orders.Order]) -> None:
+        """
+        Сохраняет ордеры как обработанные (одной транзакцией). Уже сохраненные ордеры пропускаются.
+
+        :param orders: список ордеров.
+        """
+        now = time.time()
+        rows = [(order.id, order.title, order.price, order.buyer_name, order.buyer_id, order.status.value, now)
+                for order in orders]
+        with self.lock:
+            with self.connection:
+                self.connection.executemany("INSERT OR IGNORE INTO orders (id, title, price, buyer_username, "
+                                            "buyer_id, status, processed_at) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self.ids.update(order.id for order in orders)
+
+    def is_initialised(self) -> bool:
+        """
+        :return: была ли уже выполнена первая загрузка ордеров со страницы продаж.
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = 'initialised'").fetchone()
+        return row is not None
+
+    def mark_initialised(self) -> None:
+        """
+        Отмечает, что первая загрузка ордеров со страницы продаж выполнена.
+        """
+        with self.lock:
+            with self.connection:
+                self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('initialised', ?)",
+                                        (str(time.time()), ))
+
+    def undelivered(self, max_age: float | None = None) -> list[FunPayAPI.orders.Order]:
+        """
+        Загружает оплаченные ордеры, товар по которым не выдавался (результата выдачи нет) или не был выдан.
+
+        :param max_age: учитывать только ордеры, обработанные не более max_age секунд назад.
+        :return: список ордеров (от новых к старым, как на странице продаж).
+        """
+        since = time.time() - max_age if max_age is not None else 0
+        with self.lock:
+            rows = self.connection.execute("SELECT id, title, price, buyer_username, buyer_id, status FROM orders "
+                                           "WHERE status = ? AND (delivered IS NULL OR delivered = 0) "
+                                           "AND processed_at >= ? ORDER BY processed_at DESC, rowid DESC",
+                                           (OrderStatuses.OUTSTANDING.value, since)).fetchall()
+        return [FunPayAPI.orders.Order(id_=row[0], title=row[1], price=row[2], buyer_username=row[3],
+                                       buyer_id=row[4], status=OrderStatuses(row[5])) for row in rows]
+
+    def is_delivered(self, order_id: str) -> bool:
+        """
+        :param order_id: ID ордера.
+        :return: был ли товар по ордеру успешно выдан.
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT delivered FROM orders WHERE id = ?", (order_id, )).fetchone()
+        return bool(row and row[0] == 1)
+
+    def set_delivery_result(self, order_id: str, delivered: bool | None) -> None:
+        """
+        Сохраняет результат выдачи товара по ордеру.
+
+        :param order_id: ID ордера.
+        :param delivered: был ли товар успешно выдан (None - товар по ордеру не выдается: лот не найден
+            в конфиге авто-выдачи).
+        """
+        value = -1 if delivered is None else int(delivered)
+        with self.lock:
+            with self.connection:
+                self.connection.execute("UPDATE orders SET delivered = ?, delivered_at = ? WHERE id = ?",
+                                        (value, time.time(), order_id))
+
+    def close(self) -> None:
+        """
+        Закрывает соединение с базой данных.
+        """
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,365 @@
+"""
+В данном модуле написана очередь исходящих сообщений FunPay.
+"""
+
+
+import time
+import heapq
+import logging
+import traceback
+import itertools
+from collections import deque, OrderedDict
+from concurrent.futures import Future
+from threading import Thread, Condition
+from typing import Callable
+
+
+logger = logging.getLogger("Cardinal.outbox")
+
+
+# Максимальная длина сообщения FunPay.
+MAX_MESSAGE_LENGTH = 2000
+
+
+def split_text(text: str, max_length: int) -> list[str]:
+    """
+    Разбивает текст на части не длиннее max_length (по возможности - по переносам строк, затем по пробелам).
+
+    :param text: текст.
+    :param max_length: максимальная длина части.
+    :return: список частей.
+    """
+    parts = []
+    while len(text) > max_length:
+        cut = text.rfind("\n", 0, max_length + 1)
+        if cut <= 0:
+            cut = text.rfind(" ", 0, max_length + 1)
+        if cut <= 0:
+            cut = max_length
+        parts.append(text[:cut])
+        # Разделитель (перенос строки / пробел) не переносится в следующую часть.
+        text = text[cut + 1:] if text[cut] in "\n " else text[cut:]
+    if text or not parts:
+        parts.append(text)
+    return parts
+
+
+class SendResult:
+    """
+    Результат отправки сообщения. Истинен, только если отправлены все части сообщения.
+    """
+    def __init__(self, sent: int, total: int):
+        """
+        :param sent: кол-во отправленных частей сообщения.
+        :param total: кол-во частей сообщения.
+        """
+        self.sent = sent
+        self.total = total
+
+    @property
+    def partial(self) -> bool:
+        """
+        :return: отправлена ли только часть сообщения.
+        """
+        return 0 < self.sent < self.total
+
+    def __bool__(self) -> bool:
+        return self.sent >= self.total
+
+    def __repr__(self) -> str:
+        return f"SendResult(sent={self.sent}, total={self.total})"
+
+
+class _Message:
+    """
+    Исходящее сообщение.
+    """
+    def __init__(self, text: str, username: str | None, key: str | None):
+        self.text = text
+        self.username = username
+        self.key = key
+        self.future: Future = Future()
+
+
+class _Chat:
+    """
+    Очередь исходящих сообщений одного чата.
+    """
+    def __init__(self):
+        self.queue: deque[_Message] = deque()
+        # Отправляемая пачка сообщений, ее части и индекс следующей неотправленной части.
+        self.batch: list[_Message] = []
+        self.parts: list[str] = []
+        self.index = 0
+        # Кол-во неудачных попыток отправки текущей части.
+        self.attempts = 0
+        # Запланирован ли чат / обрабатывается ли потоком-отправителем.
+        self.scheduled = False
+        # Отправляется ли сейчас часть сообщения чата.
+        self.sending = False
+
+
+class MessageOutbox:
+    """
+    Очередь исходящих сообщений. Сообщения отправляются в фоновых потоках, submit() сразу возвращает Future с
+    результатом отправки.
+
+    Сообщения одного чата отправляются строго по порядку, сообщения разных чатов - параллельно.
+    Несколько коротких сообщений, ожидающих отправки в один чат, объединяются в одно (если это не превышает
+    ограничение длины; сообщения с ключом идемпотентности не объединяются), длинные сообщения разбиваются на части.
+    При ошибке отправка части повторяется с экспоненциально растущей задержкой (уже отправленные части не
+    отправляются повторно); поток при этом не блокируется, а сообщения чата ждут своей очереди.
+    Сообщение с ключом идемпотентности отправляется не более 1 раза: повторный submit() с тем же ключом возвращает
+    Future первого сообщения.
+    Результат Future - SendResult: сколько частей сообщения отправлено. При остановке очереди Future всех
+    неотправленных сообщений завершаются с результатом, учитывающим уже отправленные части.
+    """
+    def __init__(self, send: Callable[[int, str, str | None], bool], workers: int = 2,
+                 max_length: int = MAX_MESSAGE_LENGTH, attempts: int = 3, delay: float = 1.0,
+                 coalesce: bool = True, keys_limit: int = 10000):
+        """
+        :param send: функция отправки сообщения: (node_id, текст, никнейм собеседника) -> отправлено ли сообщение.
+        :param workers: кол-во потоков-отправителей.
+        :param max_length: максимальная длина 1 сообщения.
+        :param attempts: кол-во попыток отправки каждой части.
+        :param delay: задержка перед 1й повторной попыткой (в секундах). Удваивается с каждой попыткой.
+        :param coalesce: объединять ли короткие сообщения одного чата.
+        :param keys_limit: кол-во запоминаемых ключей идемпотентности.
+        """
+        self.send = send
+        self.workers = max(1, workers)
+        self.max_length = max_length
+        self.attempts = max(1, attempts)
+        self.delay = delay
+        self.coalesce = coalesce
+        self.keys_limit = keys_limit
+
+        self.cond = Condition()
+        self.chats: dict[int, _Chat] = {}
+        # Куча чатов, готовых к отправке: [(время, порядковый номер, node_id)]
+        self.ready: list[tuple[float, int, int]] = []
+        self.counter = itertools.count()
+        # {ключ идемпотентности: Future}
+        self.keys: OrderedDict[str, Future] = OrderedDict()
+        self.threads: list[Thread] = []
+        self.running = False
+
+        # Метрики.
+        self.submitted = 0
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.coalesced = 0
+        self.duplicates = 0
+
+    def start(self) -> None:
+        """
+        Запускает потоки-отправители.
+        """
+        if self.running:
+            return
+        self.running = True
+        for index in range(self.workers):
+            thread = Thread(target=self.__worker, name=f"CardinalOutbox-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self) -> None:
+        """
+        Останавливает потоки-отправители. Future сообщений, ожидающих отправки, завершаются неудачей (сообщения
+        чатов, часть которых отправляется прямо сейчас, завершаются потоком-отправителем после отправки).
+        """
+        finished = []
+        with self.cond:
+            self.running = False
+            self.ready.clear()
+            for node_id, chat in list(self.chats.items()):
+                if chat.sending:
+                    continue
+                finished.extend(self.__drain(chat))
+                del self.chats[node_id]
+            self.cond.notify_all()
+        self.__resolve(finished)
+
+    def submit(self, node_id: int, text: str, username: str | None = None, key: str | None = None) -> Future:
+        """
+        Добавляет сообщение в очередь.
+
+        :param node_id: ID чата.
+        :param text: текст сообщения.
+        :param username: никнейм собеседника.
+        :param key: ключ идемпотентности (например, "product:#ABCD1234" для товара ордера).
+        :return: Future, результат которого - SendResult (истинен, если сообщение отправлено полностью).
+        """
+        message = _Message(text, username, key)
+        with self.cond:
+            if not self.running and self.threads:
+                message.future.set_result(SendResult(0, 1))
+                return message.future
+            if key is not None:
+                if key in self.keys:
+                    self.duplicates += 1
+                    logger.warning(f"Сообщение с ключом {key} уже отправлено или отправляется, пропускаю.")
+                    return self.keys[key]
+                self.keys[key] = message.future
+                while len(self.keys) > self.keys_limit:
+                    self.keys.popitem(last=False)
+
+            chat = self.chats.setdefault(node_id, _Chat())
+            chat.queue.append(message)
+            self.submitted += 1
+            if not chat.scheduled:
+                self.__schedule(node_id, chat, time.time())
+        return message.future
+
+    def __schedule(self, node_id: int, chat: _Chat, at: float) -> None:
+        """
+        Планирует обработку чата. Вызывается под self.cond.
+        """
+        chat.scheduled = True
+        heapq.heappush(self.ready, (at, next(self.counter), node_id))
+        self.cond.notify()
+
+    def __next_batch(self, chat: _Chat) -> None:
+        """
+        Берет из очереди чата следующую пачку сообщений. Вызывается под self.cond.
+        """
+        batch = [chat.queue.popleft()]
+        text = batch[0].text
+        # Сообщения с ключом идемпотентности (товары) не объединяются с другими: результат их отправки должен
+        # зависеть только от их собственных частей.
+        # Объединенная пачка всегда умещается в 1 часть, поэтому на части разбиваются только одиночные сообщения.
+        while self.coalesce and batch[0].key is None and chat.queue and chat.queue[0].key is None and \
+                len(text) + 1 + len(chat.queue[0].text) <= self.max_length:
+            message = chat.queue.popleft()
+            text += "\n" + message.text
+            batch.append(message)
+        self.coalesced += len(batch) - 1
+        chat.batch = batch
+        chat.parts = split_text(text, self.max_length)
+        chat.index = 0
+        chat.attempts = 0
+
+    def __finish_batch(self, chat: _Chat) -> list[tuple[_Message, SendResult]]:
+        """
+        Завершает отправку пачки сообщений (с учетом отправленных частей). Вызывается под self.cond.
+
+        :return: [(сообщение пачки, результат отправки)]. Результаты Future устанавливаются вне self.cond, т.к.
+        callback'и Future выполняются в потоке, установившем результат.
+        """
+        result = SendResult(chat.index, len(chat.parts))
+        finished = []
+        for message in chat.batch:
+            if result:
+                self.sent += 1
+            else:
+                self.failed += 1
+                # Сообщение, ни одна часть которого не отправлена, можно отправить повторно.
+                if not result.sent and message.key is not None and self.keys.get(message.key) is message.future:
+                    del self.keys[message.key]
+            finished.append((message, result))
+        chat.batch = []
+        chat.parts = []
+        return finished
+
+    def __drain(self, chat: _Chat) -> list[tuple[_Message, SendResult]]:
+        """
+        Завершает неудачей текущую пачку и все ожидающие сообщения чата. Вызывается под self.cond.
+
+        :return: [(сообщение, результат отправки)].
+        """
+        finished = self.__finish_batch(chat) if chat.batch else []
+        while chat.queue:
+            message = chat.queue.popleft()
+            chat.batch = [message]
+            chat.parts = [message.text]
+            chat.index = 0
+            finished.extend(self.__finish_batch(chat))
+        chat.scheduled = False
+        return finished
+
+    @staticmethod
+    def __resolve(finished: list[tuple[_Message, SendResult]]) -> None:
+        """
+        Устанавливает результаты Future сообщений. Вызывается вне self.cond.
+        """
+        for message, result in finished:
+            if not message.future.done():
+                message.future.set_result(result)
+
+    def __worker(self) -> None:
+        """
+        Цикл потока-отправителя.
+        """
+        while True:
+            with self.cond:
+                while self.running and (not self.ready or self.ready[0][0] > time.time()):
+                    self.cond.wait(self.ready[0][0] - time.time() if self.ready else None)
+                if not self.running:
+                    return
+                _, _, node_id = heapq.heappop(self.ready)
+                chat = self.chats[node_id]
+                if not chat.batch:
+                    self.__next_batch(chat)
+                message = chat.batch[0]
+                part = chat.parts[chat.index]
+                chat.sending = True
+
+            try:
+                result = self.send(node_id, part, message.username)
+            except:
+                logger.error(f"Произошла непредвиденная ошибка при отправке сообщения в чат {node_id}.")
+                logger.debug(traceback.format_exc())
+                result = False
+
+            finished = []
+            with self.cond:
+                chat.sending = False
+                if result:
+                    chat.index += 1
+                    chat.attempts = 0
+                    if chat.index >= len(chat.parts):
+                        finished = self.__finish_batch(chat)
+                    retry_at = time.time()
+                else:
+                    chat.attempts += 1
+                    if chat.attempts >= self.attempts:
+                        logger.error(f"Не удалось отправить сообщение в чат {node_id}: превышено кол-во попыток.")
+                        if chat.index:
+                            logger.error(f"Сообщение в чат {node_id} отправлено частично: {chat.index} из "
+                                         f"{len(chat.parts)} частей.")
+                        finished = self.__finish_batch(chat)
+                        retry_at = time.time()
+                    else:
+                        self.retries += 1
+                        retry_at = time.time() + self.delay * 2 ** (chat.attempts - 1)
+                        logger.info(f"Следующая попытка отправки сообщения в чат {node_id} через "
+                                    f"{retry_at - time.time():.0f} сек.")
+
+                if not self.running:
+                    # Очередь остановлена во время отправки: остальные сообщения чата не отправляются.
+                    finished.extend(self.__drain(chat))
+                    self.chats.pop(node_id, None)
+                elif chat.batch or chat.queue:
+                    self.__schedule(node_id, chat, retry_at)
+                else:
+                    chat.scheduled = False
+                    del self.chats[node_id]
+
+            self.__resolve(finished)
+
+    def stats(self) -> dict:
+        """
+        :return: метрики очереди (для мониторинга).
+        """
+        with self.cond:
+            return {
+                "chats": len(self.chats),
+                "queued": sum(len(i.queue) + len(i.batch) for i in self.chats.values()),
+                "submitted": self.submitted,
+                "sent": self.sent,
+                "failed": self.failed,
+                "retries": self.retries,
+                "coalesced": self.coalesced,
+                "duplicates": self.duplicates
+            }
@@ -0,0 +1,328 @@
+"""
+В данном модуле написано хранилище товаров для авто-выдачи (SQLite, storage/products.db).
+"""
+
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import traceback
+from collections import Counter
+from threading import Lock, Timer
+
+import Utils.exceptions as excs
+
+
+logger = logging.getLogger("Cardinal.products")
+
+
+class ProductsStore:
+    """
+    Хранилище товаров. Для каждого файла с товарами (productsFilePath) хранит в SQLite очередь товаров.
+
+    Файл с товарами остается источником истины для пользователя: если файл был изменен (например, в него добавили
+    товары), очередь заново импортируется из файла. После выдачи товаров файл перезаписывается не сразу, а с задержкой
+    (все изменения за время задержки записываются одной перезаписью).
+
+    Выдача товара происходит в 2 этапа: reserve() - резервирует первый товар в очереди, commit() - помечает товар
+    выданным, rollback() - возвращает товар на его прежнее место в очереди.
+    Зарезервированные и выданные товары не попадают в файл. Если Кардинал был остановлен между reserve() и commit(),
+    при следующем запуске товар считается выданным (не будет выдан повторно), см. __expire_reservations().
+    """
+    # Состояния товаров.
+    AVAILABLE = 0
+    RESERVED = 1
+    # Выдан, но файл с товарами еще не перезаписан.
+    SOLD = 2
+
+    def __init__(self, path: str = "storage/products.db", export_delay: float = 5.0):
+        """
+        :param path: путь до файла базы данных.
+        :param export_delay: задержка перезаписи файлов с товарами после изменения очереди (в секундах).
+        """
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self.export_delay = export_delay
+        self.lock = Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.execute("""CREATE TABLE IF NOT EXISTS products (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                path TEXT NOT NULL,
+                product TEXT NOT NULL,
+                state INTEGER NOT NULL DEFAULT 0,
+                reserved_at REAL,
+                exported INTEGER NOT NULL DEFAULT 0
+            )""")
+            # Хранилища, созданные до появления колонки exported.
+            columns = {row[1] for row in self.connection.execute("PRAGMA table_info(products)")}
+            if "exported" not in columns:
+                self.connection.execute("ALTER TABLE products ADD COLUMN exported INTEGER NOT NULL DEFAULT 0")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS products_queue ON products (path, state, id)")
+            # Состояние файла с товарами на момент последнего импорта / экспорта.
+            self.connection.execute("""CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                mtime INTEGER,
+                size INTEGER
+            )""")
+        # Отложенные перезаписи файлов: {путь до файла: таймер}
+        self.export_timers: dict[str, Timer] = {}
+        # Кол-во доступных товаров (чтобы не считать их при каждой выдаче): {путь до файла: кол-во}
+        self.counts: dict[str, int] = {}
+
+        self.__expire_reservations()
+
+    def __expire_reservations(self) -> None:
+        """
+        Снимает резервы, оставшиеся после остановки Кардинала во время выдачи (между reserve() и commit()).
+        Вызывается при создании хранилища, до импорта файлов: иначе такие резервы навсегда скрывали бы одинаковые
+        строки, добавленные в файл позже (см. __sync).
+
+        Неизвестно, был ли товар отправлен покупателю, поэтому он считается выданным. Если файл с товарами
+        перезаписывался после резервирования (exported), товара в файле уже нет - запись удаляется, иначе товар
+        помечается выданным и будет удален из файла при следующей перезаписи.
+        """
+        rows = self.connection.execute("SELECT id, path, exported FROM products WHERE state = ?",
+                                       (self.RESERVED, )).fetchall()
+        if not rows:
+            return
+        with self.connection:
+            self.connection.execute("DELETE FROM products WHERE state = ? AND exported = 1", (self.RESERVED, ))
+            self.connection.execute("UPDATE products SET state = ?, reserved_at = NULL WHERE state = ?",
+                                    (self.SOLD, self.RESERVED))
+        logger.warning(f"В хранилище товаров $YELLOW{len(rows)}$color зарезервированных, но не выданных товаров "
+                       f"(Кардинал был остановлен во время выдачи). Они считаются выданными и не будут выданы "
+                       f"повторно.")
+        for path in {i[1] for i in rows if not i[2]}:
+            if os.path.exists(path):
+                self.schedule_export(path)
+
+    @staticmethod
+    def read_file(path: str) -> list[str]:
+        """
+        Читает товары из файла (.json или построчный формат).
+
+        :param path: путь до файла с товарами.
+        :return: список товаров.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            products = f.read()
+
+        if path.endswith(".json"):
+            products = json.loads(products)
+        else:
+            products = products.split("\n")
+        return [str(i) for i in products if i]
+
+    @staticmethod
+    def write_file(path: str, products: list[str]) -> None:
+        """
+        Атомарно перезаписывает файл с товарами (через временный файл).
+
+        :param path: путь до файла с товарами.
+        :param products: список товаров.
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            if path.endswith(".json"):
+                f.write(json.dumps(products, indent=4, ensure_ascii=False))
+            else:
+                f.write("\n".join(products))
+        os.replace(tmp_path, path)
+
+    def __file_state(self, path: str) -> tuple[int, int]:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def __sync(self, path: str) -> None:
+        """
+        Импортирует товары из файла, если файл был изменен с момента последнего импорта / экспорта.
+        Вызывается внутри транзакции.
+
+        :param path: путь до файла с товарами.
+        """
+        state = self.__file_state(path)
+        saved = self.connection.execute("SELECT mtime, size FROM files WHERE path = ?", (path, )).fetchone()
+        if saved is not None and tuple(saved) == state:
+            return
+
+        # Если файл был изменен до того, как в него были записаны последние изменения очереди, в нем могут остаться
+        # уже выданные / зарезервированные товары: пропускаем их. Товаров, которые были зарезервированы до последней
+        # перезаписи файла (exported), в файле уже нет: одинаковые строки, добавленные позже, - новые товары.
+        pending = Counter(row[0] for row in self.connection.execute(
+            "SELECT product FROM products WHERE path = ? AND state != ? AND exported = 0", (path, self.AVAILABLE)))
+        products = []
+        for product in self.read_file(path):
+            if pending[product]:
+                pending[product] -= 1
+                continue
+            products.append(product)
+
+        self.connection.execute("DELETE FROM products WHERE path = ? AND state = ?", (path, self.AVAILABLE))
+        self.connection.executemany("INSERT INTO products (path, product) VALUES (?, ?)",
+                                    ((path, i) for i in products))
+        self.connection.execute("INSERT OR REPLACE INTO files (path, mtime, size) VALUES (?, ?, ?)", (path, *state))
+        self.counts[path] = len(products)
+        logger.debug(f"Импортировал {len(products)} товаров из файла {path}.")
+
+    def import_file(self, path: str) -> int:
+        """
+        Принудительно импортирует товары из файла (заменяет очередь незарезервированных товаров).
+
+        :param path: путь до файла с товарами.
+        :return: кол-во товаров в очереди.
+        """
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM files WHERE path = ?", (path, ))
+            self.__sync(path)
+            return self.__count(path)
+
+    def __count(self, path: str) -> int:
+        if path not in self.counts:
+            self.counts[path] = self.connection.execute("SELECT COUNT(*) FROM products WHERE path = ? AND state = ?",
+                                                        (path, self.AVAILABLE)).fetchone()[0]
+        return self.counts[path]
+
+    def count(self, path: str) -> int:
+        """
+        :param path: путь до файла с товарами.
+        :return: кол-во доступных (незарезервированных) товаров.
+        """
+        with self.lock, self.connection:
+            self.__sync(path)
+            return self.__count(path)
+
+    def reserve(self, path: str) -> tuple[int, str, int]:
+        """
+        Резервирует первый товар в очереди.
+
+        :param path: путь до файла с товарами.
+
+        :raise NoProductsError: если товары закончились.
+
+        :return: (ID резерва, товар, оставшееся кол-во товаров).
+        """
+        with self.lock, self.connection:
+            self.__sync(path)
+            row = self.connection.execute("SELECT id, product FROM products WHERE path = ? AND state = ? "
+                                          "ORDER BY id LIMIT 1", (path, self.AVAILABLE)).fetchone()
+            if row is None:
+                raise excs.NoProductsError(path)
+            amount = self.__count(path) - 1
+            self.connection.execute("UPDATE products SET state = ?, reserved_at = ?, exported = 0 WHERE id = ?",
+                                    (self.RESERVED, time.time(), row[0]))
+            self.counts[path] = amount
+        self.schedule_export(path)
+        return row[0], row[1], amount
+
+    def commit(self, reservation_id: int) -> None:
+        """
+        Помечает зарезервированный товар выданным (после успешной выдачи).
+        Выданный товар удаляется из хранилища при следующей перезаписи файла с товарами.
+
+        :param reservation_id: ID резерва.
+        """
+        with self.lock, self.connection:
+            self.connection.execute("UPDATE products SET state = ? WHERE id = ?", (self.SOLD, reservation_id))
+
+    def rollback(self, reservation_id: int) -> None:
+        """
+        Возвращает зарезервированный товар на его прежнее место в очереди.
+
+        :param reservation_id: ID резерва.
+        """
+        with self.lock, self.connection:
+            row = self.connection.execute("SELECT path FROM products WHERE id = ? AND state = ?",
+                                          (reservation_id, self.RESERVED)).fetchone()
+            if row is None:
+                return
+            amount = self.__count(row[0]) + 1
+            self.connection.execute("UPDATE products SET state = ?, reserved_at = NULL WHERE id = ?",
+                                    (self.AVAILABLE, reservation_id))
+            self.counts[row[0]] = amount
+        self.schedule_export(row[0])
+
+    def add(self, path: str, products: list[str]) -> None:
+        """
+        Добавляет товары в конец очереди.
+
+        :param path: путь до файла с товарами.
+        :param products: список товаров.
+        """
+        with self.lock, self.connection:
+            self.__sync(path)
+            amount = self.__count(path) + len(products)
+            self.connection.executemany("INSERT INTO products (path, product) VALUES (?, ?)",
+                                        ((path, i) for i in products))
+            self.counts[path] = amount
+        self.schedule_export(path)
+
+    def export_file(self, path: str) -> None:
+        """
+        Перезаписывает файл с товарами доступными (незарезервированными) товарами из очереди.
+
+        :param path: путь до файла с товарами.
+        """
+        with self.lock, self.connection:
+            self.export_timers.pop(path, None)
+            self.__sync(path)
+            products = [row[0] for row in self.connection.execute(
+                "SELECT product FROM products WHERE path = ? AND state = ? ORDER BY id", (path, self.AVAILABLE))]
+            self.write_file(path, products)
+            self.connection.execute("DELETE FROM products WHERE path = ? AND state = ?", (path, self.SOLD))
+            self.connection.execute("UPDATE products SET exported = 1 WHERE path = ? AND state = ?",
+                                    (path, self.RESERVED))
+            self.connection.execute("INSERT OR REPLACE INTO files (path, mtime, size) VALUES (?, ?, ?)",
+                                    (path, *self.__file_state(path)))
+
+    def __export_job(self, path: str) -> None:
+        try:
+            self.export_file(path)
+        except:
+            logger.error(f"Не удалось перезаписать файл с товарами $YELLOW{path}$color.")
+            logger.debug(traceback.format_exc())
+
+    def schedule_export(self, path: str) -> None:
+        """
+        Планирует перезапись файла с товарами через self.export_delay секунд (если она еще не запланирована).
+
+        :param path: путь до файла с товарами.
+        """
+        with self.lock:
+            if path in self.export_timers:
+                return
+            timer = Timer(self.export_delay, self.__export_job, args=(path, ))
+            timer.daemon = True
+            self.export_timers[path] = timer
+            timer.start()
+
+    def flush(self) -> None:
+        """
+        Немедленно выполняет все запланированные перезаписи файлов с товарами.
+        """
+        with self.lock:
+            timers = dict(self.export_timers)
+        for path, timer in timers.items():
+            timer.cancel()
+            self.__export_job(path)
+
+
+STORE: ProductsStore | None = None
+STORE_LOCK = Lock()
+
+
+def get_store() -> ProductsStore:
+    """
+    :return: общее хранилище товаров (создается при первом вызове).
+    """
+    global STORE
+    with STORE_LOCK:
+        if STORE is None:
+            STORE = ProductsStore()
+        return STORE
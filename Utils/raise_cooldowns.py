@@ -0,0 +1,192 @@
+"""
+В данном модуле написана модель времени перезарядки поднятия лотов (storage/cache/raise_cooldowns.json).
+"""
+
+
+import os
+import json
+import time
+import logging
+from threading import Lock
+
+
+logger = logging.getLogger("Cardinal.raise_cooldowns")
+
+
+class RaiseCooldowns:
+    """
+    Изучает реальное время перезарядки поднятия лотов каждой игры по результатам попыток поднятия.
+
+    Для каждой игры хранится время последнего успешного поднятия и границы перезарядки:
+    lower - наибольшее время с последнего поднятия, через которое FunPay отказал в поднятии (перезарядка > lower);
+    upper - наименьшее время с последнего поднятия, через которое поднятие удалось (перезарядка <= upper).
+    После успешного поднятия следующая попытка планируется через upper, поэтому, начиная со 2го цикла,
+    поднятие происходит сразу после окончания перезарядки без лишних запросов.
+    Пока upper неизвестна, время ожидания из ответа FunPay (округленное вверх до часов / минут) уточняется: следующая
+    попытка выполняется в начале интервала округления, чтобы получить более точное время ожидания.
+    Если FunPay отказал позже upper (перезарядка увеличилась) или поднятие удалось раньше lower (перезарядка
+    уменьшилась), устаревшая граница сбрасывается.
+    upper изучается только по попыткам, выполненным вовремя (не позже запланированного моделью времени + margin):
+    поднятие после простоя бота или долгой паузы после ошибок говорит лишь о том, что перезарядка меньше прошедшего
+    времени, и сделало бы границу (а значит и время ожидания) слишком большой. Границы не превышают max_cooldown,
+    время последнего поднятия старше max_cooldown при загрузке отбрасывается.
+
+    Формат файла: {"41": {"last": 1672531200.0, "lower": 3540.0, "upper": 3603.5}}
+    """
+    def __init__(self, path: str = "storage/cache/raise_cooldowns.json", default: int = 3600,
+                 min_backoff: int = 10, max_backoff: int = 600, max_cooldown: int = 6 * 3600, margin: int = 60):
+        """
+        :param path: путь до файла модели.
+        :param default: время до следующей попытки после успешного поднятия, пока перезарядка игры неизвестна
+        (в секундах).
+        :param min_backoff: время до повторной попытки после ошибки без времени ожидания (в секундах).
+        Удваивается с каждой ошибкой подряд.
+        :param max_backoff: максимальное время до повторной попытки после ошибки (в секундах).
+        :param max_cooldown: максимальное время перезарядки (в секундах).
+        :param margin: допустимое опоздание попытки относительно запланированного времени (в секундах), при котором
+        успешное поднятие еще уточняет upper.
+        """
+        self.path = path
+        self.default = default
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.max_cooldown = max_cooldown
+        self.margin = margin
+        self.lock = Lock()
+        # {game_id: {"last": время последнего поднятия, "lower": нижняя граница, "upper": верхняя граница}}
+        self.games: dict[int, dict] = {}
+        # {game_id: кол-во ошибок подряд без времени ожидания}
+        self.errors: dict[int, int] = {}
+        # {game_id: точности времени ожидания, уже уточненные в текущем цикле поднятия}
+        self.refined: dict[int, set[int]] = {}
+        # {game_id: запланированное моделью время следующей попытки}. Не сохраняется: после запуска первое успешное
+        # поднятие не уточняет upper.
+        self.deadlines: dict[int, float] = {}
+
+    def load(self, now: float | None = None) -> None:
+        """
+        Загружает модель из файла. Поврежденный файл игнорируется.
+
+        :param now: текущее время (timestamp).
+        """
+        now = time.time() if now is None else now
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.loads(f.read())
+            games = {int(k): {"last": v.get("last"), "lower": v.get("lower", 0), "upper": v.get("upper")}
+                     for k, v in data.items()}
+        except (OSError, ValueError, AttributeError):
+            logger.warning(f"Файл {self.path} поврежден и будет перезаписан.")
+            return
+        for game in games.values():
+            # Устаревшее время последнего поднятия (бот долго не работал) ничего не говорит о перезарядке.
+            if game["last"] is not None and not 0 <= now - game["last"] <= self.max_cooldown:
+                game["last"] = None
+            game["lower"] = min(game["lower"] or 0, self.max_cooldown)
+            if game["upper"] is not None and not game["lower"] < game["upper"] <= self.max_cooldown:
+                game["upper"] = None
+        with self.lock:
+            self.games = games
+            self.deadlines = {}
+
+    def save(self) -> None:
+        """
+        Атомарно записывает модель в файл (через временный файл).
+        """
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        with self.lock:
+            data = json.dumps({str(k): v for k, v in self.games.items()}, indent=4)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def __game(self, game_id: int) -> dict:
+        return self.games.setdefault(game_id, {"last": None, "lower": 0, "upper": None})
+
+    def on_success(self, game_id: int, t: float) -> float:
+        """
+        Учитывает успешное поднятие.
+
+        :param game_id: ID игры.
+        :param t: время поднятия (timestamp).
+        :return: время следующей попытки поднятия (timestamp).
+        """
+        with self.lock:
+            game = self.__game(game_id)
+            self.errors.pop(game_id, None)
+            self.refined.pop(game_id, None)
+            deadline = self.deadlines.get(game_id)
+            if game["last"] is not None:
+                elapsed = t - game["last"]
+                if elapsed <= game["lower"]:
+                    game["lower"] = 0
+                # Попытка выполнена вовремя: прошедшее время - реальная граница перезарядки.
+                on_time = deadline is not None and t <= deadline + self.margin
+                if on_time and elapsed <= self.max_cooldown and (game["upper"] is None or elapsed < game["upper"]):
+                    game["upper"] = elapsed
+            game["last"] = t
+            return self.__plan(game_id, t + (game["upper"] or self.default))
+
+    def __plan(self, game_id: int, deadline: float) -> float:
+        """
+        Запоминает запланированное время следующей попытки. Вызывается под self.lock.
+        """
+        self.deadlines[game_id] = deadline
+        return deadline
+
+    def on_wait(self, game_id: int, t: float, wait: int, precision: int = 1) -> float:
+        """
+        Учитывает отказ FunPay в поднятии с указанием времени ожидания.
+
+        :param game_id: ID игры.
+        :param t: время попытки поднятия (timestamp).
+        :param wait: время ожидания из ответа FunPay (в секундах).
+        :param precision: точность времени ожидания (в секундах): 3600 для "Подождите 2 часа.", 60 для
+        "Подождите 5 минут." и т.д.
+        :return: время следующей попытки поднятия (timestamp).
+        """
+        with self.lock:
+            game = self.__game(game_id)
+            self.errors.pop(game_id, None)
+            if game["last"] is not None and t - game["last"] <= self.max_cooldown:
+                elapsed = t - game["last"]
+                game["lower"] = max(game["lower"], elapsed)
+                if game["upper"] is not None and game["upper"] <= game["lower"]:
+                    game["upper"] = None
+                if game["upper"] is not None:
+                    # Изученная граница точнее округленного времени ожидания из ответа FunPay.
+                    return self.__plan(game_id, min(t + max(wait, 1), game["last"] + game["upper"]))
+
+            # Каждая точность уточняется не более 1 раза за цикл, чтобы не зациклиться, если FunPay округлит время
+            # ожидания иначе.
+            refined = self.refined.setdefault(game_id, set())
+            if precision > 1 and precision not in refined:
+                refined.add(precision)
+                return self.__plan(game_id, t + max(wait - precision, 0) + 1)
+            return self.__plan(game_id, t + max(wait, 1))
+
+    def on_error(self, game_id: int, t: float) -> float:
+        """
+        Учитывает ошибку поднятия без времени ожидания (неизвестный ответ FunPay, ошибка сети).
+        Повторные попытки выполняются с экспоненциально растущей задержкой.
+
+        :param game_id: ID игры.
+        :param t: время попытки поднятия (timestamp).
+        :return: время следующей попытки поднятия (timestamp).
+        """
+        with self.lock:
+            errors = self.errors.get(game_id, 0)
+            self.errors[game_id] = errors + 1
+            return self.__plan(game_id, t + min(self.min_backoff * 2 ** errors, self.max_backoff))
+
+    def stats(self) -> dict:
+        """
+        :return: изученные границы перезарядки игр (для мониторинга).
+        """
+        with self.lock:
+            return {game_id: {"lower": v["lower"], "upper": v["upper"]} for game_id, v in self.games.items()}
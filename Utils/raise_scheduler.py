@@ -0,0 +1,136 @@
+"""
+В данном модуле написан планировщик поднятия лотов.
+"""
+
+
+import time
+import heapq
+from threading import Event, Lock
+
+import FunPayAPI.categories
+
+
+class RaiseScheduler:
+    """
+    Планировщик поднятия лотов. Хранит по 1 записи на игру (game_id) в куче, отсортированной по времени следующего
+    поднятия: за 1 пробуждение поднимаются только те игры, время поднятия которых настало.
+    Поток поднятия спит до ближайшего времени поднятия, но может быть разбужен раньше (wake()), например, при
+    изменении списка категорий.
+    """
+    def __init__(self):
+        # Куча [(время поднятия, game_id)]. Может содержать устаревшие записи: актуальное время хранится в deadlines.
+        self.heap: list[tuple[float, int]] = []
+        # {game_id: время следующего поднятия}
+        self.deadlines: dict[int, float] = {}
+        # {game_id: [категории игры]}
+        self.categories: dict[int, list[FunPayAPI.categories.Category]] = {}
+        self.lock = Lock()
+        self.wake_event = Event()
+
+    def set_categories(self, categories: list[FunPayAPI.categories.Category]) -> None:
+        """
+        Обновляет список категорий. Новые игры планируются на поднятие немедленно, время поднятия уже известных игр
+        сохраняется, игры без категорий удаляются из планировщика.
+
+        :param categories: список категорий (категории без game_id пропускаются).
+        """
+        grouped: dict[int, list[FunPayAPI.categories.Category]] = {}
+        for cat in categories:
+            if cat.game_id is not None:
+                grouped.setdefault(cat.game_id, []).append(cat)
+        with self.lock:
+            self.categories = grouped
+            for game_id in list(self.deadlines):
+                if game_id not in grouped:
+                    del self.deadlines[game_id]
+            now = time.time()
+            for game_id in grouped:
+                if game_id not in self.deadlines:
+                    self.deadlines[game_id] = now
+                    heapq.heappush(self.heap, (now, game_id))
+        self.wake()
+
+    def schedule(self, game_id: int, next_time: float) -> None:
+        """
+        Планирует следующее поднятие игры.
+
+        :param game_id: ID игры.
+        :param next_time: время поднятия (timestamp).
+        """
+        with self.lock:
+            if game_id not in self.categories:
+                return
+            self.deadlines[game_id] = next_time
+            heapq.heappush(self.heap, (next_time, game_id))
+
+    def raise_now(self, game_id: int | None = None) -> None:
+        """
+        Планирует немедленное поднятие игры (или всех игр) и будит поток поднятия.
+
+        :param game_id: ID игры. Если не указан - все игры.
+        """
+        game_ids = [game_id] if game_id is not None else list(self.categories)
+        now = time.time()
+        for i in game_ids:
+            self.schedule(i, now)
+        self.wake()
+
+    def __clean_top(self) -> None:
+        """
+        Удаляет с вершины кучи устаревшие записи. Вызывается под self.lock.
+        """
+        while self.heap and self.deadlines.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+
+    def pop_due(self) -> list[tuple[int, list[FunPayAPI.categories.Category]]]:
+        """
+        Извлекает игры, время поднятия которых настало.
+
+        :return: [(game_id, [категории игры])]
+        """
+        due = []
+        now = time.time()
+        with self.lock:
+            self.__clean_top()
+            while self.heap and self.heap[0][0] <= now:
+                _, game_id = heapq.heappop(self.heap)
+                # Пока игра не будет запланирована заново, она не должна подниматься повторно.
+                del self.deadlines[game_id]
+                due.append((game_id, self.categories[game_id]))
+                self.__clean_top()
+        return due
+
+    def next_time(self) -> float | None:
+        """
+        :return: ближайшее время поднятия (timestamp) или None, если запланированных поднятий нет.
+        """
+        with self.lock:
+            self.__clean_top()
+            return self.heap[0][0] if self.heap else None
+
+    def wait(self, max_delay: float | None = None) -> None:
+        """
+        Ждет до ближайшего времени поднятия (или до вызова wake()).
+
+        :param max_delay: максимальное время ожидания (в секундах).
+        """
+        next_time = self.next_time()
+        delay = max_delay if next_time is None else max(0.0, next_time - time.time())
+        if max_delay is not None and delay is not None:
+            delay = min(delay, max_delay)
+        self.wake_event.wait(delay)
+        self.wake_event.clear()
+
+    def wake(self) -> None:
+        """
+        Будит поток поднятия.
+        """
+        self.wake_event.set()
+
+    def upcoming(self) -> list[tuple[float, int, list[str]]]:
+        """
+        :return: запланированные поднятия [(время поднятия, game_id, [названия категорий])], от ближайших к дальним.
+        """
+        with self.lock:
+            return sorted((deadline, game_id, [i.title for i in self.categories[game_id]])
+                          for game_id, deadline in self.deadlines.items())
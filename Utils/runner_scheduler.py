@@ -0,0 +1,76 @@
+"""
+В данном модуле написан планировщик запросов к runner'у FunPay.
+"""
+
+
+import random
+
+
+class RunnerScheduler:
+    """
+    Адаптивный планировщик запросов к runner'у.
+    Сразу после активности (новое сообщение / изменение в ордерах) опрашивает FunPay с минимальной задержкой,
+    во время простоя и при ошибках экспоненциально увеличивает задержку (но не больше максимальной).
+    К каждой задержке добавляется случайный разброс (jitter).
+    """
+    def __init__(self, min_delay: float = 3.0, max_delay: float = 30.0, backoff: float = 1.5,
+                 error_backoff: float = 2.0, jitter: float = 0.1):
+        """
+        :param min_delay: минимальная задержка между запросами (в секундах).
+        :param max_delay: максимальная задержка между запросами (в секундах).
+        :param backoff: во сколько раз увеличивать задержку после запроса без новых эвентов.
+        :param error_backoff: во сколько раз увеличивать задержку после ошибки.
+        :param jitter: относительный разброс задержки (0.1 = ±10%).
+        """
+        self.min_delay = min_delay
+        self.max_delay = max(min_delay, max_delay)
+        self.backoff = backoff
+        self.error_backoff = error_backoff
+        self.jitter = jitter
+
+        # Текущая задержка (без разброса).
+        self.interval = min_delay
+        # Кол-во запросов, после которых были получены новые эвенты.
+        self.hits = 0
+        # Кол-во запросов без новых эвентов.
+        self.idle = 0
+        # Кол-во запросов, завершившихся ошибкой.
+        self.errors = 0
+
+    def on_success(self, active: bool) -> None:
+        """
+        Обновляет задержку после успешного запроса.
+
+        :param active: были ли получены новые эвенты.
+        """
+        if active:
+            self.hits += 1
+            self.interval = self.min_delay
+        else:
+            self.idle += 1
+            self.interval = min(self.max_delay, self.interval * self.backoff)
+
+    def on_error(self) -> None:
+        """
+        Обновляет задержку после запроса, завершившегося ошибкой.
+        """
+        self.errors += 1
+        self.interval = min(self.max_delay, self.interval * self.error_backoff)
+
+    def next_delay(self) -> float:
+        """
+        :return: задержка до следующего запроса (с учетом разброса).
+        """
+        delay = self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        return min(self.max_delay, max(self.min_delay, delay))
+
+    def stats(self) -> dict:
+        """
+        :return: текущее состояние планировщика (для мониторинга).
+        """
+        return {
+            "interval": self.interval,
+            "hits": self.hits,
+            "idle": self.idle,
+            "errors": self.errors
+        }
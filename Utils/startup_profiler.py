@@ -0,0 +1,177 @@
+"""
+В данном модуле написан профилировщик запуска Кардинала (режим --profile-startup): время импорта каждого модуля и
+время каждого этапа инициализации.
+"""
+
+
+import sys
+import time
+import logging
+from contextlib import contextmanager
+from importlib.abc import MetaPathFinder
+
+
+logger = logging.getLogger("Cardinal.startup")
+
+
+class _ImportTimer(MetaPathFinder):
+    """
+    Finder, замеряющий время выполнения (импорта) модулей. Сам модули не ищет: находит спецификацию модуля с
+    помощью остальных finder'ов из sys.meta_path и оборачивает exec_module() ее загрузчика.
+    """
+    def __init__(self, profiler: "StartupProfiler"):
+        self.profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            loader = spec.loader
+            if loader is not None and hasattr(loader, "exec_module") and \
+                    not getattr(loader, "_startup_profiler_wrapped", False):
+                spec.loader = _TimedLoader(loader, self.profiler)
+            return spec
+        return None
+
+
+class _TimedLoader:
+    """
+    Обертка загрузчика модуля, замеряющая время выполнения модуля.
+    """
+    _startup_profiler_wrapped = True
+
+    def __init__(self, loader, profiler: "StartupProfiler"):
+        self.loader = loader
+        self.profiler = profiler
+
+    def __getattr__(self, item):
+        return getattr(self.loader, item)
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        with self.profiler.measure_import(module.__name__):
+            self.loader.exec_module(module)
+
+
+class StartupProfiler:
+    """
+    Профилировщик запуска. Для каждого модуля считает собственное время импорта (без вложенных импортов) и общее
+    (с вложенными), как python -X importtime; для этапов инициализации - время выполнения.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        # {модуль: [собственное время, общее время]}
+        self.imports: dict[str, list[float]] = {}
+        # [(этап, время)]
+        self.stages: list[tuple[str, float]] = []
+        # Стек импортируемых модулей: [время вложенных импортов].
+        self.stack: list[float] = []
+        self.finder: _ImportTimer | None = None
+
+    def install(self) -> None:
+        """
+        Начинает замер времени импорта модулей.
+        """
+        if self.finder is None:
+            self.finder = _ImportTimer(self)
+            sys.meta_path.insert(0, self.finder)
+
+    def uninstall(self) -> None:
+        """
+        Прекращает замер времени импорта модулей.
+        """
+        if self.finder is not None and self.finder in sys.meta_path:
+            sys.meta_path.remove(self.finder)
+        self.finder = None
+
+    @contextmanager
+    def measure_import(self, name: str):
+        """
+        Замеряет время импорта модуля name.
+        """
+        self.stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            total = time.perf_counter() - start
+            nested = self.stack.pop()
+            if self.stack:
+                self.stack[-1] += total
+            self.imports[name] = [total - nested, total]
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Замеряет время выполнения этапа инициализации name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    def report(self, top: int = 15) -> str:
+        """
+        :param top: кол-во самых медленных модулей в отчете.
+        :return: текст отчета.
+        """
+        total_imports = sum(i[0] for i in self.imports.values())
+        text = f"Запуск занял {time.perf_counter() - self.started:.3f} сек., из них импорт " \
+               f"{len(self.imports)} модулей - {total_imports:.3f} сек.\n"
+        text += "Самые медленные модули (собственное / общее время, мс):\n"
+        slowest = sorted(self.imports.items(), key=lambda i: i[1][0], reverse=True)[:top]
+        for name, (own, total) in slowest:
+            text += f"    {name}: {own * 1000:.1f} / {total * 1000:.1f}\n"
+        if self.stages:
+            text += "Этапы инициализации (мс):\n"
+            for name, duration in self.stages:
+                text += f"    {name}: {duration * 1000:.1f}\n"
+        return text.rstrip()
+
+
+# Профилировщик запуска. Создается в main.py, если указан флаг --profile-startup.
+PROFILER: StartupProfiler | None = None
+
+
+def start() -> StartupProfiler:
+    """
+    Создает профилировщик запуска (PROFILER) и начинает замер времени импорта модулей.
+
+    :return: профилировщик.
+    """
+    global PROFILER
+    if PROFILER is None:
+        PROFILER = StartupProfiler()
+        PROFILER.install()
+    return PROFILER
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Замеряет время выполнения этапа инициализации (если профилировщик запуска создан).
+
+    :param name: название этапа.
+    """
+    if PROFILER is None:
+        yield
+        return
+    with PROFILER.stage(name):
+        yield
+
+
+def finish() -> None:
+    """
+    Прекращает замер и выводит отчет профилировщика запуска в лог (если профилировщик запуска создан).
+    """
+    if PROFILER is None:
+        return
+    PROFILER.uninstall()
+    for line in PROFILER.report().split("\n"):
+        logger.info(line)
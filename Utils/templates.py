@@ -0,0 +1,131 @@
+"""
+В данном модуле написан шаблонизатор текстов из конфигов (ответы на команды, тексты выдачи товара).
+"""
+
+
+import re
+from functools import lru_cache
+from datetime import datetime
+from threading import Lock
+from typing import Callable
+
+import FunPayAPI.runner
+import FunPayAPI.orders
+
+
+class TemplateContext:
+    """
+    Данные, доступные переменным при подстановке в шаблон.
+    Текущее время вычисляется 1 раз за подстановку и только если оно нужно какой-либо переменной.
+    """
+    def __init__(self, msg: FunPayAPI.runner.MessageEvent | None = None,
+                 order: FunPayAPI.orders.Order | None = None, **extra):
+        """
+        :param msg: экземпляр MessageEvent (для ответов на сообщения).
+        :param order: экземпляр Order (для выдачи товара).
+        :param extra: дополнительные данные (например, product - текст товара).
+        """
+        self.msg = msg
+        self.order = order
+        self.extra = extra
+        self.__now: datetime | None = None
+
+    @property
+    def now(self) -> datetime:
+        if self.__now is None:
+            self.__now = datetime.now()
+        return self.__now
+
+
+# Переменные: {"$название": функция(TemplateContext) -> значение}.
+# Если функция возвращает None, переменная остается в тексте как есть.
+VARIABLES: dict[str, Callable[[TemplateContext], str | None]] = {}
+# Сколько скомпилированных шаблонов хранить в кэше (см. compile_template). Тексты шаблонов могут приходить не только
+# из конфигов (например, из плагинов), поэтому кэш ограничен: давно не используемые шаблоны вытесняются.
+COMPILED_LIMIT = 512
+LOCK = Lock()
+VARIABLES_RE: re.Pattern | None = None
+
+
+class Template:
+    """
+    Скомпилированный шаблон: список сегментов (обычный текст или название переменной).
+    """
+    def __init__(self, text: str, pattern: re.Pattern | None):
+        """
+        :param text: текст шаблона.
+        :param pattern: регулярное выражение, находящее названия переменных.
+        """
+        # [(является ли сегмент переменной, текст сегмента / название переменной)]
+        self.segments: list[tuple[bool, str]] = []
+        position = 0
+        if pattern is not None:
+            for match in pattern.finditer(text):
+                if match.start() > position:
+                    self.segments.append((False, text[position:match.start()]))
+                self.segments.append((True, match.group()))
+                position = match.end()
+        if position < len(text):
+            self.segments.append((False, text[position:]))
+
+    def render(self, context: TemplateContext) -> str:
+        """
+        Подставляет значения переменных.
+
+        :param context: данные, доступные переменным.
+        :return: готовый текст.
+        """
+        result = []
+        for is_variable, value in self.segments:
+            if is_variable:
+                func = VARIABLES.get(value)
+                variable_value = func(context) if func is not None else None
+                result.append(value if variable_value is None else str(variable_value))
+            else:
+                result.append(value)
+        return "".join(result)
+
+
+def register_variable(name: str, func: Callable[[TemplateContext], str | None]) -> None:
+    """
+    Регистрирует переменную (в том числе из плагинов). Значение переменной вычисляется только если она есть в тексте.
+
+    :param name: название переменной (начинается с "$", например "$balance").
+    :param func: функция, получающая экземпляр TemplateContext и возвращающая значение переменной
+    (или None, если переменная недоступна в данном контексте).
+    """
+    global VARIABLES_RE
+    with LOCK:
+        VARIABLES[name] = func
+        # Более длинные названия проверяются первыми ($date_text раньше $date).
+        names = sorted(VARIABLES, key=len, reverse=True)
+        VARIABLES_RE = re.compile("|".join(re.escape(i) for i in names))
+        _compile.cache_clear()
+
+
+@lru_cache(maxsize=COMPILED_LIMIT)
+def _compile(text: str, pattern: re.Pattern | None) -> Template:
+    # Регулярное выражение входит в ключ кэша: шаблон, скомпилированный до регистрации новой переменной, не будет
+    # использован после нее.
+    return Template(text, pattern)
+
+
+def compile_template(text: str) -> Template:
+    """
+    Компилирует шаблон (или берет уже скомпилированный из кэша, хранящего COMPILED_LIMIT последних шаблонов).
+
+    :param text: текст шаблона.
+    :return: экземпляр Template.
+    """
+    return _compile(text, VARIABLES_RE)
+
+
+def render(text: str, context: TemplateContext) -> str:
+    """
+    Подставляет значения переменных в текст.
+
+    :param text: текст шаблона.
+    :param context: данные, доступные переменным.
+    :return: готовый текст.
+    """
+    return compile_template(text).render(context)
@@ -0,0 +1,77 @@
+"""
+Бенчмарк логирования (Utils.logger): сколько записей в секунду может записать поток, вызывающий logger.info(),
+при синхронной записи в файл (TimedRotatingFileHandler) и при записи в фоновом потоке (AsyncFileHandler), в
+текстовом формате и в формате JSON.
+
+С --slow-disk МКС каждая запись в файл дополнительно занимает указанное время (имитация медленного диска).
+
+Запуск: python benchmarks/bench_logging.py [--records N] [--slow-disk МКС]
+"""
+
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import logging.handlers
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Utils.logger import AsyncFileHandler, FileLoggerFormatter, JSONLoggerFormatter
+
+
+def run(handler: logging.Handler, formatter: logging.Formatter, records: int) -> tuple[float, float]:
+    """
+    :return: (записей в секунду для вызывающего потока, записей в секунду с учетом дописывания файла).
+    """
+    handler.setFormatter(formatter)
+    logger = logging.getLogger("Cardinal.benchmark")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    start = time.perf_counter()
+    for i in range(records):
+        logger.info(f"Отправил сообщение в чат $YELLOW{i}$color.", extra={"node_id": i})
+    caller = time.perf_counter() - start
+    handler.close()
+    total = time.perf_counter() - start
+    logger.handlers = []
+    return records / caller, records / total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=20000, help="кол-во записей")
+    parser.add_argument("--slow-disk", type=float, default=0, metavar="МКС",
+                        help="дополнительное время записи каждой строки в файл (в микросекундах)")
+    args = parser.parse_args()
+
+    if args.slow_disk:
+        emit = logging.handlers.TimedRotatingFileHandler.emit
+
+        def slow_emit(self, record):
+            start = time.perf_counter()
+            while time.perf_counter() - start < args.slow_disk / 1e6:
+                pass
+            emit(self, record)
+
+        logging.handlers.TimedRotatingFileHandler.emit = slow_emit
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "log.log")
+        cases = [
+            ("синхронно, текст", lambda: logging.handlers.TimedRotatingFileHandler(path, "midnight", encoding="utf-8"),
+             FileLoggerFormatter),
+            ("в фоне, текст", lambda: AsyncFileHandler(path, "midnight", encoding="utf-8"), FileLoggerFormatter),
+            ("в фоне, JSON", lambda: AsyncFileHandler(path, "midnight", encoding="utf-8"), JSONLoggerFormatter),
+        ]
+        for name, handler, formatter in cases:
+            caller, total = run(handler(), formatter(), args.records)
+            print(f"{name:18}: {caller:8.0f} записей/с в вызывающем потоке, {total:8.0f} записей/с с записью файла")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Бенчмарк поиска лота авто-выдачи по названию ордера (Utils.lot_matcher.LotMatcher): линейный перебор названий
+лотов против автомата Ахо-Корасик. Заодно проверяет, что оба способа находят один и тот же (самый длинный) лот.
+
+Запуск: python benchmarks/bench_lot_matcher.py [--lots 100 1000 10000] [--titles N]
+"""
+
+
+import os
+import sys
+import time
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Utils.lot_matcher import LotMatcher
+
+
+WORDS = ["Аккаунт", "Steam", "ключ", "Genshin", "Impact", "золото", "500", "1000", "✅", "АВТОВЫДАЧА", "без",
+         "привязок", "Premium", "месяц", "Discord", "Nitro", "Robux", "скин", "кейс"]
+
+
+def random_name() -> str:
+    return " ".join(random.choice(WORDS) for _ in range(random.randint(3, 7))) + f" #{random.randint(0, 10 ** 6)}"
+
+
+def linear_match(lots: list[str], title: str) -> str | None:
+    """
+    Старый способ: самое длинное из названий лотов, входящих в название ордера (при равной длине - первое).
+    """
+    candidates = [(-len(name), index) for index, name in enumerate(lots) if name in title]
+    return lots[min(candidates)[1]] if candidates else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lots", type=int, nargs="+", default=[100, 1000, 10000], help="кол-во лотов в конфиге")
+    parser.add_argument("--titles", type=int, default=2000, help="кол-во названий ордеров")
+    args = parser.parse_args()
+    random.seed(1)
+
+    for n in args.lots:
+        lots = [random_name() for _ in range(n)]
+        titles = [random.choice(lots) + ", " + random_name() if random.random() < 0.7 else random_name()
+                  for _ in range(args.titles)]
+        start = time.perf_counter()
+        matcher = LotMatcher(lots)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = [linear_match(lots, i) for i in titles]
+        linear = len(titles) / (time.perf_counter() - start)
+        start = time.perf_counter()
+        result = [matcher.match(i) for i in titles]
+        automaton = len(titles) / (time.perf_counter() - start)
+        assert result == expected, "результаты линейного поиска и автомата различаются"
+        print(f"{n:>6} лотов: перебор {linear:9.0f} поисков/с | автомат {automaton:9.0f} поисков/с | "
+              f"построение {build * 1000:.0f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Бенчмарк парсеров HTML (FunPayAPI.parsers): время парсинга и пиковое потребление памяти (RSS) бэкендов lxml и bs4
+на больших синтетических страницах FunPay.
+
+Каждый замер выполняется в отдельном процессе, чтобы пиковый RSS одного бэкенда не влиял на другой.
+Пиковый RSS доступен только на Linux / macOS (модуль resource).
+
+Запуск: python benchmarks/bench_parsers.py [--runs N]
+"""
+
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def orders_page(n: int) -> str:
+    """
+    :param n: кол-во ордеров.
+    :return: страница продаж с n ордерами.
+    """
+    items = []
+    for i in range(n):
+        cls = ("tc-item info", "tc-item", "tc-item warning")[i % 3]
+        order_id = f"#{0x10000000 + n - i:08X}"
+        items.append(f'<a href="https://funpay.com/orders/{order_id[1:]}/" class="{cls}">'
+                     f'<div class="tc-date"><div class="tc-date-time">сегодня, 12:{i % 60:02d}</div></div>'
+                     f'<div class="tc-order">{order_id}</div>'
+                     f'<div class="order-desc"><div>Лот номер {i} ✅ АВТОВЫДАЧА</div>'
+                     f'<div class="text-muted">Игра, Аккаунты</div></div>'
+                     f'<div class="tc-user"><div class="media media-user offline"><div class="media-body">'
+                     f'<div class="media-user-name"><span class="pseudo-a" '
+                     f'data-href="https://funpay.com/users/{5000 + i}/">buyer{i}</span></div></div></div></div>'
+                     f'<div class="tc-status text-primary">Оплачен</div>'
+                     f'<div class="tc-price text-nowrap tc-seller-sum">{10 + i % 50}.5 <span class="unit">₽</span>'
+                     f'</div></a>')
+    app_data = json.dumps({"userId": 1, "csrf-token": "token", "locale": "ru"})
+    return f"<html><body data-app-data='{app_data}'><div class=\"user-link-name\">seller</div>" \
+           f"<div class=\"tc table-hover\">{''.join(items)}</div></body></html>"
+
+
+def user_page(categories: int, lots: int) -> str:
+    """
+    :param categories: кол-во категорий.
+    :param lots: кол-во лотов в каждой категории.
+    :return: публичная страница пользователя.
+    """
+    result = []
+    for c in range(categories):
+        link = f"https://funpay.com/{'chips' if c % 5 == 4 else 'lots'}/{100 + c}/"
+        items = "".join(f'<a href="https://funpay.com/lots/offer?id={c * 1000 + i}" class="tc-item">'
+                        f'<div class="tc-server hidden-xxs">Сервер {i}</div>'
+                        f'<div class="tc-desc"><div class="tc-desc-text">Лот {c}-{i}</div></div>'
+                        f'<div class="tc-price" data-s="{i + 1}.00"><div>{i + 1} <span class="unit">₽</span></div>'
+                        f'</div></a>' for i in range(lots))
+        result.append(f'<div class="offer"><div class="offer-list-title-container"><div class="offer-list-title">'
+                      f'<h3><a href="{link}">Категория {c}</a></h3></div></div>'
+                      f'<div class="tc table-hover table-clickable">{items}</div></div>')
+    return f"<html><body><div class=\"user-link-name\">seller</div>{''.join(result)}</body></html>"
+
+
+def chat_bookmarks(n: int) -> str:
+    """
+    :param n: кол-во чатов.
+    :return: HTML список чатов.
+    """
+    items = "".join(f'<a href="https://funpay.com/chat/?node={1000 + i}" class="contact-item" data-id="{1000 + i}">'
+                    f'<div class="media-user-name">user{i}</div>'
+                    f'<div class="contact-item-message">Сообщение номер {i} &lt;/a&gt;</div></a>' for i in range(n))
+    return f'<div class="contact-list custom-scroll">{items}</div>'
+
+
+# (файл, метод парсера, аргументы метода, функция генерации страницы)
+CASES = [
+    ("orders_50.html", "parse_orders_page", (True, True, True), lambda: orders_page(50)),
+    ("orders_5000.html", "parse_orders_page", (True, True, True), lambda: orders_page(5000)),
+    ("user_200x10.html", "parse_user_lots_page", (True, ), lambda: user_page(200, 10)),
+    ("bookmarks_300.html", "parse_chat_bookmarks", (), lambda: chat_bookmarks(300)),
+]
+
+
+def measure(backend: str, path: str, method: str, runs: int) -> None:
+    """
+    Замеряет время парсинга (в текущем процессе) и выводит результат в формате JSON.
+    """
+    from FunPayAPI import parsers
+    with open(path, "r", encoding="utf-8") as f:
+        html = f.read()
+    args = next(i[2] for i in CASES if i[1] == method)
+    func = getattr(parsers.PARSERS[backend](), method)
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = func(html, *args)
+    elapsed = (time.perf_counter() - start) / runs
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+    # ru_maxrss - в КБ на Linux и в байтах на macOS.
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    items = len(result) if isinstance(result, list) else len(result["lots"])
+    print(json.dumps({"ms": elapsed * 1000, "rss": (peak - base) / scale if resource else None, "items": items}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="кол-во повторов каждого замера")
+    parser.add_argument("--measure", nargs=3, metavar=("BACKEND", "FILE", "METHOD"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        measure(*args.measure, args.runs)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'страница':20} {'метод':22} {'бэкенд':7} {'время, мс':>10} {'пик RSS, МБ':>12} {'объектов':>9}")
+        for name, method, _, generate in CASES:
+            path = os.path.join(directory, name)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(generate())
+            for backend in ("bs4", "lxml"):
+                output = subprocess.run([sys.executable, os.path.abspath(__file__), "--runs", str(args.runs),
+                                         "--measure", backend, path, method],
+                                        check=True, capture_output=True, text=True).stdout
+                result = json.loads(output.strip().split("\n")[-1])
+                rss = f"{result['rss']:.1f}" if result["rss"] is not None else "н/д"
+                print(f"{name:20} {method:22} {backend:7} {result['ms']:10.2f} {rss:>12} {result['items']:9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Бенчмарк хранилища товаров (Utils.products_store.ProductsStore): выдача товара из файла с n товарами старым
+способом (чтение и перезапись всего файла на каждый товар) и через хранилище (резерв + подтверждение), а также
+время импорта и экспорта файла.
+
+Запуск: python benchmarks/bench_products.py [--sizes 1000 100000 1000000]
+"""
+
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Utils.products_store import ProductsStore
+
+
+def old_get_product(path: str) -> tuple[str, int]:
+    """
+    Старый способ выдачи товара: файл читается и перезаписывается целиком.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        products = [i for i in f.read().split("\n") if i]
+    product = products.pop(0)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(products))
+    return product, len(products)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100_000, 1_000_000],
+                        help="кол-во товаров в файле")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for n in args.sizes:
+            path = os.path.join(directory, f"products_{n}.txt")
+            data = "\n".join(f"KEY-{i:08d}-ABCDEFGH" for i in range(n))
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(data)
+            operations = min(200 if n < 1_000_000 else 20, n)
+            start = time.perf_counter()
+            for _ in range(operations):
+                old_get_product(path)
+            old = operations / (time.perf_counter() - start)
+
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(data)
+            store = ProductsStore(os.path.join(directory, f"products_{n}.db"), export_delay=3600)
+            start = time.perf_counter()
+            store.count(path)
+            imported = time.perf_counter() - start
+            operations = min(2000, n // 2)
+            start = time.perf_counter()
+            for _ in range(operations):
+                reservation_id, _, _ = store.reserve(path)
+                store.commit(reservation_id)
+            new = operations / (time.perf_counter() - start)
+            start = time.perf_counter()
+            store.flush()
+            exported = time.perf_counter() - start
+            store.connection.close()
+            print(f"{n:>9} товаров: файл {old:8.0f} товаров/с | хранилище {new:8.0f} товаров/с | "
+                  f"импорт {imported * 1000:.0f} мс | экспорт {exported * 1000:.0f} мс")
+
+
+if __name__ == "__main__":
+    main()
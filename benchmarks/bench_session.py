@@ -0,0 +1,87 @@
+"""
+Бенчмарк HTTP-сессии (FunPayAPI.session.FunPaySession): пропускная способность и задержка запросов к локальному
+серверу через requests.post() (новое соединение на каждый запрос) и через общую keep-alive сессию.
+
+По умолчанию сервер работает по HTTP. С --tls CERT KEY - по HTTPS (самоподписанный сертификат), что ближе к
+реальному FunPay: без пула соединений каждый запрос выполняет TLS-рукопожатие.
+
+Запуск: python benchmarks/bench_session.py [--requests N] [--tls CERT KEY]
+"""
+
+
+import os
+import sys
+import ssl
+import time
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import requests
+import urllib3
+
+from FunPayAPI.session import FunPaySession
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Заголовки и тело ответа отправляются отдельно: без TCP_NODELAY keep-alive соединение упирается в delayed ACK.
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = b'{"objects": []}'
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(func, n: int) -> tuple[float, float, float]:
+    """
+    :return: (запросов в секунду, медианная задержка (мс), 99-й перцентиль задержки (мс)).
+    """
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(n):
+        request_start = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - request_start) * 1000)
+    total = time.perf_counter() - start
+    latencies.sort()
+    return n / total, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="кол-во запросов в каждом замере")
+    parser.add_argument("--tls", nargs=2, metavar=("CERT", "KEY"), help="сертификат и ключ для HTTPS")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    scheme = "http"
+    if args.tls:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(*args.tls)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme = "https"
+        urllib3.disable_warnings()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"{scheme}://127.0.0.1:{server.server_port}/runner/"
+
+    before = run(lambda: requests.post(url, data={"request": False}, verify=False), args.requests)
+    session = FunPaySession("golden_key", "session_id")
+    after = run(lambda: session.post(url, data={"request": False}, verify=False), args.requests)
+    print("requests.post:  %6.0f запросов/с, p50 %.2f мс, p99 %.2f мс" % before)
+    print("FunPaySession:  %6.0f запросов/с, p50 %.2f мс, p99 %.2f мс" % after)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Бенчмарк форматирования шаблонов (Utils.templates): старая подстановка переменных через str.replace() для каждой
+переменной против скомпилированного шаблона. Проверяет, что результаты совпадают.
+
+Запуск: python benchmarks/bench_templates.py
+"""
+
+
+import os
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from FunPayAPI.enums import OrderStatuses
+from FunPayAPI.orders import Order
+from Utils import cardinal_tools
+
+
+def old_format_order_text(text: str, order: Order, product: str) -> str:
+    """
+    Старый способ форматирования: str.replace() для каждой переменной (даты вычисляются всегда).
+    """
+    date_obj = datetime.now()
+    month_name = cardinal_tools.get_month_name(date_obj.month)
+    date = date_obj.strftime("%d.%m.%Y")
+    str_date = f"{date_obj.day} {month_name}"
+    variables = {
+        "$full_date_text": f"{str_date} {date_obj.year} года",
+        "$date_text": str_date,
+        "$date": date,
+        "$time": date_obj.strftime("%H:%M"),
+        "$full_time": date_obj.strftime("%H:%M:%S"),
+        "$username": order.buyer_name,
+        "$order_name": order.title
+    }
+    for var in variables:
+        text = text.replace(var, variables[var])
+    return text.replace("$product", product)
+
+
+def measure(func, n: int) -> float:
+    """
+    :return: среднее время выполнения func (в микросекундах).
+    """
+    start = time.perf_counter()
+    for _ in range(n):
+        func()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main() -> None:
+    order = Order("#A1B2C3D4", "Лот", 1, "buyer", 1, OrderStatuses.OUTSTANDING)
+    template = "👋Привет, $username! Спасибо за покупку ($order_name, $date)!\n✔️Вот твой товар:\n$product\n\n" \
+               "Не забудь подтвердить заказ!"
+    for size in (100, 10_000, 1_000_000):
+        product = ("X" * 63 + "\n") * (size // 64 or 1)
+        assert old_format_order_text(template, order, product) == \
+            cardinal_tools.format_order_text(template, order, product=product)
+        n = 20000 if size < 1_000_000 else 200
+        old = measure(lambda: old_format_order_text(template, order, product), n)
+        new = measure(lambda: cardinal_tools.format_order_text(template, order, product=product), n)
+        print(f"товар {size:>8} Б: str.replace {old:9.1f} мкс | шаблон {new:9.1f} мкс")
+
+    big_template = "Строка шаблона $username без дат. " * 3000
+    old = measure(lambda: old_format_order_text(big_template, order, ""), 500)
+    new = measure(lambda: cardinal_tools.format_order_text(big_template, order, product=""), 500)
+    print(f"шаблон 100 КБ:    str.replace {old:9.1f} мкс | шаблон {new:9.1f} мкс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import sys, math; sys.path.insert(0,'/root/package')
+from Utils.raise_cooldowns import RaiseCooldowns
+from FunPayAPI.other import parse_wait_time as pw
+def msg(rem):
+    if rem >= 3600: return f"Подождите {math.ceil(rem/3600)} часа."
+    if rem >= 60: return f"Подождите {math.ceil(rem/60)} минут."
+    return f"Подождите {math.ceil(rem)} секунд."
+def old_wait(m):
+    r=m.split()
+    if "сек" in m: return int(r[1])
+    if "мин" in m: return (int(r[1])-1)*60
+    if "час" in m: return 3600
+    return 10
+def sim(cooldown, learned, cycles=24, latency=0.5):
+    m=RaiseCooldowns(path="/tmp/bench/x.json"); t=0.0; last=-1e9; raises=0; req=0; lag=0.0
+    while raises<cycles:
+        req+=1; t+=latency
+        if t-last>=cooldown:
+            if raises: lag += t-last-cooldown
+            last=t; raises+=1
+            nt = m.on_success(1,t) if learned else t+3600
+        else:
+            w=msg(cooldown-(t-last))
+            nt = m.on_wait(1,t,*pw(w)) if learned else t+max(old_wait(w),0)
+        t=max(nt,t)
+    return req-cycles, lag/(cycles-1)
+for cd in (3600, 4*3600, 2*3600+1234, 5400):
+    print(cd, "old wasted/avg lag", sim(cd,False), "new", sim(cd,True))
@@ -0,0 +1,19 @@
+import sys, time
+sys.path.insert(0, "/root/package")
+from FunPayAPI import parsers
+html = open("/tmp/fx/orders_5000.html", encoding="utf-8").read()
+all_orders = parsers.parse_orders_page(html, include_completed=True, include_refund=True)
+ids = [o.id for o in all_orders]
+known_list = ids[3:]
+known = {i: None for i in known_list}
+def t(f, n=5):
+    s = time.perf_counter()
+    for _ in range(n): r = f()
+    return (time.perf_counter() - s) / n * 1000, r
+a, ra = t(lambda: parsers.parse_orders_page(html, True, True, False, list(known_list)))
+b, rb = t(lambda: parsers.parse_orders_page(html, True, True, False, known.keys(), known.keys()))
+print(f"full+list exclude {a:.1f} ms ({len(ra)}), stop_at {b:.1f} ms ({len(rb)})")
+assert [o.id for o in ra] == [o.id for o in rb]
+parsers.set_parser("bs4")
+rc = parsers.parse_orders_page(html, True, True, False, known.keys(), known.keys())
+assert [o.id for o in rc] == [o.id for o in rb]
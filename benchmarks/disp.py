@@ -0,0 +1,21 @@
+import sys, time, threading
+sys.path.insert(0, "/root/package")
+from Utils.dispatcher import EventDispatcher
+log = []
+lock = threading.Lock()
+def handler(chat, i):
+    time.sleep(0.2 if chat == 0 else 0.02)  # chat 0 - "медленная выдача"
+    with lock: log.append((chat, i))
+events = [(c, i) for i in range(5) for c in range(20)]
+t = time.time()
+for e in events: handler(*e)
+serial = time.time() - t
+log.clear()
+d = EventDispatcher(workers=4, queue_size=10); d.start()
+t = time.time()
+for c, i in events: d.submit(c, handler, c, i)
+while d.stats()["processed"] < len(events): time.sleep(0.005)
+par = time.time() - t
+for c in range(20):
+    assert [i for cc, i in log if cc == c] == list(range(5))
+print(f"serial {serial:.2f}s, dispatcher(4) {par:.2f}s", d.stats())
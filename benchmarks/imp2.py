@@ -0,0 +1,7 @@
+import subprocess, statistics, sys
+res = []
+for i in range(30):
+    out = subprocess.run([sys.executable, "-c", "import time; t=time.perf_counter(); import cardinal; print(time.perf_counter()-t)"],
+                         capture_output=True, text=True, cwd="/root/package").stdout
+    res.append(float(out))
+print(f"median {statistics.median(res)*1000:.1f} ms, min {min(res)*1000:.1f} ms")
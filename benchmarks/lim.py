@@ -0,0 +1,47 @@
+import sys, time, threading, collections
+sys.path.insert(0,'/root/package')
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from FunPayAPI.enums import Links
+from FunPayAPI.session import FunPaySession
+from FunPayAPI.limiter import RequestLimiter
+LIMIT=5; hits=collections.deque(); lock=threading.Lock(); throttled=[0]
+class H(BaseHTTPRequestHandler):
+    def log_message(self,*a): pass
+    def handle_req(self):
+        n=int(self.headers.get('content-length') or 0); self.rfile.read(n)
+        with lock:
+            now=time.monotonic()
+            # server-side token bucket: 5 rps, burst 10
+            if not hits: hits.append([10.0, now])
+            b=hits[0]; b[0]=min(10.0, b[0]+(now-b[1])*LIMIT); b[1]=now
+            ok=b[0]>=1
+            if ok: b[0]-=1
+            else: throttled[0]+=1
+        self.send_response(200 if ok else 429); self.send_header('content-length','2'); self.end_headers(); self.wfile.write(b'{}')
+    do_GET=do_POST=handle_req
+srv=ThreadingHTTPServer(('127.0.0.1',0),H); threading.Thread(target=srv.serve_forever,daemon=True).start()
+base=f"http://127.0.0.1:{srv.server_port}"
+Links.BASE_URL=base; Links.RUNNER=base+"/runner/"; Links.RAISE=base+"/lots/raise"; Links.ORDERS=base+"/orders/trade"
+def run(limiter):
+    throttled[0]=0; hits.clear()
+    s=FunPaySession(pool_size=50, limiter=limiter); waits=collections.defaultdict(list)
+    def req(kind):
+        t=time.monotonic()
+        if kind=="edit": r=s.get(base+"/lots/offerEdit?x=1")
+        elif kind=="send": r=s.post(Links.RUNNER, data={"request":"x"})
+        else: r=s.post(Links.RUNNER, data={"request":False})
+        waits[kind].append((time.monotonic()-t, r.status_code))
+    ths=[threading.Thread(target=req,args=("edit",)) for _ in range(20)]
+    for t in ths: t.start()
+    time.sleep(0.05)
+    more=[threading.Thread(target=req,args=(k,)) for k in ["send"]*5+["runner"]*3]
+    for t in more: t.start()
+    for t in ths+more: t.join()
+    for k,v in waits.items():
+        print(f"  {k:6} n={len(v)} 429={sum(c==429 for _,c in v)} avg={sum(w for w,_ in v)/len(v)*1000:.0f}ms max={max(w for w,_ in v)*1000:.0f}ms")
+    if limiter: print("  stats", {k:v for k,v in limiter.stats()["types"].items() if v["requests"]})
+print("no limiter"); run(None)
+time.sleep(1.2)
+print("limiter 5 rps burst 10"); run(RequestLimiter(5,10))
+time.sleep(1.2)
+print("limiter 5 rps burst 10, no per-class limits"); run(RequestLimiter(5,10,type_rates={}))
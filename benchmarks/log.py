@@ -0,0 +1,26 @@
+import sys, io, time, logging, logging.config, copy, tempfile, os
+sys.path.insert(0, "/root/package"); sys.path.insert(0, "/tmp/bench/old")
+import oldlogger
+from Utils import logger as newlogger
+
+def run(cfg, name, n=20000):
+    d = tempfile.mkdtemp()
+    cfg = copy.deepcopy(cfg)
+    cfg["handlers"]["file_handler"]["filename"] = os.path.join(d, "log.log")
+    cfg["handlers"]["cli_handler"]["stream"] = "ext://__main__.NULL"
+    logging.config.dictConfig(cfg)
+    log = logging.getLogger("Cardinal.bench")
+    t = time.perf_counter()
+    for i in range(n):
+        log.info(f"Отправил сообщение в чат $YELLOW{i}$color.", extra={"node_id": i})
+    el = time.perf_counter() - t
+    for h in logging.getLogger("Cardinal").handlers:
+        if hasattr(h, "listener"): h.close()
+        h.flush()
+    tot = time.perf_counter() - t
+    print(f"{name}: caller {n/el:.0f} rec/s, incl. flush {n/tot:.0f} rec/s")
+
+NULL = io.StringIO()
+run(oldlogger.CONFIG, "old")
+run(newlogger.get_config(), "new")
+run(newlogger.get_config(json_logs=True), "new json")
@@ -0,0 +1,8 @@
+import time, logging.handlers
+orig = logging.handlers.TimedRotatingFileHandler.emit
+def slow(self, r):
+    t = time.perf_counter()
+    while time.perf_counter() - t < 5e-5: pass
+    orig(self, r)
+logging.handlers.TimedRotatingFileHandler.emit = slow
+exec(open("/tmp/bench/log.py").read().replace("n=20000", "n=5000"))
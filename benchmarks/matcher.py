@@ -0,0 +1,26 @@
+import sys, time, random
+sys.path.insert(0, "/root/package")
+from Utils.lot_matcher import LotMatcher
+random.seed(1)
+words = ["Аккаунт", "МайнШрафт", "Steam", "ключ", "Genshin", "Impact", "золото", "500", "1000", "✅", "АВТОВЫДАЧА",
+         "без", "привязок", "Premium", "месяц", "Discord", "Nitro", "Robux", "скин", "кейс"]
+def name(): return " ".join(random.choice(words) for _ in range(random.randint(3, 7))) + f" #{random.randint(0, 10**6)}"
+for n in (100, 1000, 10000):
+    lots = [name() for _ in range(n)]
+    titles = [random.choice(lots) + ", " + name() if random.random() < .7 else name() for _ in range(2000)]
+    t = time.perf_counter(); m = LotMatcher(lots); build = time.perf_counter() - t
+    t = time.perf_counter()
+    for title in titles:
+        next((l for l in lots if l in title), None)
+    lin = len(titles) / (time.perf_counter() - t)
+    t = time.perf_counter()
+    res = [m.match(title) for title in titles]
+    ac = len(titles) / (time.perf_counter() - t)
+    for title, r in zip(titles, res):
+        cands = [(-len(l), i) for i, l in enumerate(lots) if l in title]
+        assert r == (lots[min(cands)[1]] if cands else None)
+    print(f"{n:>6} lots: linear {lin:9.0f} matches/s | automaton {ac:9.0f} matches/s | build {build*1000:.0f} ms")
+m = LotMatcher(["Аккаунт", "Аккаунт Steam", "Steam"])
+assert m.match("Аккаунт Steam 5 лет") == "Аккаунт Steam" and m.match("Steam ключ") == "Steam"
+assert LotMatcher(["ab", "ba"]).match("xaba") == "ab"
+print("ok")
@@ -0,0 +1,32 @@
+import sys, time, urllib.request
+sys.path.insert(0, "/root/package")
+from Utils.metrics import MetricsRegistry, MetricsServer
+from Utils.dispatcher import EventDispatcher
+from Utils.raise_cooldowns import RaiseCooldowns
+r = MetricsRegistry()
+d = EventDispatcher(2)
+r.add_collector("dispatcher", d.stats)
+rc = RaiseCooldowns("/tmp/bench/rc.json"); rc.on_success(41, time.time())
+r.add_collector("raise_cooldowns", rc.stats)
+r.add_collector("broken", lambda: 1 / 0)
+n = 200000
+t = time.perf_counter()
+for i in range(n):
+    r.observe("handler_seconds", 0.003, handler="handlers.log_msg_handler")
+print(f"observe: {(time.perf_counter() - t) / n * 1e6:.2f} us")
+t = time.perf_counter()
+for i in range(n):
+    r.inc("funpay_requests_total", type="runner", status=200)
+print(f"inc: {(time.perf_counter() - t) / n * 1e6:.2f} us")
+with r.timer("raise_seconds"):
+    time.sleep(0.01)
+s = MetricsServer(r, 0); s.start()
+body = urllib.request.urlopen(f"http://127.0.0.1:{s.server.server_port}/metrics").read().decode()
+print(body)
+try:
+    urllib.request.urlopen(f"http://127.0.0.1:{s.server.server_port}/x")
+except Exception as e: print("404 ok:", e)
+t = time.perf_counter()
+for i in range(100): r.render()
+print(f"render: {(time.perf_counter() - t) * 10:.2f} ms")
+s.stop()
@@ -0,0 +1,39 @@
+import sys, time, threading; sys.path.insert(0,'/root/package')
+from Utils.notifier import TelegramNotifier
+from Utils.telegram_tools import escape_markdown
+from telebot import types
+from telebot.apihelper import ApiTelegramException
+# Fake Telegram: per chat >1 msg/s -> 429 retry_after 1
+last={}; calls=[0]; t429=[0]; lock=threading.Lock()
+class R: pass
+def tg_send(chat, text, markup):
+    with lock:
+        calls[0]+=1; now=time.time()
+        if now-last.get(chat,0)<1:
+            t429[0]+=1; raise ApiTelegramException("sendMessage", R(), {"error_code":429,"description":"Too Many Requests","parameters":{"retry_after":1}})
+        last[chat]=now
+chats=[1,2]
+# old: thread per notification, no pacing
+t=time.time(); ths=[]
+def old(txt):
+    for c in chats:
+        try: tg_send(c, txt, None)
+        except ApiTelegramException: pass
+for i in range(50):
+    th=threading.Thread(target=old,args=(escape_markdown(f"msg {i}."),)); th.start(); ths.append(th)
+for th in ths: th.join()
+print(f"old: threads=50 calls={calls[0]} 429={t429[0]} delivered={calls[0]-t429[0]} of 100")
+last.clear(); calls[0]=0; t429[0]=0
+n=TelegramNotifier(tg_send, lambda: chats, digest_window=1.0); n.start()
+for i in range(50):
+    m=types.InlineKeyboardMarkup(); m.add(types.InlineKeyboardButton(text=f"Ответить u{i}", callback_data=f"r:{i}"))
+    n.enqueue(escape_markdown(f"Новое сообщение {i}."), m, digest_key="new_message")
+n.enqueue("Новый ордер\\!")
+while n.stats()["queued"] or n.stats()["sent"]<51: time.sleep(0.1)
+print(f"new: calls={calls[0]} 429={t429[0]}", n.stats())
+import timeit
+s="Новое сообщение в переписке с пользователем $userlink.\n\n"+"Привет! Как дела? (test) [x] 1.5-2"*10
+def oldesc(t):
+    for c in "_*[]()~`>#+-=|{}.!": t=t.replace(c,"\\"+c)
+    return t
+print("escape old us", timeit.timeit(lambda: oldesc(s), number=10000)*100, "new us", timeit.timeit(lambda: escape_markdown(s), number=10000)*100)
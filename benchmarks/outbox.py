@@ -0,0 +1,29 @@
+import sys, time, threading, random; sys.path.insert(0,'/root/package')
+from Utils.outbox import MessageOutbox
+sent=[]; calls=[0]; lock=threading.Lock()
+def send(node, text, user):
+    with lock: calls[0]+=1
+    time.sleep(0.1)
+    if random.random()<0.2: return False
+    with lock: sent.append((node,text))
+    return True
+random.seed(1)
+# old: blocking loop per message, retry sleep(1), 3 attempts
+def old_send(node,text):
+    for _ in range(3):
+        if send(node,text,None): return True
+        time.sleep(1)
+    return False
+msgs=[(n, f"msg {n}-{i}") for n in range(10) for i in range(3)]
+t=time.time()
+# old: 4 dispatcher workers; each handler blocks on its own send
+from concurrent.futures import ThreadPoolExecutor
+with ThreadPoolExecutor(4) as ex: res=list(ex.map(lambda m: old_send(*m), msgs))
+print(f"old: {time.time()-t:.2f}s requests={calls[0]} delivered={sum(res)}")
+calls[0]=0; sent.clear(); random.seed(1)
+o=MessageOutbox(send, workers=2, delay=1.0); o.start()
+t=time.time(); futs=[o.submit(n,txt) for n,txt in msgs]; sub=time.time()-t
+print("handler time per submit us", sub/len(msgs)*1e6)
+r=[f.result() for f in futs]
+print(f"new: {time.time()-t:.2f}s requests={calls[0]} delivered={sum(r)}", o.stats())
+f1=o.submit(1,"product",key="product:#A"); f2=o.submit(1,"product",key="product:#A"); print("dup same future", f1 is f2, f1.result())
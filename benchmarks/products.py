@@ -0,0 +1,46 @@
+import sys, os, time, json, itertools, glob
+sys.path.insert(0, "/root/package")
+from Utils.products_store import ProductsStore
+
+def old_get_product(path):
+    with open(path, "r", encoding="utf-8") as f:
+        products = f.read()
+    products = products.split("\n")
+    products = list(itertools.filterfalse(lambda el: not el, products))
+    product = str(products[0]); products.pop(0)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(products))
+    return [product, len(products)]
+
+for f in glob.glob("/tmp/bench/ps/*"): os.remove(f)
+for n in (1000, 100_000, 1_000_000):
+    path = f"/tmp/bench/ps/keys_{n}.txt"
+    data = "\n".join(f"KEY-{i:08d}-ABCDEFGH" for i in range(n))
+    open(path, "w").write(data)
+    ops = 200 if n < 1_000_000 else 20
+    t = time.perf_counter()
+    for _ in range(ops): old_get_product(path)
+    old = ops / (time.perf_counter() - t)
+    open(path, "w").write(data)
+    store = ProductsStore(f"/tmp/bench/ps/db_{n}.db", export_delay=3600)
+    t = time.perf_counter(); store.count(path); imp = time.perf_counter() - t
+    ops2 = min(2000, n // 2)
+    t = time.perf_counter()
+    for _ in range(ops2):
+        rid, p, amount = store.reserve(path); store.commit(rid)
+    new = ops2 / (time.perf_counter() - t)
+    t = time.perf_counter(); store.flush(); exp = time.perf_counter() - t
+    left = open(path).read().split("\n")
+    assert left[0] == f"KEY-{ops2:08d}-ABCDEFGH" and len(left) == n - ops2, (left[0], len(left))
+    print(f"{n:>8}: old {old:8.0f} items/s | store {new:8.0f} items/s | import {imp*1000:.0f} ms | export {exp*1000:.0f} ms")
+
+# correctness: rollback keeps position, user edit before export skips sold items
+path = "/tmp/bench/ps/t.json"; json.dump(["a", "b", "c"], open(path, "w"))
+s = ProductsStore("/tmp/bench/ps/t.db", export_delay=3600)
+r1, p1, _ = s.reserve(path); r2, p2, am = s.reserve(path); s.rollback(r1); s.commit(r2)
+assert (p1, p2, am) == ("a", "b", 1), (p1, p2, am)
+time.sleep(0.01); json.dump(["a", "b", "c", "d"], open(path, "w"))  # user added "d" before export
+assert s.count(path) == 3
+s.flush(); assert json.load(open(path)) == ["a", "c", "d"], json.load(open(path))
+r, p, _ = s.reserve(path); s.commit(r); s.flush(); assert json.load(open(path)) == ["c", "d"]
+print("ok")
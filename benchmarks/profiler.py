@@ -0,0 +1,39 @@
+import sys, time, logging, types
+sys.path.insert(0, "/root/package")
+logging.basicConfig(level=logging.WARNING, format="%(message)s")
+import cardinal
+from Utils.handler_profiler import HandlerProfiler
+from Utils.metrics import MetricsRegistry
+
+plugin = types.ModuleType("plugins.slow_plugin")
+exec("""
+import time
+n = [0]
+def slow_handler(event, *args):
+    n[0] += 1
+    if n[0] % 4 == 0:
+        time.sleep(1.5)
+""", plugin.__dict__)
+def fast_handler(event, *args):
+    pass
+
+def run(offload):
+    c = cardinal.Cardinal.__new__(cardinal.Cardinal)
+    c.metrics = MetricsRegistry()
+    c.handler_profiler = HandlerProfiler(c.metrics, profiling=True, slow_threshold=1, offload=offload)
+    c.handler_profiler.start()
+    delays = []
+    t0 = time.perf_counter()
+    for i in range(40):
+        s = time.perf_counter()
+        c.run_handlers([plugin.slow_handler, fast_handler], (i, c))
+        delays.append(time.perf_counter() - s)
+    total = time.perf_counter() - t0
+    c.handler_profiler.stop()
+    print(f"offload={offload}: 40 events in {total:.2f}s, max per-event {max(delays):.2f}s, "
+          f"events delayed >1s: {sum(d > 1 for d in delays)}")
+    print(c.handler_profiler.stats())
+    plugin.n[0] = 0
+
+run(False)
+run(True)
@@ -0,0 +1,23 @@
+import sys, time, logging; sys.path.insert(0,'/root/package')
+from FunPayAPI.lots import Lot
+from FunPayAPI.account import Account
+from Utils.lot_restorer import LotRestorer
+class FakeAcc:
+    build_lot_state_payload = staticmethod(Account.build_lot_state_payload)
+    def __init__(s): s.reqs=0
+    def get_lot_info(s, i, g): s.reqs+=1; time.sleep(0.1); return [{"name":"offer_id","value":str(i)},{"name":"active","value":""}]
+    def save_lot_state(s, f, state=True): s.reqs+=1; time.sleep(0.1); s.build_lot_state_payload(f, state); return {"done": True}
+    def change_lot_state(s, i, g): return s.save_lot_state(s.get_lot_info(i,g))
+lots=[Lot(1,2,i,None,f"lot{i}","1") for i in range(2000)]
+active=lots[20:]
+acc=FakeAcc(); t=time.time()
+ids={i.id for i in active}
+for lot in lots:
+    if lot.id not in ids: acc.change_lot_state(lot.id, lot.game_id)
+print(f"old: {time.time()-t:.2f}s, {acc.reqs} requests")
+r=LotRestorer(); acc=FakeAcc(); r.update(lots)
+t=time.time(); n=r.restore(acc, lots, active); print(f"new cold: {time.time()-t:.2f}s, {acc.reqs} requests, {len(n)} restored")
+acc.reqs=0; t=time.time(); n=r.restore(acc, lots, active); print(f"new warm: {time.time()-t:.2f}s, {acc.reqs} requests")
+import timeit
+L=[l.id for l in active]; print("diff old us", timeit.timeit(lambda: [l for l in lots if l.id not in L], number=100)*1e4,
+ "new us", timeit.timeit(lambda: (lambda S: [l for l in lots if l.id not in S])({i.id for i in active}), number=100)*1e4)
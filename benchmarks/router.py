@@ -0,0 +1,22 @@
+import sys, time, configparser
+sys.path.insert(0, "/root/package")
+from Utils.config_loader import load_auto_response_config
+from Utils.command_router import CommandRouter
+open("/tmp/bench/ar.cfg", "w", encoding="utf-8").write("""
+[!помощь | !help]
+response: help
+[!заказ]
+response: order
+matchMode: prefix
+[!заказ статус]
+response: status
+matchMode: prefix
+[^#\\d+|id\\d+$]
+response: id
+matchMode: regex
+""")
+cfg = load_auto_response_config("/tmp/bench/ar.cfg")
+print(cfg.sections())
+r = CommandRouter(cfg)
+for t in ["  !HELP ", "!Помощь", "!заказ 123", "!заказ статус 5", "#123", "ID42", "привет", "!help me"]:
+    print(repr(t), "->", r.resolve(t))
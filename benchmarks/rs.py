@@ -0,0 +1,8 @@
+import sys,time; sys.path.insert(0,'/root/package')
+from Utils.raise_scheduler import RaiseScheduler
+class C:
+    def __init__(s,g,t): s.game_id=g; s.title=t
+r=RaiseScheduler(); r.set_categories([C(1,'a'),C(1,'b'),C(2,'c'),C(None,'x')])
+print(r.pop_due()); r.schedule(1,time.time()+0.2); r.schedule(2,time.time()+5)
+t=time.time(); r.wait(10); print(round(time.time()-t,2), [g for g,_ in r.pop_due()])
+print(r.upcoming()); r.raise_now(); print([g for g,_ in r.pop_due()])
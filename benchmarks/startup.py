@@ -0,0 +1,33 @@
+import sys, time, os, logging
+os.chdir("/tmp/bench")
+sys.path.insert(0, "/root/package")
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+import configparser
+import FunPayAPI.users
+from FunPayAPI.categories import Category
+from FunPayAPI.lots import Lot
+from FunPayAPI.enums import CategoryTypes
+from cardinal import Cardinal
+import inspect
+print(inspect.signature(Category), inspect.signature(Lot))
+cats = [Category(i, None, f"cat{i}", "", "", CategoryTypes.LOT) for i in range(200)]
+lots = [Lot(i % 200, None, i, None, f"lot{i}", "1") for i in range(5000)]
+FunPayAPI.users.get_user_lots_info = lambda *a, **k: {"categories": cats, "lots": lots}
+class Acc:
+    id = 1; session = None
+    def get_category_game_id(self, cat):
+        time.sleep(0.2)
+        if cat.id == 7 and not getattr(self, "failed", False):
+            self.failed = True; raise TimeoutError
+        return cat.id + 1000
+cfg = configparser.ConfigParser(); cfg.read("/root/package/configs/_main.cfg", encoding="utf-8"); cfg["Other"]["startupRequestsPerSecond"] = "0"
+ar = configparser.ConfigParser(); ad = configparser.ConfigParser()
+c = Cardinal(cfg, ar, ad); c.account = Acc()
+logging.getLogger().setLevel(logging.WARNING)
+t = time.time(); c._Cardinal__init_user_lots_info(); print("parallel:", round(time.time() - t, 2), "s")
+assert all(l.game_id == l.category_id + 1000 for l in lots)
+for x in cats: x.game_id = None
+os.remove("storage/cache/categories.json")
+cfg["Other"]["startupWorkers"] = "1"; cfg["Other"]["startupRequestsPerSecond"] = "0"; Acc.failed = True
+t = time.time(); c._Cardinal__init_user_lots_info(); print("serial (1 worker):", round(time.time() - t, 2), "s")
+t = time.time(); c._Cardinal__init_user_lots_info(); print("cached:", round(time.time() - t, 3), "s")
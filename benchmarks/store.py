@@ -0,0 +1,16 @@
+import sys, time, os
+sys.path.insert(0, "/root/package")
+from Utils.orders_store import OrdersStore
+from FunPayAPI.orders import Order
+from FunPayAPI.enums import OrderStatuses
+p = "/tmp/bench/orders.db"
+for f in (p, p + "-wal", p + "-shm"):
+    if os.path.exists(f): os.remove(f)
+s = OrdersStore(p)
+orders = [Order(f"#A{i:07d}", "Лот", 1.5, "buyer", i, OrderStatuses.COMPLETED) for i in range(100000)]
+t = time.time(); s.add_many(orders); print("add 100k", round(time.time() - t, 3))
+s["#X1"] = Order("#X1", "t", 2, "b", 1, OrderStatuses.OUTSTANDING)
+s.set_delivery_result("#X1", True)
+s.close()
+t = time.time(); s = OrdersStore(p); print("reopen 100k", round((time.time() - t) * 1000, 1), "ms", len(s))
+print(s["#X1"].status, s.is_delivered("#X1"), s.is_delivered("#A0000001"), "#A0000005" in s, s.get("nope"))
@@ -0,0 +1,38 @@
+import sys, time
+sys.path.insert(0, "/root/package")
+from datetime import datetime
+from Utils import cardinal_tools
+from FunPayAPI.orders import Order
+from FunPayAPI.enums import OrderStatuses
+def old(text, order, product):
+    date_obj = datetime.now()
+    month_name = cardinal_tools.get_month_name(date_obj.month)
+    date = date_obj.strftime("%d.%m.%Y"); str_date = f"{date_obj.day} {month_name}"
+    variables = {"$full_date_text": str_date + f" {date_obj.year} года", "$date_text": str_date, "$date": date,
+                 "$time": date_obj.strftime("%H:%M"), "$full_time": date_obj.strftime("%H:%M:%S"),
+                 "$username": order.buyer_name, "$order_name": order.title}
+    for var in variables: text = text.replace(var, variables[var])
+    return text.replace("$product", product)
+order = Order("#A1", "Лот", 1, "buyer", 1, OrderStatuses.OUTSTANDING)
+tpl = "👋Привет, $username! Спасибо за покупку ($order_name, $date)!\n✔️Вот твой товар:\n$product\n\nНе забудь подтвердить заказ!"
+for size in (100, 10_000, 1_000_000):
+    product = ("X" * 63 + "\n") * (size // 64 or 1)
+    tpl_big = tpl * (1 if size < 1_000_000 else 1)
+    assert old(tpl_big, order, product) == cardinal_tools.format_order_text(tpl_big, order, product=product)
+    n = 20000 if size < 1_000_000 else 200
+    t = time.perf_counter()
+    for _ in range(n): old(tpl_big, order, product)
+    a = (time.perf_counter() - t) / n * 1e6
+    t = time.perf_counter()
+    for _ in range(n): cardinal_tools.format_order_text(tpl_big, order, product=product)
+    b = (time.perf_counter() - t) / n * 1e6
+    print(f"product {size:>8} B: old {a:9.1f} us/render | compiled {b:9.1f} us/render")
+big_tpl = ("Строка шаблона $username без дат. " * 3000)
+n = 500
+t = time.perf_counter()
+for _ in range(n): old(big_tpl, order, "")
+a = (time.perf_counter() - t) / n * 1e6
+t = time.perf_counter()
+for _ in range(n): cardinal_tools.format_order_text(big_tpl, order, product="")
+b = (time.perf_counter() - t) / n * 1e6
+print(f"template 100 KB: old {a:.1f} us | compiled {b:.1f} us")
@@ -4,10 +4,11 @@ import time
 import configparser
 import traceback
 import logging
-from typing import Callable, Generator
+from typing import Callable, Generator, TYPE_CHECKING
 import importlib.util
 
 from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
 
 import FunPayAPI.users
 import FunPayAPI.account
@@ -16,15 +17,42 @@ import FunPayAPI.orders
 import FunPayAPI.runner
 import FunPayAPI.lots
 import FunPayAPI.enums
-
-from Utils import cardinal_tools
+import FunPayAPI.other
+import FunPayAPI.limiter
+
+from Utils import cardinal_tools, products_store
+from Utils.runner_scheduler import RunnerScheduler
+from Utils.categories_cache import CategoriesCache
+from Utils.raise_scheduler import RaiseScheduler
+from Utils.raise_cooldowns import RaiseCooldowns
+from Utils.dispatcher import EventDispatcher
+from Utils.orders_store import OrdersStore
+from Utils.lot_matcher import LotMatcher
+from Utils.lot_restorer import LotRestorer
+from Utils.command_router import CommandRouter
+from Utils.outbox import MessageOutbox, MAX_MESSAGE_LENGTH
+from Utils.metrics import MetricsRegistry, MetricsServer
+from Utils.handler_profiler import HandlerProfiler, handler_name
+from Utils import startup_profiler
+import Utils.config_loader as cfg_loader
 import handlers
 
-import telegram
+# telegram (и telebot) импортируется только если Telegram бот включен (см. Cardinal.__init_telegram).
+if TYPE_CHECKING:
+    import telegram
 
 
 logger = logging.getLogger("Cardinal")
 
+# Через сколько секунд повторить поднятие игры, если при его обработке произошла непредвиденная ошибка.
+RAISE_FALLBACK_DELAY = 10 * 60
+# Начальная и максимальная паузы (в секундах) между фоновыми попытками получить ID игры категории, который не
+# удалось получить при запуске.
+UNRESOLVED_RETRY_DELAY = 60
+UNRESOLVED_RETRY_MAX_DELAY = 60 * 60
+# Невыданные ордеры, обработанные не более стольких секунд назад, обрабатываются повторно при запуске.
+UNDELIVERED_MAX_AGE = 24 * 60 * 60
+
 
 class Cardinal:
     def __init__(self,
@@ -38,23 +66,72 @@ class Cardinal:
         self.main_config = main_config
         # self.lots_config = lots_config
         self.auto_response_config = auto_response_config
+        # Поиск команд авто-ответчика по тексту сообщения. Пересобирается при перезагрузке конфига.
+        self.command_router = CommandRouter(auto_response_config)
         self.auto_delivery_config = auto_delivery_config
+        # Поиск лотов из конфига авто-выдачи по названию ордера. Пересобирается при перезагрузке конфига.
+        self.delivery_matcher = LotMatcher(auto_delivery_config.sections())
 
         # Прочее
         self.running = False
         self.account: FunPayAPI.account.Account | None = None
         self.runner: FunPayAPI.runner.Runner | None = None
-        self.telegram: telegram.TGBot | None = None
+        self.telegram: "telegram.TGBot | None" = None
+        # Метрики (счетчики, время выполнения, размеры очередей). Доступны по HTTP (/metrics, если задан
+        # metricsPort) и в Telegram (/stats).
+        self.metrics = MetricsRegistry()
+        self.metrics_server: MetricsServer | None = None
+        # Профилировщик хэндлеров (время выполнения, сторож медленных хэндлеров, вынос медленных хэндлеров
+        # плагинов в отдельный пул потоков).
+        self.handler_profiler = HandlerProfiler(
+            self.metrics,
+            profiling=bool(self.main_config["Other"].getfloat("handlerProfiling", fallback=0)),
+            slow_threshold=self.main_config["Other"].getfloat("slowHandlerThreshold", fallback=0),
+            offload=bool(self.main_config["Other"].getfloat("offloadSlowHandlers", fallback=0))
+        )
+        # Общий ограничитель частоты запросов к FunPay (для всех запросов аккаунта).
+        self.request_limiter = FunPayAPI.limiter.RequestLimiter(
+            rate=self.main_config["FunPay"].getfloat("requestsPerSecond", fallback=5),
+            burst=self.main_config["FunPay"].getfloat("requestsBurst", fallback=10)
+        )
+        # Планировщик запросов к runner'у.
+        self.runner_scheduler = RunnerScheduler(
+            min_delay=self.main_config["FunPay"].getfloat("runnerMinDelay", fallback=3),
+            max_delay=self.main_config["FunPay"].getfloat("runnerMaxDelay", fallback=30)
+        )
+        # Очередь исходящих сообщений FunPay (ограничение длины учитывает префикс botName).
+        bot_name = self.main_config["Other"]["botName"]
+        self.outbox = MessageOutbox(
+            self.__send_outbox_message,
+            max_length=MAX_MESSAGE_LENGTH - (len(bot_name) + 1 if bot_name != "-" else 0)
+        )
+        # Пул потоков, в котором выполняются хэндлеры эвентов FunPay.
+        self.dispatcher = EventDispatcher(
+            workers=int(self.main_config["Other"].getfloat("handlersWorkers", fallback=4))
+        )
 
         # Категории
         self.categories: list[FunPayAPI.categories.Category] | None = None
         # ID игр категорий. Нужно для проверки возможности поднять ту или иную категорию.
         # Формат хранения: {ID игры: следующее время поднятия}
         self.game_ids = {}
+        # Кэш ID игр категорий.
+        self.categories_cache = CategoriesCache()
+        # Категории, ID игр которых не удалось получить при запуске: {имя категории в кэше: [время следующей
+        # попытки, текущая пауза между попытками]}. Перепроверяются в фоне (categories_cache_loop()).
+        self.unresolved_categories: dict[str, list[float]] = {}
+        # Планировщик поднятия лотов (по 1 записи на игру).
+        self.raise_scheduler = RaiseScheduler()
+        # Изученное время перезарядки поднятия лотов каждой игры.
+        self.raise_cooldowns = RaiseCooldowns()
         self.lots: list[FunPayAPI.lots.Lot] | None = None
-        # Обработанные ордеры
-        # {"id ордера": ордер}
-        self.processed_orders: dict[str, FunPayAPI.orders.Order] | None = None
+        # Восстановление деактивированных лотов (с кэшем форм редактирования лотов).
+        self.lot_restorer = LotRestorer()
+        self.__init_metrics()
+        # Обработанные ордеры (хранятся в storage/orders.db, работает как словарь {"id ордера": ордер})
+        self.processed_orders: OrdersStore | None = None
+        # Оплаченные ордеры, появившиеся, пока Кардинал был выключен. Обрабатываются после запуска.
+        self.missed_orders: list[FunPayAPI.orders.Order] = []
 
         # Хэндлеры
         # После инициализации Кардинала.
@@ -103,6 +180,40 @@ class Cardinal:
         }
 
     # Инициирование
+    def __init_metrics(self) -> None:
+        """
+        Описывает метрики и регистрирует коллекторы состояния компонентов Кардинала.
+        """
+        self.metrics.describe("funpay_requests_total", "Запросы к FunPay (по классу запроса и HTTP-статусу).")
+        self.metrics.describe("funpay_request_seconds", "Время выполнения запросов к FunPay.")
+        self.metrics.describe("runner_request_seconds", "Время запроса к runner'у (с ожиданием в ограничителе).")
+        self.metrics.describe("runner_parse_seconds", "Время парсинга ответа runner'а.")
+        self.metrics.describe("runner_events_total", "Эвенты, полученные от runner'а.")
+        self.metrics.describe("handler_seconds", "Время выполнения хэндлеров.")
+        self.metrics.describe("handler_errors_total", "Исключения в хэндлерах.")
+        self.metrics.describe("raise_seconds", "Время поднятия лотов 1 игры.")
+        self.metrics.describe("raises_total", "Попытки поднятия лотов (по результату).")
+        self.metrics.describe("delivery_seconds", "Время от начала обработки ордера до отправки товара.")
+        self.metrics.describe("deliveries_total", "Выдачи товара (по результату).")
+        self.metrics.describe("telegram_send_seconds", "Время отправки уведомлений в Telegram.")
+
+        self.metrics.add_collector("dispatcher", self.dispatcher.stats)
+        self.metrics.add_collector("outbox", self.outbox.stats)
+        self.metrics.add_collector("runner_scheduler", self.runner_scheduler.stats)
+        self.metrics.add_collector("limiter", self.request_limiter.stats)
+        self.metrics.add_collector("categories_cache", self.categories_cache.stats)
+        self.metrics.add_collector("raise_cooldowns", self.raise_cooldowns.stats)
+        self.metrics.add_collector("plugins", self.handler_profiler.stats)
+
+    def __on_funpay_response(self, request_type: FunPayAPI.enums.RequestTypes,
+                             response: "requests.Response | None", elapsed: float) -> None:
+        """
+        Хук HTTP-сессии аккаунта: учитывает запрос к FunPay в метриках.
+        """
+        status = response.status_code if response is not None else "error"
+        self.metrics.inc("funpay_requests_total", type=request_type.name.lower(), status=status)
+        self.metrics.observe("funpay_request_seconds", elapsed, type=request_type.name.lower())
+
     def __init_account(self) -> None:
         """
         Инициализирует класс аккаунта (self.account)
@@ -110,6 +221,10 @@ class Cardinal:
         while True:
             try:
                 self.account = FunPayAPI.account.get_account(self.main_config["FunPay"]["golden_key"])
+                self.account.session.limiter = self.request_limiter
+                self.account.session.on_response = self.__on_funpay_response
+                with self.account.chats_index_lock:
+                    self.account.chats_index.update(cardinal_tools.load_cached_chats())
                 greeting_text = cardinal_tools.create_greetings(self.account)
                 for line in greeting_text.split("\n"):
                     logger.info(line)
@@ -133,13 +248,15 @@ class Cardinal:
         :return: None
         """
         # Получаем категории аккаунта.
+        phase_start = time.time()
         while True:
             try:
-                user_lots_info = FunPayAPI.users.get_user_lots_info(self.account.id)
+                user_lots_info = FunPayAPI.users.get_user_lots_info(self.account.id, session=self.account.session)
                 categories = user_lots_info["categories"]
                 lots = user_lots_info["lots"]
                 logger.info(f"$MAGENTAПолучил информацию о лотах аккаунта. Всего категорий: $YELLOW{len(categories)}.")
-                logger.info(f"$MAGENTAВсего лотов: $YELLOW{len(lots)}")
+                logger.info(f"$MAGENTAВсего лотов: $YELLOW{len(lots)}$MAGENTA. "
+                            f"Получено за $YELLOW{time.time() - phase_start:.2f}$MAGENTA сек.")
                 break
             except TimeoutError:
                 logger.warning("Не удалось загрузить данные о категориях аккаунта: превышен тайм-аут ожидания.")
@@ -153,64 +270,113 @@ class Cardinal:
             # todo: добавить обработку других исключений
 
         # Привязываем к каждой категории её game_id. Если категория кэширована - берем game_id из кэша,
-        # если нет - делаем запрос к FunPay.
-        # Присваиваем каждому лоту game_id
-        # Так же добавляем game_id категории в self.game_ids
+        # если нет - делаем запросы к FunPay (параллельно; частоту запросов ограничивает общий ограничитель сессии).
         logger.info("Получаю ID игр, к которым относятся лоты и категории...")
-        cached_categories = cardinal_tools.load_cached_categories()
-        for index, cat in enumerate(categories):
-            cached_category_name = f"{cat.id}_{cat.type.value}"
-            if cached_category_name in cached_categories:
-                categories[index].game_id = cached_categories[cached_category_name]
-                # Присваиваем game_id каждому лоту это категории.
-                category_lots = [(ind, lot) for ind, lot in enumerate(lots) if lot.category_id == cat.id]
-                for lot_tuple in category_lots:
-                    lots[lot_tuple[0]].game_id = cat.game_id
-                logger.info(f"Доп. данные о категории \"{cat.title}\" найдены в кэше.")
-                continue
-
-            logger.warning(f"Доп. данные о категории \"{cat.title}\" не найдены в кэше.")
-            logger.info("Отправляю запрос к FunPay...")
-            while True:
-                try:
-                    game_id = self.account.get_category_game_id(cat)
-                    categories[index].game_id = game_id
-                    # Присваиваем game_id каждому лоту этой категории.
-                    category_lots = [(ind, lot) for ind, lot in enumerate(lots) if lot.category_id == cat.id]
-                    for lot_tuple in category_lots:
-                        lots[lot_tuple[0]].game_id = game_id
-                    logger.info(f"Доп. данные о категории \"{cat.title}\" получены!")
-                    break
-                except TimeoutError:
-                    logger.warning(f"Не удалось получить ID игры, к которой относится категория \"{cat.title}\": "
-                                   f"превышен тайм-аут ожидания.")
-                    logger.warning("Повторю попытку через 2 секунды...")
-                    time.sleep(2)
-                except:
-                    logger.error(f"Не удалось получить ID игры, к которой относится категория \"{cat.title}\": "
-                                 f"неизвестная ошибка.")
-                    logger.debug(traceback.format_exc())
-                    logger.warning("Повторю попытку через 2 секунды...")
-                    time.sleep(2)
+        phase_start = time.time()
+        self.categories_cache.load()
+        uncached = []
+        for cat in categories:
+            cat.game_id = self.categories_cache.get(self.categories_cache.key(cat))
+            if cat.game_id is None:
+                uncached.append(cat)
+        cache_stats = self.categories_cache.stats()
+        logger.info(f"Доп. данные найдены в кэше для $YELLOW{len(categories) - len(uncached)}$color категорий "
+                    f"(устаревших: $YELLOW{cache_stats['stale']}$color, будут перепроверены в фоне), "
+                    f"не найдены для $YELLOW{len(uncached)}$color категорий.")
+
+        if uncached:
+            workers = max(1, int(self.main_config["Other"].getfloat("startupWorkers", fallback=8)))
+            logger.info(f"Отправляю запросы к FunPay ($YELLOW{workers}$color потоков)...")
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                game_ids = executor.map(self.__resolve_category_game_id, uncached)
+                for cat, game_id in zip(uncached, game_ids):
+                    cat.game_id = game_id
+                    if game_id is not None:
+                        self.categories_cache.set(self.categories_cache.key(cat), game_id)
+                    else:
+                        self.unresolved_categories[self.categories_cache.key(cat)] = \
+                            [time.time() + UNRESOLVED_RETRY_DELAY, UNRESOLVED_RETRY_DELAY]
+        logger.info(f"$MAGENTAID игр получены за $YELLOW{time.time() - phase_start:.2f}$MAGENTA сек.")
+
+        # Присваиваем game_id каждому лоту (индекс {ID категории: [лоты]} строится за 1 проход по лотам).
+        phase_start = time.time()
+        lots_by_category: dict[int, list[FunPayAPI.lots.Lot]] = {}
+        for lot in lots:
+            lots_by_category.setdefault(lot.category_id, []).append(lot)
+        for cat in categories:
+            for lot in lots_by_category.get(cat.id, []):
+                lot.game_id = cat.game_id
+        logger.debug(f"game_id присвоены лотам за {(time.time() - phase_start) * 1000:.1f} мс.")
 
         self.categories = categories
         self.lots = lots
-        logger.info("Кэширую данные о категориях...")
-        cardinal_tools.cache_categories(self.categories)
+        self.lot_restorer.update(lots)
+        if uncached:
+            logger.info("Кэширую данные о категориях...")
+            self.categories_cache.save()
+
+    def __resolve_category_game_id(self, category: FunPayAPI.categories.Category, attempts: int = 5) -> int | None:
+        """
+        Получает ID игры, к которой относится категория (выполняется в пуле потоков при запуске).
+
+        :param category: экземпляр категории.
+        :param attempts: кол-во попыток.
+        :return: ID игры или None, если превышено кол-во попыток.
+        """
+        delay = 2
+        for attempt in range(attempts):
+            try:
+                game_id = self.account.get_category_game_id(category)
+                logger.info(f"Доп. данные о категории \"{category.title}\" получены!")
+                return game_id
+            except TimeoutError:
+                logger.warning(f"Не удалось получить ID игры, к которой относится категория \"{category.title}\": "
+                               f"превышен тайм-аут ожидания.")
+            except:
+                logger.error(f"Не удалось получить ID игры, к которой относится категория \"{category.title}\": "
+                             f"неизвестная ошибка.")
+                logger.debug(traceback.format_exc())
+            if attempt < attempts - 1:
+                logger.warning(f"Повторю попытку через {delay} секунды...")
+                time.sleep(delay)
+                delay *= 2
+        logger.error(f"Не удалось получить ID игры, к которой относится категория \"{category.title}\": "
+                     f"превышено кол-во попыток. Категория не будет подниматься, пока ID игры не будет получен "
+                     f"(повторю попытку в фоне).")
+        return None
 
     def __init_orders(self) -> None:
         """
-        Загружает данные об ордерах пользователя.
+        Загружает обработанные ордеры из storage/orders.db и сверяет их со страницей продаж: парсятся только ордеры
+        новее последнего обработанного. Оплаченные ордеры, появившиеся, пока Кардинал был выключен, сохраняются в
+        self.missed_orders и обрабатываются после запуска вместе с сохраненными ордерами, товар по которым не был выдан.
+        При первом запуске (в orders.db нет отметки о первой загрузке) все ордеры со страницы продаж считаются
+        обработанными.
         :return:
         """
+        start_time = time.time()
+        self.processed_orders = OrdersStore()
+        first_start = not self.processed_orders.is_initialised()
+        logger.info(f"$MAGENTAЗагрузил $YELLOW{len(self.processed_orders)}$MAGENTA обработанных ордеров "
+                    f"за $YELLOW{(time.time() - start_time) * 1000:.1f}$MAGENTA мс.")
         while True:
             try:
-                orders = self.account.get_account_orders(include_completed=True)
-                orders_dict = {}
-                for order in orders:
-                    orders_dict[order.id] = order
-                self.processed_orders = orders_dict
-                logger.info(f"$MAGENTAПолучил информацию об ордерах аккаунта.")
+                processed = self.processed_orders.keys()
+                orders = self.account.get_account_orders(include_completed=True, exclude=processed,
+                                                         stop_at=processed)
+                if not first_start:
+                    self.missed_orders = [i for i in orders if i.status == FunPayAPI.enums.OrderStatuses.OUTSTANDING]
+                    orders = [i for i in orders if i.status != FunPayAPI.enums.OrderStatuses.OUTSTANDING]
+                    # Ордеры, сохраненные до выдачи товара, которые не были выданы (Кардинал был остановлен
+                    # или выдача не удалась), обрабатываются повторно.
+                    missed = {i.id for i in self.missed_orders}
+                    self.missed_orders.extend(i for i in self.processed_orders.undelivered(UNDELIVERED_MAX_AGE)
+                                              if i.id not in missed)
+                self.processed_orders.add_many(orders)
+                if first_start:
+                    self.processed_orders.mark_initialised()
+                logger.info(f"$MAGENTAПолучил информацию об ордерах аккаунта. "
+                            f"Новых оплаченных ордеров: $YELLOW{len(self.missed_orders)}$MAGENTA.")
                 break
             except TimeoutError:
                 logger.warning("Не удалось получить информацию об ордерах аккаунта: превышен тайм-аут ожидания.")
@@ -235,8 +401,10 @@ class Cardinal:
         Инициализирует Telegram бота.
         :return:
         """
+        import telegram
         self.telegram = telegram.TGBot(self.main_config)
         self.telegram.init()
+        self.metrics.add_collector("notifier", self.telegram.notifier.stats)
 
     def __add_handlers(self, obj) -> None:
         """
@@ -254,24 +422,57 @@ class Cardinal:
 
         logger.info(f"Хэндлеры из $YELLOW{obj.__name__}.py$color зарегистрированы.")
 
+    def __enabled_events(self) -> set[str]:
+        """
+        :return: названия переменных (REGISTER_TO_..._EVENT) эвентов, которые могут произойти при текущем конфиге.
+        """
+        funpay = self.main_config["FunPay"]
+        events = {"REGISTER_TO_INIT_EVENT", "REGISTER_TO_START_EVENT", "REGISTER_TO_STOP_EVENT"}
+        if any(int(funpay[i]) for i in ("autoDelivery", "autoResponse", "autoRestore", "infiniteOnline")):
+            events |= {"REGISTER_TO_NEW_MESSAGE_EVENT", "REGISTER_TO_ORDERS_UPDATE_EVENT",
+                       "REGISTER_TO_NEW_ORDER_EVENT"}
+        if int(funpay["autoDelivery"]):
+            events.add("REGISTER_TO_DELIVERY_EVENT")
+        if int(funpay["autoRaise"]):
+            events.add("REGISTER_TO_RAISE_EVENT")
+        return events
+
     def __load_plugins(self) -> None:
         """
-        Загружает плагины из папки plugins.
+        Загружает плагины из папки plugins (в алфавитном порядке).
+        Плагин загружается (выполняется), только если он подписан хотя бы на 1 эвент, который может произойти при
+        текущем конфиге. Подписки плагина определяются без его выполнения (см. cardinal_tools.read_plugin_manifest).
         """
         if not os.path.exists("plugins"):
             logger.warning("Папка с плагинами не обнаружена.")
             return
-        plugins = [file for file in os.listdir("plugins") if file.endswith(".py")]
+        plugins = sorted(file for file in os.listdir("plugins") if file.endswith(".py"))
         if not len(plugins):
             logger.info("Плагины не обнаружены.")
             return
-            
-        sys.path.append("plugins")
+
+        enabled_events = self.__enabled_events()
         for file in plugins:
             try:
-                spec = importlib.util.spec_from_file_location(f"plugins.{file[:-3]}", f"plugins/{file}")
-                plugin = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(plugin)
+                events = cardinal_tools.read_plugin_manifest(f"plugins/{file}")
+            except:
+                logger.error(f"Не удалось прочитать плагин {file}. Подробнее в файле логов.")
+                logger.debug(traceback.format_exc())
+                continue
+            if events is not None and not events & enabled_events:
+                logger.info(f"Плагин $YELLOW{file}$color не загружен: по объявлениям в файле он подписан только на "
+                            f"выключенные в конфиге эвенты ({', '.join(sorted(events)) or 'нет подписок'}).")
+                continue
+            if events is None:
+                logger.debug(f"Подписки плагина {file} не удалось определить без его выполнения, загружаю сразу.")
+
+            if "plugins" not in sys.path:
+                sys.path.append("plugins")
+            try:
+                with startup_profiler.stage(f"плагин {file}"):
+                    spec = importlib.util.spec_from_file_location(f"plugins.{file[:-3]}", f"plugins/{file}")
+                    plugin = importlib.util.module_from_spec(spec)
+                    spec.loader.exec_module(plugin)
                 logger.info(f"Плагин $YELLOW{file}$color загружен.")
             except:
                 logger.error(f"Не удалось загрузить плагин {file}. Подробнее в файле логов.")
@@ -281,53 +482,80 @@ class Cardinal:
 
     # Основные функции
 
-    def raise_lots(self) -> int:
-        """
-        Пытается поднять лоты.
-        :return: предположительное время, когда нужно снова запустить данную функцию.
+    def raise_lots(self) -> float | None:
         """
-        # Минимальное время до следующего вызова данной функции.
-        min_next_time = -1
-        for cat in self.categories:
-            # Если game_id данной категории уже находится в self.game_ids, но время поднятия категорий
-            # данной игры еще не настало - пропускам эту категорию.
-            if cat.game_id in self.game_ids and self.game_ids[cat.game_id] > int(time.time()):
-                if min_next_time == -1 or self.game_ids[cat.game_id] < min_next_time:
-                    min_next_time = self.game_ids[cat.game_id]
-                continue
+        Поднимает лоты игр, время поднятия которых настало (см. self.raise_scheduler).
+        Все категории одной игры поднимаются 1 запросом.
+        Каждая извлеченная из планировщика игра обязательно планируется заново: если при ее обработке произошла
+        непредвиденная ошибка, следующее поднятие планируется через RAISE_FALLBACK_DELAY секунд.
 
-            # В любом другом случае пытаемся поднять лоты всех категорий, относящихся к игре cat.game_id
+        :return: ближайшее время, когда нужно снова запустить данную функцию (или None).
+        """
+        due = self.raise_scheduler.pop_due()
+        for game_id, categories in due:
+            next_time = None
             try:
-                response = self.account.raise_game_categories(cat)
-                logger.debug(str(response))
+                next_time = self.__raise_game(game_id, categories)
             except:
-                logger.error(f"Не удалось поднять категорию \"{cat.title}\": неизвестная ошибка.")
+                logger.error(f"Произошла непредвиденная ошибка при поднятии лотов игры с ID {game_id}.")
                 logger.debug(traceback.format_exc())
-                next_time = int(time.time()) + 10
-                if min_next_time == -1 or next_time < min_next_time:
-                    min_next_time = next_time
-                continue
-                # todo: добавить обработку исключений.
-            if not response["complete"]:
-                logger.warning(f"Не удалось поднять категорию \"{cat.title}\". "
-                               f"Попробую еще раз через {cardinal_tools.time_to_str(response['wait'])}.")
-                logger.debug(response["response"])
-                next_time = int(time.time()) + response["wait"]
-                self.game_ids[cat.game_id] = next_time
-                if min_next_time == -1 or next_time < min_next_time:
-                    min_next_time = next_time
-            else:
-                for category_name in response["raised_category_names"]:
-                    logger.info(f"Поднял категорию \"{category_name}\". ")
-                logger.info(f"Все категории, относящиеся к игре с ID {cat.game_id} подняты!")
-                logger.info(f"Попробую еще раз через  {cardinal_tools.time_to_str(response['wait'])}.")
-                next_time = int(time.time()) + response['wait']
-                self.game_ids[cat.game_id] = next_time
-                if min_next_time == -1 or next_time < min_next_time:
-                    min_next_time = next_time
-                self.run_handlers(self.raise_lots_handlers, (cat.game_id, response["raised_category_names"],
-                                                             response["wait"], self, ))
-        return min_next_time
+            finally:
+                if next_time is None:
+                    next_time = time.time() + RAISE_FALLBACK_DELAY
+                    logger.info(f"Попробую поднять лоты игры с ID {game_id} еще раз через "
+                                f"{cardinal_tools.time_to_str(RAISE_FALLBACK_DELAY)}.")
+                self.game_ids[game_id] = next_time
+                self.raise_scheduler.schedule(game_id, next_time)
+        if due:
+            self.raise_cooldowns.save()
+        return self.raise_scheduler.next_time()
+
+    def __raise_game(self, game_id: int, categories: list[FunPayAPI.categories.Category]) -> float:
+        """
+        Поднимает все категории игры 1 запросом.
+
+        :param game_id: ID игры.
+        :param categories: категории игры.
+        :return: время следующего поднятия игры (timestamp).
+        """
+        cat = categories[0]
+        try:
+            with self.metrics.timer("raise_seconds"):
+                response = self.account.raise_game_categories(cat)
+            logger.debug(str(response))
+        except:
+            logger.error(f"Не удалось поднять категорию \"{cat.title}\": неизвестная ошибка.")
+            logger.debug(traceback.format_exc())
+            self.metrics.inc("raises_total", result="error")
+            return self.raise_cooldowns.on_error(game_id, time.time())
+            # todo: добавить обработку исключений.
+
+        now = time.time()
+        if response["complete"]:
+            self.metrics.inc("raises_total", result="raised")
+            next_time = self.raise_cooldowns.on_success(game_id, now)
+            # Время до следующего поднятия - изученное время перезарядки игры.
+            response["wait"] = int(next_time - now)
+            for category_name in response["raised_category_names"]:
+                logger.info(f"Поднял категорию \"{category_name}\". ")
+            logger.info(f"Все категории, относящиеся к игре с ID {game_id} подняты!")
+            logger.info(f"Попробую еще раз через  {cardinal_tools.time_to_str(response['wait'])}.")
+            self.run_handlers(self.raise_lots_handlers, (game_id, response["raised_category_names"],
+                                                         response["wait"], self, ))
+            return next_time
+
+        msg = response["response"].get("msg") if isinstance(response["response"], dict) else None
+        wait_time = FunPayAPI.other.parse_wait_time(msg) if msg else None
+        if wait_time is not None:
+            self.metrics.inc("raises_total", result="wait")
+            next_time = self.raise_cooldowns.on_wait(game_id, now, *wait_time)
+        else:
+            self.metrics.inc("raises_total", result="error")
+            next_time = self.raise_cooldowns.on_error(game_id, now)
+        logger.warning(f"Не удалось поднять категорию \"{cat.title}\". "
+                       f"Попробую еще раз через {cardinal_tools.time_to_str(int(next_time - now))}.")
+        logger.debug(response["response"])
+        return next_time
 
     def send_message(self, msg: FunPayAPI.runner.MessageEvent):
         """
@@ -354,14 +582,133 @@ class Cardinal:
                                                             msg.tag)
 
                 self.runner.update_lat_message(new_msg_obj)
-            logger.info(f"Отправил сообщение в чат $YELLOW{msg.node_id}.")
+            logger.info(f"Отправил сообщение в чат $YELLOW{msg.node_id}.", extra={"node_id": msg.node_id})
             return True
         else:
             logger.warning(f"Произошла ошибка при отправке сообщения в чат $YELLOW{msg.node_id}.")
             logger.debug(f"{response}")
             return False
 
+    def __send_outbox_message(self, node_id: int, text: str, username: str | None) -> bool:
+        """
+        Отправляет сообщение из очереди исходящих сообщений (self.outbox).
+
+        :param node_id: ID чата.
+        :param text: текст сообщения.
+        :param username: никнейм собеседника.
+        :return: True, если сообщение отправлено, иначе False.
+        """
+        return self.send_message(FunPayAPI.runner.MessageEvent(node_id, text, username, None))
+
+    def save_chats_index(self) -> None:
+        """
+        Сохраняет индекс чатов аккаунта в кэш, если он изменился.
+        """
+        if not self.account.chats_index_changed:
+            return
+        # Индекс изменяется из потоков хэндлеров: сохраняем его копию.
+        chats_index = self.account.chats_index_snapshot()
+        try:
+            cardinal_tools.cache_chats(chats_index)
+        except:
+            self.account.chats_index_changed = True
+            logger.error("Не удалось сохранить индекс чатов в кэш.")
+            logger.debug(traceback.format_exc())
+
+    def update_category_game_id(self, category: FunPayAPI.categories.Category, game_id: int) -> None:
+        """
+        Обновляет ID игры категории и ее лотов, запись кэша категорий и расписание поднятия.
+
+        :param category: экземпляр категории.
+        :param game_id: ID игры.
+        """
+        if game_id != category.game_id:
+            category.game_id = game_id
+            for lot in self.lots or []:
+                if lot.category_id == category.id:
+                    lot.game_id = game_id
+            # Категория теперь относится к другой игре (или впервые получила ID игры): пересобираем расписание.
+            self.raise_scheduler.set_categories(self.categories)
+        self.categories_cache.set(self.categories_cache.key(category), game_id)
+
+    def retry_unresolved_categories(self) -> int:
+        """
+        Повторяет попытку получить ID игр категорий, для которых он не был получен при запуске (только для
+        категорий, время следующей попытки которых настало). При неудаче пауза до следующей попытки удваивается
+        (не более UNRESOLVED_RETRY_MAX_DELAY).
+
+        :return: кол-во категорий, ID игр которых получены.
+        """
+        resolved = 0
+        now = time.time()
+        for cat in self.categories:
+            key = self.categories_cache.key(cat)
+            if key not in self.unresolved_categories or self.unresolved_categories[key][0] > now:
+                continue
+            if not self.running:
+                break
+            time.sleep(1)
+            try:
+                game_id = self.account.get_category_game_id(cat)
+            except:
+                delay = min(self.unresolved_categories[key][1] * 2, UNRESOLVED_RETRY_MAX_DELAY)
+                self.unresolved_categories[key] = [time.time() + delay, delay]
+                logger.debug(f"Не удалось получить ID игры категории \"{cat.title}\". "
+                             f"Повторю попытку через {delay} сек.")
+                logger.debug(traceback.format_exc())
+                continue
+            del self.unresolved_categories[key]
+            self.update_category_game_id(cat, game_id)
+            resolved += 1
+            logger.info(f"$MAGENTAID игры категории \"{cat.title}\" получен: $YELLOW{game_id}$MAGENTA. "
+                        f"Категория будет подниматься.")
+        return resolved
+
     # Бесконечные циклы.
+    def categories_cache_loop(self):
+        """
+        Запускает бесконечный цикл перепроверки устаревших записей кэша ID игр категорий (раз в час, не чаще 1
+        запроса в секунду). Если ID игры категории изменился, обновляет категорию и ее лоты.
+        Также повторяет попытки получить ID игр категорий, которые не удалось получить при запуске (с растущей
+        паузой между попытками), пока они не будут получены.
+        """
+        next_refresh = 0.0
+        while self.running:
+            stale_categories = []
+            if time.time() >= next_refresh:
+                stale_keys = set(self.categories_cache.stale_keys())
+                stale_categories = [i for i in self.categories if self.categories_cache.key(i) in stale_keys
+                                    and self.categories_cache.key(i) not in self.unresolved_categories]
+                next_refresh = time.time() + 60 * 60
+            if stale_categories:
+                logger.debug(f"Перепроверяю {len(stale_categories)} устаревших записей кэша категорий.")
+            for cat in stale_categories:
+                if not self.running:
+                    break
+                # Фоновая перепроверка не должна занимать общий ограничитель: не более 1 запроса в секунду.
+                time.sleep(1)
+                try:
+                    game_id = self.account.get_category_game_id(cat)
+                except:
+                    logger.debug(f"Не удалось перепроверить ID игры категории \"{cat.title}\".")
+                    logger.debug(traceback.format_exc())
+                    continue
+                if game_id != cat.game_id:
+                    logger.warning(f"ID игры категории \"{cat.title}\" изменился: {cat.game_id} -> {game_id}.")
+                self.update_category_game_id(cat, game_id)
+                self.categories_cache.refreshes += 1
+            resolved = self.retry_unresolved_categories() if self.unresolved_categories else 0
+            if stale_categories or resolved:
+                try:
+                    self.categories_cache.save()
+                except:
+                    logger.error("Не удалось сохранить кэш категорий.")
+                    logger.debug(traceback.format_exc())
+                logger.debug(f"Кэш категорий: {self.categories_cache.stats()}")
+            # Спим до следующей перепроверки кэша или до ближайшей попытки получить ID игры категории.
+            wake_time = min([next_refresh] + [i[0] for i in self.unresolved_categories.values()])
+            time.sleep(max(wake_time - time.time(), 1))
+
     def lots_raise_loop(self):
         """
         Запускает бесконечный цикл поднятия категорий (если autoRaise в _main.cfg == 1)
@@ -369,19 +716,19 @@ class Cardinal:
         :return:
         """
         logger.info("$CYANАвто-поднятие лотов запущено.")
+        self.raise_cooldowns.load()
+        self.raise_scheduler.set_categories(self.categories)
         while True and self.running:
             try:
-                next_time = self.raise_lots()
+                self.raise_lots()
             except:
                 logger.error("Не удалось поднять лоты: произошла неизвестная ошибка.")
                 logger.debug(traceback.format_exc())
                 logger.info("Попробую через 10 секунд.")
                 time.sleep(10)
                 continue
-            delay = next_time - int(time.time())
-            if delay < 0:
-                delay = 0
-            time.sleep(delay)
+            # Спим до ближайшего времени поднятия (или пока планировщик не разбудят).
+            self.raise_scheduler.wait(max_delay=60 * 60)
 
     def listen_runner(self) -> Generator[list[FunPayAPI.runner.MessageEvent | FunPayAPI.runner.OrderEvent], None, None]:
         """
@@ -405,43 +752,64 @@ class Cardinal:
         while self.running:
             try:
                 events = self.runner.get_updates()
+                self.metrics.observe("runner_request_seconds", self.runner.last_request_time)
+                self.metrics.observe("runner_parse_seconds", self.runner.last_parse_time)
+                self.metrics.inc("runner_events_total", len(events))
+                self.runner_scheduler.on_success(bool(events))
+                self.save_chats_index()
                 yield events
             except:
                 logger.error("Не удалось получить список эвентов.")
                 logger.debug(traceback.format_exc())
+                self.runner_scheduler.on_error()
                 yield []
-            time.sleep(6)
+            delay = self.runner_scheduler.next_delay()
+            logger.debug(f"Следующий запрос к runner'у через {delay:.2f} сек. ({self.runner_scheduler.stats()})")
+            time.sleep(delay)
 
     def process_funpay_events(self):
         """
-        "Слушает" self.listen_runner(), запускает хэндлеры, привязанные к эвенту.
+        "Слушает" self.listen_runner(), передает хэндлеры, привязанные к эвенту, в пул потоков (self.dispatcher).
+        Эвенты одного чата обрабатываются по порядку, эвенты разных чатов - параллельно.
 
         :return:
         """
         for events in self.listen_runner():
             for event in events:
                 if event.type == FunPayAPI.enums.EventTypes.NEW_MESSAGE:
-                    self.run_handlers(self.message_event_handlers, (event, self, ))
+                    event.command = self.command_router.resolve(event.message_text)
+                    self.dispatcher.submit(event.node_id, self.run_handlers, self.message_event_handlers,
+                                           (event, self, ))
 
                 elif event.type == FunPayAPI.enums.EventTypes.NEW_ORDER:
                     if self.processed_orders is not None:
-                        self.process_orders(event)
+                        self.dispatcher.submit("orders", self.process_orders, event)
 
     def process_orders(self, event: FunPayAPI.runner.OrderEvent):
         """
-        Обновляет список ордеров и запускает хэндлеры, если есть новые заказы.
+        Обновляет список ордеров, передает в пул потоков хэндлеры новых ордеров, а затем - хэндлеры изменения
+        списка ордеров (новые ордеры доступны в event.new_orders).
 
         :return:
         """
-        # Обновляем список ордеров.
-        self.run_handlers(self.orders_updates_event_handlers, (event, self, ))
+        # Разница счетчика активных продаж - минимальное кол-во новых ордеров (одновременно с новыми ордерами
+        # могут завершиться старые, поэтому 0 или отрицательная разница не означает, что новых ордеров нет).
+        expected = event.seller - self.account.active_orders if event.seller is not None else 0
+        if event.seller is not None:
+            self.account.active_orders = event.seller
         attempts = 3
-        new_orders = {}
+        new_orders = []
         while attempts:
             try:
-                new_orders = self.account.get_account_orders(include_completed=True,
-                                                             exclude=list(self.processed_orders.keys()))
-                logger.info("Обновил список ордеров.")
+                # Ордеры на странице отсортированы от новых к старым: парсим только ордеры новее последнего
+                # обработанного, поэтому время обработки не зависит от кол-ва ордеров в истории.
+                processed = self.processed_orders.keys()
+                start = time.time()
+                new_orders = self.account.get_account_orders(include_completed=True, exclude=processed,
+                                                             stop_at=processed)
+                logger.info(f"Обновил список ордеров. Новых ордеров: $YELLOW{len(new_orders)}$color "
+                            f"(ожидалось не менее $YELLOW{max(expected, 0)}$color).",
+                            extra={"latency": round(time.time() - start, 3)})
                 break
             except:
                 logger.error("Не удалось обновить список ордеров.")
@@ -450,12 +818,45 @@ class Cardinal:
                 time.sleep(1)
         if not attempts:
             logger.error("Не удалось обновить список ордеров: превышено кол-во попыток.")
-            return
+        else:
+            event.new_orders = new_orders
+            # Сначала передаем в пул хэндлеры новых ордеров (выдача товара), и только потом - хэндлеры изменения
+            # списка ордеров: они могут долго выполнять запросы к FunPay (восстановление лотов).
+            self.process_new_orders(new_orders)
+        # Хэндлеры изменения списка ордеров выполняются по своему ключу: следующее обновление списка ордеров
+        # не ждет их завершения.
+        self.dispatcher.submit("orders_updates", self.run_handlers, self.orders_updates_event_handlers,
+                               (event, self, ), force=True)
 
-        # Обрабатываем каждый ордер по отдельности.
-        for order in new_orders:
-            self.processed_orders[order.id] = order
-            self.run_handlers(self.new_order_event_handlers, (order, self, ))
+    def process_new_orders(self, new_orders: list[FunPayAPI.orders.Order]):
+        """
+        Сохраняет новые ордеры как обработанные и передает хэндлеры новых ордеров в пул потоков.
+
+        :param new_orders: список новых ордеров (от новых к старым, как на странице продаж).
+        :return:
+        """
+        self.processed_orders.add_many(new_orders)
+        # Обрабатываем каждый ордер по отдельности (от старых к новым): ордеры разных покупателей - параллельно,
+        # ордер и сообщения одного покупателя - по порядку (в очереди чата с покупателем, как и сообщения).
+        for order in reversed(new_orders):
+            self.dispatcher.submit(self.get_order_chat_key(order), self.run_handlers, self.new_order_event_handlers,
+                                   (order, self, ), force=True)
+
+    def get_order_chat_key(self, order: FunPayAPI.orders.Order) -> int | str:
+        """
+        Возвращает ключ диспетчера для ордера - node_id чата с покупателем (тот же ключ, что и у сообщений этого
+        чата). Если чата нет в индексе чатов, node_id запрашивается у FunPay.
+
+        :param order: экземпляр ордера.
+        :return: node_id чата с покупателем или никнейм покупателя, если node_id получить не удалось.
+        """
+        try:
+            node_id = self.account.get_node_id_by_username(order.buyer_name, user_id=order.buyer_id)
+        except:
+            logger.warning(f"Не удалось получить ID чата с покупателем {order.buyer_name}.")
+            logger.debug(traceback.format_exc())
+            node_id = None
+        return node_id if node_id is not None else order.buyer_name
 
     # Функции запуска / остановки Кардинала.
     def init(self):
@@ -464,21 +865,25 @@ class Cardinal:
 
         :return:
         """
-        self.__init_account()
+        with startup_profiler.stage("аккаунт"):
+            self.__init_account()
         self.__add_handlers(handlers)
-        self.__load_plugins()
+        with startup_profiler.stage("плагины"):
+            self.__load_plugins()
 
         if any([
             int(self.main_config["FunPay"]["autoRaise"]),
             int(self.main_config["FunPay"]["autoRestore"])
         ]):
-            self.__init_user_lots_info()
+            with startup_profiler.stage("лоты и категории"):
+                self.__init_user_lots_info()
 
         if any([
             int(self.main_config["FunPay"]["autoDelivery"]),
             int(self.main_config["FunPay"]["autoRestore"])
         ]):
-            self.__init_orders()
+            with startup_profiler.stage("ордеры"):
+                self.__init_orders()
 
         if any([
             int(self.main_config["FunPay"]["autoDelivery"]),
@@ -489,10 +894,12 @@ class Cardinal:
             self.__init_runner()
 
         if int(self.main_config["Telegram"]["enabled"]):
-            self.__init_telegram()
+            with startup_profiler.stage("Telegram бот"):
+                self.__init_telegram()
             self.telegram.cardinal = self
 
-        self.run_handlers(self.bot_init_handlers, (self, ))
+        with startup_profiler.stage("хэндлеры инициализации"):
+            self.run_handlers(self.bot_init_handlers, (self, ))
 
     def run(self):
         """
@@ -501,11 +908,32 @@ class Cardinal:
         :return:
         """
         self.running = True
+        self.outbox.start()
+        self.handler_profiler.start()
+
+        metrics_port = int(self.main_config["Other"].getfloat("metricsPort", fallback=0))
+        if metrics_port:
+            try:
+                self.metrics_server = MetricsServer(self.metrics, metrics_port)
+                self.metrics_server.start()
+            except:
+                logger.error(f"Не удалось запустить HTTP-сервер метрик на порту {metrics_port}.")
+                logger.debug(traceback.format_exc())
+                self.metrics_server = None
 
         if self.categories and int(self.main_config["FunPay"]["autoRaise"]):
             Thread(target=self.lots_raise_loop).start()
 
+        if self.categories:
+            Thread(target=self.categories_cache_loop, daemon=True).start()
+
         if self.runner:
+            self.dispatcher.start()
+            if self.missed_orders:
+                logger.info(f"Обрабатываю $YELLOW{len(self.missed_orders)}$color ордеров, "
+                            f"оплаченных во время простоя.")
+                self.process_new_orders(self.missed_orders)
+                self.missed_orders = []
             Thread(target=self.process_funpay_events).start()
 
         if self.telegram:
@@ -520,19 +948,63 @@ class Cardinal:
         :return:
         """
         self.running = False
+        self.dispatcher.stop()
+        self.outbox.stop()
+        self.handler_profiler.stop()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        self.raise_scheduler.wake()
+        if products_store.STORE is not None:
+            products_store.STORE.flush()
 
     # Прочее
+    def reload_auto_response_config(self, config_path: str = "configs/auto_response.cfg") -> None:
+        """
+        Перезагружает конфиг авто-ответчика и пересобирает self.command_router.
+
+        :param config_path: путь до конфига авто-ответчика.
+        """
+        config = cfg_loader.load_auto_response_config(config_path)
+        self.command_router = CommandRouter(config)
+        self.auto_response_config = config
+        logger.info(f"Конфиг авто-ответчика перезагружен. Загружено $YELLOW{len(config.sections())}$color команд.")
+
+    def reload_auto_delivery_config(self, config_path: str = "configs/auto_delivery.cfg") -> None:
+        """
+        Перезагружает конфиг авто-выдачи и пересобирает self.delivery_matcher.
+
+        :param config_path: путь до конфига авто-выдачи.
+        """
+        config = cfg_loader.load_auto_delivery_config(config_path)
+        self.delivery_matcher = LotMatcher(config.sections())
+        self.auto_delivery_config = config
+        logger.info(f"Конфиг авто-выдачи перезагружен. Загружено $YELLOW{len(config.sections())}$color лотов.")
+
     def run_handlers(self, handlers: list[Callable], args) -> None:
         """
-        Выполняет функции из списка handlers.
+        Выполняет функции из списка handlers. Хэндлеры, вынесенные профилировщиком в отдельный пул потоков,
+        выполняются в нем (без ожидания).
 
         :param handlers: Список функций.
         :param args: аргументы для функций.
         :return:
         """
         for func in handlers:
-            try:
+            if self.handler_profiler.is_offloaded(func):
+                self.handler_profiler.submit(self.run_handler, func, args)
+            else:
+                self.run_handler(func, args)
+
+    def run_handler(self, func: Callable, args) -> None:
+        """
+        Выполняет хэндлер (с профилированием), обрабатывая ошибки.
+
+        :param func: хэндлер.
+        :param args: аргументы для хэндлера.
+        """
+        try:
+            with self.handler_profiler.profile(func):
                 func(*args)
-            except:
-                logger.error("Произошла ошибка при выполнении хэндлера.")
-                logger.debug(traceback.format_exc())
+        except:
+            logger.error(f"Произошла ошибка при выполнении хэндлера {handler_name(func)}.")
+            logger.debug(traceback.format_exc())
@@ -12,22 +12,25 @@ from FunPayAPI.runner import MessageEvent, OrderEvent
 from FunPayAPI.orders import Order
 import FunPayAPI.users
 
-from Utils import cardinal_tools
+from Utils import cardinal_tools, products_store
+from Utils.exceptions import ChatNotFoundError
 
 import time
 import logging
 import traceback
-from threading import Thread
-
-import telebot.types
+from concurrent.futures import Future
 
 
 logger = logging.getLogger("Cardinal.handlers")
 
 
-def create_reply_button(node_id: int):
+def create_reply_button(node_id: int, username: str | None = None):
+    # telebot импортируется только при включенном Telegram боте (кнопки нужны только для его уведомлений).
+    import telebot.types
     keyboard = telebot.types.InlineKeyboardMarkup()
-    reply_button = telebot.types.InlineKeyboardButton(text="Ответить", callback_data=f"reply_to_node_id:{node_id}")
+    # Никнейм в тексте кнопки нужен, чтобы различать кнопки в дайджесте уведомлений.
+    text = "Ответить" if username is None else f"Ответить {username}"
+    reply_button = telebot.types.InlineKeyboardButton(text=text, callback_data=f"reply_to_node_id:{node_id}")
     keyboard.add(reply_button)
     return keyboard
 
@@ -40,10 +43,9 @@ def log_msg_handler(msg: MessageEvent, *args):
     :param msg: сообщение.
     :return:
     """
+    # 1 запись на сообщение (в консоли - многострочная, в лог файле - в 1 строку).
     logger.info(f"Новое сообщение в переписке с пользователем $YELLOW{msg.sender_username}"
-                f" (node: {msg.node_id}):")
-    for line in msg.message_text.split("\n"):
-        logger.info(line)
+                f" (node: {msg.node_id}):\n{msg.message_text}", extra={"node_id": msg.node_id})
 
 
 def send_new_message_notification(msg: MessageEvent, cardinal: Cardinal, *args):
@@ -55,7 +57,7 @@ def send_new_message_notification(msg: MessageEvent, cardinal: Cardinal, *args):
     """
     if cardinal.telegram is None or not int(cardinal.main_config["Telegram"]["newMessageNotification"]):
         return
-    if msg.message_text.strip() in cardinal.auto_response_config.sections():
+    if msg.command is not None:
         return
 
     if "Покупатель" in msg.message_text or "Продавец" in msg.message_text:
@@ -69,25 +71,20 @@ def send_new_message_notification(msg: MessageEvent, cardinal: Cardinal, *args):
         ["$userlink", f"[{msg.sender_username}](https://funpay.com/chat/?node={msg.node_id})"]
     ]
 
-    button = create_reply_button(msg.node_id)
-    Thread(target=cardinal.telegram.send_notification, args=(text, replaces, button)).start()
+    button = create_reply_button(msg.node_id, msg.sender_username)
+    cardinal.telegram.send_notification(text, replaces, button, digest_key="new_message")
 
 
-def send_response(msg: MessageEvent, cardinal: Cardinal, *args) -> bool:
+def send_response(msg: MessageEvent, cardinal: Cardinal, *args) -> Future:
     """
-    Отправляет ответ на команду.
+    Добавляет ответ на команду в очередь исходящих сообщений.
 
     :param msg: сообщение.
     :param cardinal: экземпляр Кардинала.
-    :return: True - если сообщение отправлено, False - если нет.
+    :return: Future, результат которого - SendResult (истинен, если сообщение отправлено полностью).
     """
-    response_text = cardinal_tools.format_msg_text(cardinal.auto_response_config[msg.message_text.strip()]["response"],
-                                                   msg)
-
-    new_msg_object = MessageEvent(msg.node_id, response_text, msg.sender_username, msg.tag)
-
-    response = cardinal.send_message(new_msg_object)
-    return response
+    response_text = cardinal_tools.format_msg_text(cardinal.auto_response_config[msg.command]["response"], msg)
+    return cardinal.outbox.submit(msg.node_id, response_text, msg.sender_username)
 
 
 def send_response_handler(msg: MessageEvent, cardinal: Cardinal, *args):
@@ -100,32 +97,18 @@ def send_response_handler(msg: MessageEvent, cardinal: Cardinal, *args):
     """
     if not int(cardinal.main_config["FunPay"]["AutoResponse"]):
         return
-    if msg.message_text.strip().lower() not in cardinal.auto_response_config:
+    if msg.command is None or msg.command not in cardinal.auto_response_config:
         return
 
     logger.info(f"Получена команда \"{msg.message_text.strip()}\" "
                 f"в переписке с пользователем $YELLOW{msg.sender_username} (node: {msg.node_id}).")
-    done = False
-    attempts = 3
-    while not done and attempts:
-        try:
-            result = send_response(msg, cardinal, *args)
-        except:
-            logger.error(f"Произошла непредвиденная ошибка при отправке ответа пользователю {msg.sender_username}.",)
-            logger.debug(traceback.format_exc())
-            logger.info("Следующая попытка через секунду.")
-            attempts -= 1
-            time.sleep(1)
-            continue
-        if not result:
-            attempts -= 1
-            logger.info("Следующая попытка через секунду.")
-            time.sleep(1)
-            continue
-        done = True
-    if not done:
-        logger.error("Не удалось отправить ответ пользователю: превышено кол-во попыток.")
-        return
+
+    def on_sent(future: Future):
+        if not future.result():
+            logger.error(f"Не удалось отправить ответ пользователю {msg.sender_username}: превышено кол-во попыток.")
+
+    # Ответ отправляется в фоне (см. cardinal.outbox), поток хэндлеров не блокируется.
+    send_response(msg, cardinal, *args).add_done_callback(on_sent)
 
 
 def send_command_notification_handler(msg: MessageEvent, cardinal: Cardinal, *args):
@@ -136,20 +119,20 @@ def send_command_notification_handler(msg: MessageEvent, cardinal: Cardinal, *ar
     :param cardinal: экземпляр Кардинала.
     :return:
     """
-    if cardinal.telegram is None or msg.message_text.strip() not in cardinal.auto_response_config:
+    if cardinal.telegram is None or msg.command is None or msg.command not in cardinal.auto_response_config:
         return
 
-    if cardinal.auto_response_config[msg.message_text].get("telegramNotification") is not None:
-        if not int(cardinal.auto_response_config[msg.message_text]["telegramNotification"]):
+    command = cardinal.auto_response_config[msg.command]
+    if command.get("telegramNotification") is not None:
+        if not int(command["telegramNotification"]):
             return
 
-        if cardinal.auto_response_config[msg.message_text].get("notificationText") is None:
+        if command.get("notificationText") is None:
             text = f"Пользователь {msg.sender_username} ввел команду \"{msg.message_text}\"."
         else:
-            text = cardinal_tools.format_msg_text(cardinal.auto_response_config[msg.message_text]["notificationText"],
-                                                  msg)
+            text = cardinal_tools.format_msg_text(command["notificationText"], msg)
 
-        Thread(target=cardinal.telegram.send_notification, args=(text, )).start()
+        cardinal.telegram.send_notification(text)
 
 
 # Хэндлеры для REGISTER_TO_RAISE_EVENT
@@ -168,84 +151,75 @@ def send_categories_raised_notification_handler(game_id: int, category_names: li
         return
 
     cats_text = "".join(f"\"{i}\", " for i in category_names).strip()[:-1]
-    Thread(target=cardinal.telegram.send_notification,
-           args=(f"Поднял категории: {cats_text}. (ID игры: {game_id})\n"
-                 f"Попробую еще раз через {cardinal_tools.time_to_str(wait_time)}.", )).start()
+    cardinal.telegram.send_notification(f"Поднял категории: {cats_text}. (ID игры: {game_id})\n"
+                                        f"Попробую еще раз через {cardinal_tools.time_to_str(wait_time)}.")
 
 
 # Хэндлеры для REGISTER_TO_NEW_ORDER_EVENT
-def send_product_text(node_id: int, buyer_username: str, text: str, order_id: str, cardinal: Cardinal, *args):
+def send_product_text(node_id: int, buyer_username: str, text: str, order_id: str, cardinal: Cardinal,
+                      *args) -> Future:
     """
-    Отправляет сообщение с товаром в чат node_id.
+    Добавляет сообщение с товаром в очередь исходящих сообщений.
+    Товар ордера отправляется не более 1 раза (ключ идемпотентности - ID ордера).
 
     :param node_id: ID чата.
     :param buyer_username: никнейм покупателя.
     :param text: текст сообщения.
     :param order_id: ID ордера.
     :param cardinal: экземпляр Кардинала.
-    :return: результат отправки.
+    :return: Future, результат которого - SendResult (истинен, если сообщение отправлено полностью).
     """
-    new_msg_obj = MessageEvent(node_id, text, buyer_username, None)
-    attempts = 3
-    while attempts:
-        try:
-            result = cardinal.send_message(new_msg_obj)
-        except:
-            logger.error(f"Произошла непредвиденная ошибка при отправке товара для ордера {order_id}.")
-            logger.debug(traceback.format_exc())
-            logger.info("Следующая попытка через секунду.")
-            attempts -= 1
-            time.sleep(1)
-            continue
-        if not result:
-            attempts -= 1
-            logger.info("Следующая попытка через секунду.")
-            time.sleep(1)
-            continue
-        break
-    if not attempts:
-        return False
-    return True
+    return cardinal.outbox.submit(node_id, text, buyer_username, key=f"product:{order_id}")
 
 
-def deliver_product(order: Order, cardinal: Cardinal, *args) -> tuple[bool, str, int] | None:
+def deliver_product(order: Order, cardinal: Cardinal, *args) -> tuple[Future, str, int] | None:
     """
-    Форматирует текст товара и отправляет его покупателю.
+    Форматирует текст товара и добавляет его в очередь исходящих сообщений.
 
     :param order: объект заказа.
     :param cardinal: экземпляр Кардинала.
     :return: результат выполнения. None - если лота нет в конфиге.
-    [Результат выполнения, текст товара, оставшееся кол-во товара] - в любом другом случае.
+    [Future с результатом отправки, текст товара, оставшееся кол-во товара] - в любом другом случае.
     """
-    # Ищем название лота в конфиге.
-    delivery_obj = None
-    for lot_name in cardinal.auto_delivery_config:
-        if lot_name in order.title:
-            delivery_obj = cardinal.auto_delivery_config[lot_name]
-            break
-    if delivery_obj is None:
+    # Ищем название лота в конфиге (самое длинное из найденных в названии ордера).
+    lot_name = cardinal.delivery_matcher.match(order.title)
+    if lot_name is None or lot_name not in cardinal.auto_delivery_config:
         return None
+    delivery_obj = cardinal.auto_delivery_config[lot_name]
 
-    node_id = cardinal.account.get_node_id_by_username(order.buyer_name)
-    response_text = cardinal_tools.format_order_text(delivery_obj["response"], order)
+    node_id = cardinal.account.get_node_id_by_username(order.buyer_name, user_id=order.buyer_id)
+    if node_id is None:
+        raise ChatNotFoundError(order.buyer_name)
 
     # Проверяем, есть ли у лота файл с товарами. Если нет, то просто отправляем response лота.
     if delivery_obj.get("productsFilePath") is None:
-        result = send_product_text(node_id, order.buyer_name, response_text, order.id, cardinal)
-        return result, response_text, -1
+        response_text = cardinal_tools.format_order_text(delivery_obj["response"], order)
+        future = send_product_text(node_id, order.buyer_name, response_text, order.id, cardinal)
+        return future, response_text, -1
 
-    # Получаем товар.
-    product = cardinal_tools.get_product(delivery_obj.get("productsFilePath"))
-    product_text = product[0].replace("\\n", "\n")
-    response_text = response_text.replace("$product", product_text)
+    # Резервируем товар.
+    store = products_store.get_store()
+    reservation_id, product, amount = store.reserve(delivery_obj.get("productsFilePath"))
+    product_text = product.replace("\\n", "\n")
+    response_text = cardinal_tools.format_order_text(delivery_obj["response"], order, product=product_text)
 
     # Отправляем товар.
-    result = send_product_text(node_id, order.buyer_name, response_text, order.id, cardinal)
+    try:
+        future = send_product_text(node_id, order.buyer_name, response_text, order.id, cardinal)
+    except:
+        store.rollback(reservation_id)
+        raise
+
+    # Если не отправлена ни одна часть сообщения с товаром, возвращаем товар на его место в очереди.
+    # Если отправлена хотя бы часть, товар мог попасть к покупателю, поэтому он остается выданным.
+    def on_sent(sent: Future):
+        if sent.result().sent:
+            store.commit(reservation_id)
+        else:
+            store.rollback(reservation_id)
 
-    # Если произошла какая-либо ошибка при отправлении товара, возвращаем товар обратно в файл с товарами.
-    if not result:
-        cardinal_tools.add_product(delivery_obj.get("productsFilePath"), product_text)
-    return result, response_text, -1
+    future.add_done_callback(on_sent)
+    return future, response_text, amount
 
 
 def deliver_product_handler(order: Order, cardinal: Cardinal, *args):
@@ -258,19 +232,47 @@ def deliver_product_handler(order: Order, cardinal: Cardinal, *args):
     """
     if not int(cardinal.main_config["FunPay"]["autoDelivery"]):
         return
-    try:
-        result = deliver_product(order, cardinal, *args)
-        if result is None:
-            logger.info(f"Лот \"{order.title}\" не обнаружен в конфиге авто-выдачи.")
-        elif not result[0]:
-            logger.error(f"Ошибка при выдаче товара для ордера {order.id}: превышено кол-во попыток.")
+    store = cardinal.processed_orders
+    if store is not None and store.is_delivered(order.id):
+        logger.warning(f"Товар для ордера {order.id} уже был выдан, пропускаю.")
+        return
+    start = time.perf_counter()
+
+    def on_sent(future: Future, delivery_text: str):
+        result = future.result()
+        cardinal.metrics.observe("delivery_seconds", time.perf_counter() - start)
+        cardinal.metrics.inc("deliveries_total",
+                             result="delivered" if result else "partial" if result.partial else "failed")
+        if store is not None:
+            # Частично отправленный товар повторно не выдается.
+            store.set_delivery_result(order.id, bool(result.sent))
+        if result.partial:
+            logger.error(f"Товар для ордера {order.id} отправлен частично: {result.sent} из {result.total} частей.",
+                         extra={"order_id": order.id})
+            cardinal.run_handlers(cardinal.delivery_event_handlers,
+                                  [order, f"Товар отправлен частично ({result.sent} из {result.total} частей).",
+                                   cardinal, True])
+        elif not result:
+            logger.error(f"Ошибка при выдаче товара для ордера {order.id}: превышено кол-во попыток.",
+                         extra={"order_id": order.id})
             cardinal.run_handlers(cardinal.delivery_event_handlers,
                                   [order, "Превышено кол-во попыток.", cardinal, True])
         else:
-            logger.info(f"Товар для ордера {order.id} выдан.")
+            logger.info(f"Товар для ордера {order.id} выдан.", extra={"order_id": order.id})
             cardinal.run_handlers(cardinal.delivery_event_handlers,
-                                  [order, result[1], cardinal, False])
+                                  [order, delivery_text, cardinal, False])
+
+    try:
+        result = deliver_product(order, cardinal, *args)
+        if result is None:
+            logger.info(f"Лот \"{order.title}\" не обнаружен в конфиге авто-выдачи.")
+            if store is not None:
+                store.set_delivery_result(order.id, None)
+            return
+        # Товар отправляется в фоне (см. cardinal.outbox), результат обрабатывается после отправки.
+        result[0].add_done_callback(lambda future: on_sent(future, result[1]))
     except Exception as e:
+        cardinal.metrics.inc("deliveries_total", result="error")
         logger.error(f"Произошла непредвиденная ошибка при обработке заказа {order.id}.")
         logger.debug(traceback.format_exc())
         cardinal.run_handlers(cardinal.delivery_event_handlers,
@@ -299,7 +301,7 @@ ID ордера: $orderlink.
     replaces = [
         ["$orderlink", f"[\\{order.id} \\(клик\\)](https://funpay.com/orders/{order.id[1:]}/)"]
     ]
-    Thread(target=cardinal.telegram.send_notification, args=(text, replaces)).start()
+    cardinal.telegram.send_notification(text, replaces)
 
 
 # Хэндлеры для REGISTER_TO_DELIVERY_EVENT
@@ -327,7 +329,7 @@ def send_delivery_notification_handler(order: Order, delivery_text: str, cardina
 ----- ТОВАР -----
 {delivery_text}"""
 
-    Thread(target=cardinal.telegram.send_notification, args=(text, )).start()
+    cardinal.telegram.send_notification(text)
 
 
 # Хэндлеры для REGISTER_TO_ORDERS_UPDATE_EVENT
@@ -335,18 +337,25 @@ def activate_lots_handler(event: OrderEvent, cardinal: Cardinal, *args):
     """
     Активирует деактивированные лоты.
 
-    :param event: не используется.
+    :param event: эвент изменения списка ордеров.
     :param cardinal: экземпляр кардинала.
     :return:
     """
     if not int(cardinal.main_config["FunPay"]["autoRestore"]):
         return
+    # Лоты деактивируются только при продаже: если Кардинал обновил список ордеров и не нашел ни одного нового
+    # ордера (по ID обработанных ордеров), продаж не было и страницу пользователя можно не запрашивать.
+    # Счетчик активных продаж для этого не подходит: продажа и завершение другого ордера его не меняют.
+    if event.new_orders is not None and not event.new_orders:
+        logger.debug("Новых ордеров нет, пропускаю проверку лотов.")
+        return
     logger.info("Обновляю информацию о лотах...")
     attempts = 3
     lots_info = []
     while attempts:
         try:
-            lots_info = FunPayAPI.users.get_user_lots_info(cardinal.account.id)["lots"]
+            lots_info = FunPayAPI.users.get_user_lots_info(cardinal.account.id,
+                                                           session=cardinal.account.session)["lots"]
             break
         except:
             logger.error("Произошла пошибка при получении информации о лотах.")
@@ -356,15 +365,7 @@ def activate_lots_handler(event: OrderEvent, cardinal: Cardinal, *args):
         logger.error("Не удалось получить информацию о лотах: превышено кол-во попыток.")
         return
 
-    lots_ids = [i.id for i in lots_info]
-    for lot in cardinal.lots:
-        if lot.id not in lots_ids:
-            try:
-                cardinal.account.change_lot_state(lot.id, lot.game_id)
-                logger.info(f"Активировал лот {lot.id}.")
-            except:
-                logger.error(f"Не удалось активировать лот {lot.id}.")
-                logger.debug(traceback.format_exc())
+    cardinal.lot_restorer.restore(cardinal.account, cardinal.lots, lots_info)
 
 
 # Хэндлеры для REGISTER_TO_START_EVENT
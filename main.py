@@ -1,12 +1,18 @@
+import sys
+# --profile-startup - замерить время импорта каждого модуля и каждого этапа инициализации (отчет выводится в лог).
+# Профилировщик запускается до остальных импортов.
+from Utils import startup_profiler
+if "--profile-startup" in sys.argv:
+    startup_profiler.start()
+
 import logging.config
 import os
-import sys
 import colorama
 from colorama import Fore, Style
 import traceback
 
 import Utils.config_loader as cfg_loader
-from Utils.logger import CONFIG
+from Utils.logger import get_config
 import Utils.exceptions as excs
 
 from cardinal import Cardinal
@@ -28,7 +34,8 @@ def get_abs_path(path: str) -> str:
 colorama.init()
 if not os.path.exists("logs"):
     os.mkdir("logs")
-logging.config.dictConfig(CONFIG)
+# --json-logs - записывать лог файл в формате JSON lines.
+logging.config.dictConfig(get_config(json_logs="--json-logs" in sys.argv))
 logging.raiseExceptions = False
 logger = logging.getLogger("main")
 logger.debug("Новый запуск.")
@@ -87,6 +94,7 @@ if __name__ == '__main__':
             AUTO_DELIVERY_CONFIG
         )
         main_program.init()
+        startup_profiler.finish()
         main_program.run()
     except:
         logger.critical("Произошла наикритическая ошибка, которая добила меня окончательно...")
@@ -3,7 +3,12 @@
 Учтите, что хэндлеры выполняются в основном потоке. Если выполнение вашего хэндлера занимает много времени,
 рекомендуется выполнять его в отдельном потоке.
 
-Хэндлеры вызываются в том порядке, в котором были добавлены. Так же учитывается порядок самих плагинов.
+Хэндлеры вызываются в том порядке, в котором были добавлены. Так же учитывается порядок самих плагинов
+(плагины загружаются в алфавитном порядке названий файлов).
+
+Плагин загружается, только если хотя бы 1 эвент, на который он подписан, включен в конфиге. Подписки определяются
+по переменным REGISTER_TO_..._EVENT без выполнения плагина, поэтому эти переменные должны объявляться на верхнем
+уровне модуля (как в этом шаблоне).
 """
 
 
@@ -9,14 +9,15 @@ if TYPE_CHECKING:
     from cardinal import Cardinal
 
 import os
+import time
 import telebot
 from telebot import types
 import logging
 import traceback
+from concurrent.futures import Future
 
-from Utils import telegram_tools
-
-from FunPayAPI.runner import MessageEvent
+from Utils import telegram_tools, cardinal_tools
+from Utils.notifier import TelegramNotifier
 
 
 # Логгер
@@ -63,6 +64,8 @@ class TGBot:
 
         self.authorized_users = telegram_tools.load_authorized_users()
         self.chat_ids = telegram_tools.load_chat_ids()
+        # Очередь уведомлений.
+        self.notifier = TelegramNotifier(self.__send_notification_message, lambda: self.chat_ids)
 
         self.cardinal: Cardinal | None = None
         # {chat_id: {user_id: reply_type}
@@ -72,7 +75,9 @@ class TGBot:
             "FunPayCardinal": {
                 "/add_chat": "добавляет чат в список чатов для уведомлений.",
                 "/remove_chat": "удаляет чат и списка чатов для уведомлений.",
-                "/menu": "открывает меню."
+                "/menu": "открывает меню.",
+                "/raise_schedule": "показывает время следующего поднятия лотов.",
+                "/stats": "показывает статистику работы бота."
             }
         }
 
@@ -154,14 +159,27 @@ class TGBot:
                     self.user_reply_statuses[chat_id].pop(user_id)
                     return
                 node_id = int(self.user_reply_statuses[chat_id][user_id].split(":")[1])
-                new_msg_obj = MessageEvent(node_id, message.text, None, None)
+                self.user_reply_statuses[chat_id].pop(user_id)
+
+                # Сообщение отправляется в фоне (см. cardinal.outbox): поток бота не ждет отправки, результат
+                # сообщается после нее.
+                def on_sent(future: Future):
+                    try:
+                        sent = bool(future.result())
+                    except:
+                        sent = False
+                        logger.debug(traceback.format_exc())
+                    try:
+                        self.bot.send_message(chat_id, "Получилось." if sent else "Ошибка.")
+                    except:
+                        logger.error("Произошла ошибка в работе Telegram бота.")
+                        logger.debug(traceback.format_exc())
+
                 try:
-                    self.cardinal.send_message(new_msg_obj)
-                    self.bot.send_message(chat_id, "Получилось.")
+                    self.cardinal.outbox.submit(node_id, message.text).add_done_callback(on_sent)
                 except:
                     self.bot.send_message(chat_id, "Ошибка.")
                     logger.debug(traceback.format_exc())
-                self.user_reply_statuses[chat_id].pop(user_id)
             except:
                 logger.error("Произошла ошибка в работе Telegram бота.")
                 logger.debug(traceback.format_exc())
@@ -197,6 +215,22 @@ class TGBot:
                 logger.error("Произошла ошибка в работе Telegram бота.")
                 logger.debug(traceback.format_exc())
 
+        @bot_instance.message_handler(commands=["raise_schedule"])
+        def send_raise_schedule(message: types.Message):
+            try:
+                self.bot.send_message(message.chat.id, self.generate_raise_schedule_text())
+            except:
+                logger.error("Произошла ошибка в работе Telegram бота.")
+                logger.debug(traceback.format_exc())
+
+        @bot_instance.message_handler(commands=["stats"])
+        def send_stats(message: types.Message):
+            try:
+                self.bot.send_message(message.chat.id, self.generate_stats_text())
+            except:
+                logger.error("Произошла ошибка в работе Telegram бота.")
+                logger.debug(traceback.format_exc())
+
         @bot_instance.message_handler(commands=["menu"])
         def show_menu(message: types.Message):
             try:
@@ -233,30 +267,39 @@ class TGBot:
                 logger.error("Произошла ошибка в работе Telegram бота.")
                 logger.debug(traceback.format_exc())
 
-    def send_notification(self, text: str, replaces: list[list[str]] | None = None, reply_button=None):
+    def send_notification(self, text: str, replaces: list[list[str]] | None = None, reply_button=None,
+                          digest_key: str | None = None):
         """
-        Отправляет сообщение во все чаты для уведомлений из self.chat_ids
+        Добавляет уведомление в очередь уведомлений (self.notifier). Уведомление будет отправлено во все чаты для
+        уведомлений из self.chat_ids.
+
         :param text: текст уведомления.
         :param replaces: замены, которые нужно произвести ПОСЛЕ экранирования спец. символов.
         :param reply_button: экземпляр кнопки.
+        :param digest_key: ключ дайджеста: уведомления с одинаковым ключом, добавленные почти одновременно,
+        объединяются в 1 сообщение.
         """
-        escape_characters = "_*[]()~`>#+-=|{}.!"
-        for char in escape_characters:
-            text = text.replace(char, f"\\{char}")
-
+        text = telegram_tools.escape_markdown(text)
         if replaces:
             for i in replaces:
                 text = text.replace(i[0], i[1])
+        self.notifier.enqueue(text, reply_button, digest_key)
 
-        for chat_id in self.chat_ids:
-            try:
-                if reply_button is None:
-                    self.bot.send_message(chat_id, text, parse_mode='MarkdownV2')
-                else:
-                    self.bot.send_message(chat_id, text, parse_mode='MarkdownV2', reply_markup=reply_button)
-            except:
-                logger.error("Произошла ошибка при отправке уведомления в Telegram.")
-                logger.debug(traceback.format_exc())
+    def __send_notification_message(self, chat_id: int, text: str, reply_markup=None):
+        """
+        Отправляет уведомление в чат (вызывается потоком очереди уведомлений).
+
+        :param chat_id: ID чата.
+        :param text: текст уведомления (MarkdownV2).
+        :param reply_markup: клавиатура.
+        """
+        start = time.perf_counter()
+        if reply_markup is None:
+            self.bot.send_message(chat_id, text, parse_mode='MarkdownV2')
+        else:
+            self.bot.send_message(chat_id, text, parse_mode='MarkdownV2', reply_markup=reply_markup)
+        if self.cardinal is not None:
+            self.cardinal.metrics.observe("telegram_send_seconds", time.perf_counter() - start)
 
     def generate_help_text(self) -> str:
         """
@@ -275,6 +318,87 @@ class TGBot:
 
         return text.strip()
 
+    def generate_raise_schedule_text(self) -> str:
+        """
+        Генерирует текст с расписанием поднятия лотов.
+
+        :return: текст расписания.
+        """
+        if self.cardinal is None or not self.cardinal.categories or \
+                not int(self.main_config["FunPay"]["autoRaise"]):
+            return "❌ Авто-поднятие лотов выключено."
+
+        upcoming = self.cardinal.raise_scheduler.upcoming()
+        if not upcoming:
+            return "⏳ Сейчас поднимаю лоты."
+
+        text = "📈 Следующее поднятие лотов:\n"
+        now = time.time()
+        for next_time, game_id, titles in upcoming:
+            wait = int(next_time - now)
+            when = "сейчас" if wait <= 0 else f"через {cardinal_tools.time_to_str(wait)}"
+            text += f"\n{time.strftime('%H:%M:%S', time.localtime(next_time))} ({when}) - {', '.join(titles)}"
+        return text
+
+    def generate_stats_text(self) -> str:
+        """
+        Генерирует текст со статистикой работы бота (по метрикам Кардинала).
+
+        :return: текст статистики.
+        """
+        if self.cardinal is None:
+            return "❌ Кардинал еще не запущен."
+        metrics = self.cardinal.metrics
+        text = f"📊 Статистика (работает {cardinal_tools.time_to_str(int(time.time() - metrics.started))}):\n"
+
+        request_times = metrics.histogram_stats("funpay_request_seconds")
+        if request_times:
+            text += "\nЗапросы к FunPay (кол-во / среднее / макс. время):\n"
+            for labels, (count, avg, max_time) in sorted(request_times.items()):
+                text += f"    {dict(labels)['type']}: {count} / {avg:.2f} / {max_time:.2f} сек.\n"
+
+        parse_times = metrics.histogram_stats("runner_parse_seconds")
+        if parse_times:
+            count, avg, max_time = parse_times[()]
+            text += f"\nПарсинг ответа runner'а: {count} раз, в среднем {avg * 1000:.1f} мс, " \
+                    f"макс. {max_time * 1000:.1f} мс.\n"
+
+        deliveries = {dict(k)["result"]: int(v) for k, v in metrics.counter_values("deliveries_total").items()}
+        delivery_times = metrics.histogram_stats("delivery_seconds")
+        if deliveries:
+            text += f"\nВыдано товаров: {deliveries.get('delivered', 0)}, ошибок: " \
+                    f"{deliveries.get('failed', 0) + deliveries.get('error', 0)}."
+            if delivery_times:
+                _, avg, max_time = delivery_times[()]
+                text += f" Время выдачи: в среднем {avg:.2f}, макс. {max_time:.2f} сек."
+            text += "\n"
+
+        handler_times = metrics.histogram_stats("handler_seconds")
+        if handler_times:
+            text += "\nСамые медленные хэндлеры (кол-во / среднее / макс. время):\n"
+            slowest = sorted(handler_times.items(), key=lambda i: i[1][1], reverse=True)[:5]
+            for labels, (count, avg, max_time) in slowest:
+                text += f"    {dict(labels)['handler']}: {count} / {avg * 1000:.1f} / {max_time * 1000:.1f} мс\n"
+
+        state = metrics.collect()
+        plugins = {k: v for k, v in state.get("plugins", {}).items() if v["calls"] or v["slow"]}
+        if plugins:
+            text += "\nМодули хэндлеров (вызовов / время / процессорное время / медленных вызовов):\n"
+            for module, i in sorted(plugins.items(), key=lambda i: i[1]["wall"], reverse=True):
+                text += f"    {module}: {i['calls']} / {i['wall']:.2f} / {i['cpu']:.2f} сек. / {i['slow']}" \
+                        f"{' (в отдельном пуле)' if i['offloaded'] else ''}\n"
+
+        text += "\nОчереди:\n"
+        if "dispatcher" in state:
+            text += f"    хэндлеры: {state['dispatcher']['queued']}\n"
+        if "outbox" in state:
+            text += f"    исходящие сообщения: {state['outbox']['queued']}\n"
+        if "limiter" in state:
+            text += f"    запросы к FunPay: {state['limiter']['queued']}\n"
+        if "notifier" in state:
+            text += f"    уведомления Telegram: {state['notifier']['queued']}\n"
+        return text.strip()
+
     def add_command_help(self, plugin_name: str, command: str, help_text: str) -> None:
         """
         Добавляет справку о команде.
@@ -292,6 +416,7 @@ class TGBot:
         """
         Запускает поллинг.
         """
+        self.notifier.start()
         try:
             logger.info(f"$CYANTelegram бот $YELLOW@{self.bot.user.username} $CYANзапущен.")
             self.bot.infinity_polling(logger_level=logging.DEBUG)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+
+# Тесты запускаются из корня репозитория (python -m pytest): модули Кардинала импортируются напрямую.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
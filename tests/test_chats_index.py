@@ -0,0 +1,39 @@
+from FunPayAPI.account import Account
+from Utils import cardinal_tools
+
+
+def account() -> Account:
+    return Account(app_data={}, id_=1, username="seller", balance=None, currency=None, active_orders=0,
+                   golden_key="golden_key", csrf_token="csrf", session_id="session_id", last_update=0)
+
+
+def test_fallback_lookup_marks_index_changed():
+    acc = account()
+    acc.get_chat_node_id = lambda user_id, timeout=10.0: 500 + user_id
+    assert acc.get_node_id_by_username("buyer", user_id=7) == 507
+    assert acc.chats_index == {"buyer": 507} and acc.chats_index_changed
+
+    assert acc.chats_index_snapshot() == {"buyer": 507}
+    assert not acc.chats_index_changed
+    # Чат уже в индексе: запрос не отправляется, индекс не изменяется.
+    acc.get_chat_node_id = None
+    assert acc.get_node_id_by_username("buyer", user_id=7) == 507
+    assert not acc.set_chat_node_id("buyer", 507) and not acc.chats_index_changed
+
+
+def test_snapshot_is_a_copy():
+    acc = account()
+    acc.set_chat_node_id("buyer", 1)
+    snapshot = acc.chats_index_snapshot()
+    # Индекс изменяется из потоков хэндлеров, пока копия сохраняется в файл.
+    acc.set_chat_node_id("other", 2)
+    assert snapshot == {"buyer": 1}
+    assert acc.chats_index_changed
+
+
+def test_cache_chats_replaces_file_atomically(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cardinal_tools.cache_chats({"buyer": 1})
+    cardinal_tools.cache_chats({"buyer": 1, "другой": 2})
+    assert cardinal_tools.load_cached_chats() == {"buyer": 1, "другой": 2}
+    assert sorted(i.name for i in (tmp_path / "storage" / "cache").iterdir()) == ["chats.json"]
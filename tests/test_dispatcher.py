@@ -0,0 +1,73 @@
+import time
+import threading
+
+from Utils.dispatcher import EventDispatcher
+
+
+def wait_processed(dispatcher: EventDispatcher, count: int, timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while dispatcher.stats()["processed"] < count and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert dispatcher.stats()["processed"] == count
+
+
+def test_slow_key_does_not_block_other_keys():
+    dispatcher = EventDispatcher(workers=2)
+    dispatcher.start()
+    release = threading.Event()
+    done = []
+    # Ключ "slow" занимает поток, пока его не отпустят. Остальные ключи (в т.ч. с тем же хэшем по модулю кол-ва
+    # потоков) должны выполняться во втором потоке.
+    dispatcher.submit("slow", release.wait, 5)
+    for key in range(10):
+        dispatcher.submit(key, done.append, key)
+    wait_processed(dispatcher, 10)
+    assert sorted(done) == list(range(10))
+    release.set()
+    wait_processed(dispatcher, 11)
+    dispatcher.stop()
+
+
+def test_tasks_of_one_key_run_in_order_on_one_worker():
+    dispatcher = EventDispatcher(workers=4)
+    dispatcher.start()
+    lock = threading.Lock()
+    running: dict[int, int] = {}
+    overlaps = []
+    log: dict[int, list[int]] = {}
+
+    def task(key: int, index: int):
+        with lock:
+            running[key] = running.get(key, 0) + 1
+            if running[key] > 1:
+                overlaps.append(key)
+        time.sleep(0.001)
+        with lock:
+            running[key] -= 1
+            log.setdefault(key, []).append(index)
+
+    for index in range(20):
+        for key in range(3):
+            dispatcher.submit(key, task, key, index)
+    wait_processed(dispatcher, 60)
+    dispatcher.stop()
+    assert not overlaps
+    assert log == {key: list(range(20)) for key in range(3)}
+    stats = dispatcher.stats()
+    assert stats["queued"] == 0 and stats["keys"] == 0 and stats["active"] == 0
+
+
+def test_submit_waits_when_queues_are_full():
+    dispatcher = EventDispatcher(workers=1, queue_size=2)
+    dispatcher.submit(1, lambda: None)
+    dispatcher.submit(2, lambda: None)
+    thread = threading.Thread(target=dispatcher.submit, args=(3, lambda: None))
+    thread.start()
+    time.sleep(0.05)
+    assert thread.is_alive()
+    dispatcher.start()
+    thread.join(5)
+    assert not thread.is_alive()
+    wait_processed(dispatcher, 3)
+    assert dispatcher.stats()["blocked"] == 1
+    dispatcher.stop()
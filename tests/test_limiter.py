@@ -0,0 +1,172 @@
+import time
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from FunPayAPI.async_account import AsyncAccount
+from FunPayAPI.enums import Links, RequestTypes
+from FunPayAPI.limiter import RequestLimiter
+from FunPayAPI.session import FunPaySession
+
+
+class FakeFunPay(ThreadingHTTPServer):
+    """
+    Локальный сервер, отвечающий 429, если за последнюю секунду пришло больше limit запросов.
+    """
+    daemon_threads = True
+
+    def __init__(self, limit: int, retry_after: float | None = None):
+        self.limit = limit
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.times: list[float] = []
+        self.statuses: list[int] = []
+        # Кол-во запросов, на которые сервер принудительно ответит 429.
+        self.force_429 = 0
+        super().__init__(("127.0.0.1", 0), self.Handler)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            server: FakeFunPay = self.server
+            now = time.monotonic()
+            with server.lock:
+                server.times = [i for i in server.times if now - i < 1] + [now]
+                limited = server.force_429 > 0 or len(server.times) > server.limit
+                server.force_429 = max(server.force_429 - 1, 0)
+                status = 429 if limited else 200
+                server.statuses.append(status)
+            self.send_response(status)
+            if limited and server.retry_after is not None:
+                self.send_header("Retry-After", str(server.retry_after))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+
+@pytest.fixture
+def server():
+    servers = []
+
+    def create(limit: int, retry_after: float | None = None) -> FakeFunPay:
+        instance = FakeFunPay(limit, retry_after)
+        threading.Thread(target=instance.serve_forever, daemon=True).start()
+        servers.append(instance)
+        return instance
+
+    yield create
+    for i in servers:
+        i.shutdown()
+        i.server_close()
+
+
+def url(server: FakeFunPay) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def test_session_respects_server_limit(server):
+    fake = server(limit=10)
+    session = FunPaySession(limiter=RequestLimiter(rate=6, burst=2))
+    threads = [threading.Thread(target=session.get, args=(url(fake),)) for _ in range(20)]
+    for i in threads:
+        i.start()
+    for i in threads:
+        i.join(10)
+    assert len(fake.statuses) == 20 and 429 not in fake.statuses
+
+
+def test_async_account_shares_session_limiter(server):
+    fake = server(limit=10)
+    limiter = RequestLimiter(rate=6, burst=2)
+    session = FunPaySession(limiter=limiter)
+    account = AsyncAccount(app_data={}, id_=1, username="user", balance=None, currency=None, active_orders=0,
+                           golden_key="golden_key", csrf_token="csrf", session_id="session_id",
+                           last_update=int(time.time()), limiter=limiter)
+
+    async def request():
+        async with account.request("GET", url(fake)) as response:
+            return response.status
+
+    async def main():
+        try:
+            return await asyncio.gather(*[request() for _ in range(10)])
+        finally:
+            await account.close()
+
+    threads = [threading.Thread(target=session.get, args=(url(fake),)) for _ in range(10)]
+    for i in threads:
+        i.start()
+    statuses = asyncio.run(main())
+    for i in threads:
+        i.join(10)
+    assert statuses == [200] * 10
+    assert len(fake.statuses) == 20 and 429 not in fake.statuses
+    assert account.session.limiter is limiter
+
+
+def test_backoff_on_429_uses_retry_after(server):
+    fake = server(limit=100, retry_after=0.5)
+    fake.force_429 = 1
+    limiter = RequestLimiter(rate=0)
+    session = FunPaySession(limiter=limiter)
+    assert session.get(url(fake)).status_code == 429
+    start = time.monotonic()
+    assert session.get(url(fake)).status_code == 200
+    assert time.monotonic() - start >= 0.45
+    assert limiter.stats()["throttled"] == 1 and limiter.strikes == 0
+
+
+def test_backoff_without_retry_after_grows():
+    limiter = RequestLimiter(rate=0)
+    assert [limiter.backoff() for _ in range(4)] == [1, 2, 4, 8]
+    limiter.reset_backoff()
+    assert limiter.backoff(max_pause=60) == 1
+    assert limiter.backoff(retry_after=120) == 60
+
+
+def test_priority_order():
+    limiter = RequestLimiter(rate=4, burst=1, type_rates={})
+    limiter.acquire()
+    order = []
+    types = [RequestTypes.LOT_EDIT, RequestTypes.RAISE, RequestTypes.OTHER, RequestTypes.CHAT_SEND]
+
+    def request(request_type: RequestTypes):
+        limiter.acquire(request_type)
+        order.append(request_type)
+
+    threads = [threading.Thread(target=request, args=(t,)) for t in types]
+    for i in threads:
+        i.start()
+    deadline = time.monotonic() + 1
+    while len(limiter.waiters) < len(types) and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert len(limiter.waiters) == len(types)
+    for i in threads:
+        i.join(5)
+    assert order == [RequestTypes.CHAT_SEND, RequestTypes.OTHER, RequestTypes.RAISE, RequestTypes.LOT_EDIT]
+
+
+def test_type_buckets_do_not_delay_other_types():
+    limiter = RequestLimiter(rate=0, type_rates={RequestTypes.RAISE: 4})
+    limiter.acquire(RequestTypes.RAISE)
+    start = time.monotonic()
+    limiter.acquire(RequestTypes.CHAT_SEND)
+    assert time.monotonic() - start < 0.05
+    limiter.acquire(RequestTypes.RAISE)
+    assert time.monotonic() - start >= 0.2
+
+
+@pytest.mark.parametrize("method, link, data, expected", [
+    ("POST", Links.RUNNER, {"request": '{"action": "chat_message"}'}, RequestTypes.CHAT_SEND),
+    ("POST", Links.RUNNER, {"request": False}, RequestTypes.RUNNER),
+    ("GET", Links.RUNNER, None, RequestTypes.RUNNER),
+    ("POST", Links.RAISE, {}, RequestTypes.RAISE),
+    ("GET", f"{Links.BASE_URL}/lots/offerEdit?offer=1", None, RequestTypes.LOT_EDIT),
+    ("GET", f"{Links.ORDERS}?state=paid", None, RequestTypes.ORDERS),
+    ("GET", f"{Links.USER}/1/", None, RequestTypes.OTHER),
+])
+def test_classify(method, link, data, expected):
+    assert RequestLimiter.classify(method, link, data) is expected
@@ -0,0 +1,36 @@
+from Utils.metrics import MetricsRegistry, PREFIX
+
+
+def families(text: str) -> list[tuple[str, list[str]]]:
+    """
+    :return: [(название семейства из # TYPE, [строки значений после него])].
+    """
+    result = []
+    for line in text.strip().split("\n"):
+        if line.startswith("# TYPE "):
+            result.append((line.split()[2], []))
+        elif not line.startswith("#"):
+            result[-1][1].append(line)
+    return result
+
+
+def test_render_keeps_each_family_contiguous():
+    registry = MetricsRegistry()
+    registry.inc("deliveries_total", result="delivered")
+    registry.observe("delivery_seconds", 0.2)
+    # Элементы списка словарей дают значения семейств plugins_calls и plugins_wall вперемешку.
+    registry.add_collector("plugins", lambda: {"modules": [{"calls": 1, "wall": 0.5}, {"calls": 2, "wall": 1.5}],
+                                               "slow": 0})
+
+    parsed = families(registry.render())
+    names = [name for name, _ in parsed]
+    assert len(names) == len(set(names))
+    for name, samples in parsed:
+        assert samples and all(i.split("{")[0].split()[0].startswith(name) for i in samples)
+
+    samples = dict(parsed)
+    assert samples[f"{PREFIX}plugins_modules_calls"] == [f'{PREFIX}plugins_modules_calls{{index="0"}} 1',
+                                                        f'{PREFIX}plugins_modules_calls{{index="1"}} 2']
+    assert samples[f"{PREFIX}plugins_modules_wall"] == [f'{PREFIX}plugins_modules_wall{{index="0"}} 0.5',
+                                                       f'{PREFIX}plugins_modules_wall{{index="1"}} 1.5']
+    assert samples[f"{PREFIX}plugins_slow"] == [f"{PREFIX}plugins_slow 0"]
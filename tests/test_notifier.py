@@ -0,0 +1,59 @@
+import time
+import threading
+
+from telebot.apihelper import ApiTelegramException
+
+from Utils import notifier
+from Utils.notifier import TelegramNotifier
+
+
+def too_many_requests(retry_after: float) -> ApiTelegramException:
+    result = {"ok": False, "error_code": 429, "description": "Too Many Requests",
+              "parameters": {"retry_after": retry_after}}
+    return ApiTelegramException("sendMessage", None, result)
+
+
+def wait_for(condition, timeout: float = 5) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_repeated_429_requeues_only_throttled_chats():
+    calls = []
+    lock = threading.Lock()
+
+    def send(chat_id, text, markup):
+        with lock:
+            calls.append((chat_id, time.time()))
+            throttled = [i for i in calls if i[0] == 2]
+        if chat_id == 2 and len(throttled) <= 2:
+            raise too_many_requests(0.2)
+
+    instance = TelegramNotifier(send, lambda: [1, 2])
+    instance.start()
+    start = time.time()
+    instance.enqueue("текст")
+    assert wait_for(lambda: instance.stats()["sent"] == 1)
+    assert [i[0] for i in calls] == [1, 2, 2, 2]
+    # 3-я попытка в чат 2 - из очереди, не раньше retry_after после 2-й.
+    assert calls[3][1] - calls[2][1] >= 0.19 and calls[3][1] - start >= 0.39
+    stats = instance.stats()
+    assert (stats["requeued"], stats["dropped"], stats["throttled"]) == (1, 0, 2)
+
+
+def test_notification_is_dropped_after_max_requeues(monkeypatch):
+    monkeypatch.setattr(notifier, "MAX_REQUEUES", 1)
+
+    def send(chat_id, text, markup):
+        raise too_many_requests(0.05)
+
+    instance = TelegramNotifier(send, lambda: [1])
+    instance.start()
+    instance.enqueue("текст")
+    assert wait_for(lambda: instance.stats()["dropped"] == 1)
+    stats = instance.stats()
+    assert (stats["sent"], stats["requeued"], stats["throttled"]) == (0, 1, 4)
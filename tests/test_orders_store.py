@@ -0,0 +1,64 @@
+import sqlite3
+
+from FunPayAPI.enums import OrderStatuses
+from FunPayAPI.orders import Order
+from Utils.orders_store import OrdersStore
+
+
+def order(id_, status=OrderStatuses.OUTSTANDING):
+    return Order(id_=id_, title="Lot", price=1.0, buyer_username="buyer", buyer_id=1, status=status)
+
+
+def test_initialised_flag_does_not_depend_on_orders(tmp_path):
+    db = str(tmp_path / "orders.db")
+    store = OrdersStore(db)
+    assert not store.is_initialised()
+    # На аккаунте еще нет ордеров: после первой загрузки таблица пуста, но отметка сохраняется.
+    store.add_many([])
+    store.mark_initialised()
+    store.close()
+
+    store = OrdersStore(db)
+    assert not len(store)
+    assert store.is_initialised()
+    store.close()
+
+
+def test_legacy_database_with_orders_is_initialised(tmp_path):
+    db = str(tmp_path / "orders.db")
+    store = OrdersStore(db)
+    store.add_many([order("#A")])
+    store.connection.execute("DROP TABLE meta")
+    store.connection.commit()
+    store.close()
+
+    store = OrdersStore(db)
+    assert store.is_initialised()
+    store.close()
+
+
+def test_undelivered_orders_are_returned_for_redelivery(tmp_path):
+    db = str(tmp_path / "orders.db")
+    store = OrdersStore(db)
+    store.add_many([order("#A"), order("#B"), order("#C"), order("#D"), order("#E", OrderStatuses.COMPLETED)])
+    store.set_delivery_result("#B", True)
+    store.set_delivery_result("#C", False)
+    store.set_delivery_result("#D", None)
+    store.close()
+
+    # Кардинал был остановлен до выдачи товара по #A, выдача по #C не удалась.
+    store = OrdersStore(db)
+    assert sorted(i.id for i in store.undelivered()) == ["#A", "#C"]
+    assert store.is_delivered("#B")
+    assert not store.is_delivered("#D")
+    store.close()
+
+
+def test_undelivered_skips_old_orders(tmp_path):
+    db = str(tmp_path / "orders.db")
+    store = OrdersStore(db)
+    store.add_many([order("#A"), order("#B")])
+    store.connection.execute("UPDATE orders SET processed_at = 0 WHERE id = '#A'")
+    store.connection.commit()
+    assert [i.id for i in store.undelivered(max_age=3600)] == ["#B"]
+    store.close()
@@ -0,0 +1,22 @@
+import pytest
+
+from FunPayAPI.other import get_wait_time_from_raise_response, parse_wait_time
+
+
+@pytest.mark.parametrize("response, expected", [
+    ("Подождите 2 часа 30 минут.", (9000, 60)),
+    ("Подождите 45 секунд.", (45, 1)),
+    ("Подождите минуту.", (60, 60)),
+    ("Подождите секунду.", (1, 1)),
+    ("Подождите час.", (3600, 3600)),
+    ("Please wait 5 minutes.", (300, 60)),
+    ("Please wait an hour.", (3600, 3600)),
+    ("Please wait 1 hr 5 min", (3900, 60)),
+    # Единица времени внутри слова без числа - не время ожидания.
+    ("Минимальная цена лота изменена", None),
+    ("Секундочку, лоты уже подняты", None),
+    ("Лоты подняты", None),
+])
+def test_parse_wait_time(response, expected):
+    assert parse_wait_time(response) == expected
+    assert get_wait_time_from_raise_response(response) == (expected[0] if expected else None)
@@ -0,0 +1,62 @@
+import threading
+
+from Utils.outbox import MessageOutbox, SendResult
+
+
+def test_keyed_messages_are_not_coalesced():
+    sent = []
+    gate = threading.Event()
+
+    def send(node_id, text, username):
+        gate.wait(5)
+        sent.append(text)
+        return True
+
+    outbox = MessageOutbox(send, workers=1)
+    futures = [outbox.submit(1, "hello"), outbox.submit(1, "product", key="product:#A"), outbox.submit(1, "bye"),
+               outbox.submit(1, "again")]
+    outbox.start()
+    gate.set()
+    assert all(f.result(5) for f in futures)
+    assert sent == ["hello", "product", "bye\nagain"]
+    outbox.stop()
+
+
+def test_partial_send_is_reported():
+    calls = []
+
+    def send(node_id, text, username):
+        calls.append(text)
+        return len(calls) == 1
+
+    outbox = MessageOutbox(send, workers=1, max_length=10, attempts=2, delay=0.01)
+    outbox.start()
+    result = outbox.submit(1, "aaaaaaaaa bbbbbbbbb", key="product:#B").result(5)
+    assert isinstance(result, SendResult)
+    assert not result and result.partial and (result.sent, result.total) == (1, 2)
+    # Частично отправленное сообщение не отправляется повторно.
+    assert outbox.submit(1, "aaaaaaaaa bbbbbbbbb", key="product:#B").result(5) is result
+    outbox.stop()
+
+
+def test_stop_resolves_queued_futures():
+    started = threading.Event()
+    gate = threading.Event()
+
+    def send(node_id, text, username):
+        started.set()
+        gate.wait(5)
+        return True
+
+    outbox = MessageOutbox(send, workers=1, coalesce=False)
+    outbox.start()
+    first = outbox.submit(1, "first")
+    started.wait(5)
+    second = outbox.submit(1, "second")
+    other = outbox.submit(2, "other")
+    outbox.stop()
+    assert other.done() and not other.result()
+    gate.set()
+    assert first.result(5)
+    assert not second.result(5)
+    assert not outbox.submit(3, "late").result(5)
@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+from FunPayAPI import parsers
+from FunPayAPI.enums import CategoryTypes, OrderStatuses
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def normalize(value):
+    """
+    Приводит результат парсера к сравнимому виду (Order, Lot и Category не реализуют __eq__).
+    """
+    if isinstance(value, (list, tuple)):
+        return type(value)(normalize(i) for i in value)
+    if isinstance(value, dict):
+        return {k: normalize(v) for k, v in value.items()}
+    if hasattr(value, "__dict__"):
+        return type(value).__name__, normalize(vars(value))
+    return value
+
+
+CASES = [
+    ("account_page.html", "parse_account_page", ()),
+    ("orders_trade.html", "parse_orders_page", ()),
+    ("orders_trade.html", "parse_orders_page", (True, True, True)),
+    ("orders_trade.html", "parse_orders_page", (False, True, False)),
+    ("orders_trade.html", "parse_orders_page", (True, True, True, {"#A1B2C30B"}, {"#A1B2C305"})),
+    # Парсинг останавливается на ордере из stop_at, даже если ордер не проходит фильтр статуса (возврат).
+    ("orders_trade.html", "parse_orders_page", (True, True, False, None, {"#A1B2C308"})),
+    ("lots_trade.html", "parse_category_game_id", (CategoryTypes.LOT,)),
+    ("chips_trade.html", "parse_category_game_id", (CategoryTypes.CURRENCY,)),
+    ("raise_modal.html", "parse_raise_modal", ()),
+    ("raise_modal.html", "parse_raise_modal", (["215"],)),
+    ("lot_edit_form.html", "parse_lot_fields", ()),
+    ("user_page.html", "parse_user_lots_page", ()),
+    ("user_page.html", "parse_user_lots_page", (True,)),
+    ("chat_bookmarks.html", "parse_chat_bookmarks", ()),
+    ("chat_page.html", "parse_chat_node_id", ()),
+]
+
+
+@pytest.mark.parametrize("name, method, args", CASES)
+def test_lxml_matches_bs4(name, method, args):
+    html = fixture(name)
+    expected = getattr(parsers.BS4Parser(), method)(html, *args)
+    assert normalize(getattr(parsers.LxmlParser(), method)(html, *args)) == normalize(expected)
+
+
+def test_base_parser_is_abstract():
+    with pytest.raises(TypeError):
+        parsers.BaseParser()
+
+
+@pytest.mark.parametrize("backend", list(parsers.PARSERS))
+def test_fixture_values(backend):
+    parser = parsers.PARSERS[backend]()
+    account = parser.parse_account_page(fixture("account_page.html"))
+    assert (account["id"], account["username"], account["active_orders"], account["balance"], account["currency"]) \
+        == (1000001, "seller_anon", 3, 152.34, "₽")
+
+    orders = parser.parse_orders_page(fixture("orders_trade.html"), True, True, True)
+    assert len(orders) == 12
+    assert [i.status for i in orders[:5]] == [OrderStatuses.OUTSTANDING, OrderStatuses.OUTSTANDING,
+                                              OrderStatuses.COMPLETED, OrderStatuses.OUTSTANDING,
+                                              OrderStatuses.REFUND]
+    assert (orders[0].id, orders[0].buyer_name, orders[0].buyer_id) == ("#A1B2C30C", "buyer_00", 2000000)
+    assert orders[3].title == "Буст рейтинга <быстро> & недорого"
+    stopped = parser.parse_orders_page(fixture("orders_trade.html"), True, True, True, stop_at={"#A1B2C305"})
+    assert [i.id for i in stopped] == [f"#A1B2C3{i:02X}" for i in range(12, 5, -1)]
+    stopped = parser.parse_orders_page(fixture("orders_trade.html"), True, True, False, stop_at={"#A1B2C308"})
+    assert [i.id for i in stopped] == ["#A1B2C30C", "#A1B2C30B", "#A1B2C30A", "#A1B2C309"]
+
+    assert parser.parse_category_game_id(fixture("lots_trade.html"), CategoryTypes.LOT) == 41
+    assert parser.parse_category_game_id(fixture("chips_trade.html"), CategoryTypes.CURRENCY) == 96
+    assert parser.parse_raise_modal(fixture("raise_modal.html"), ["215"])[0] == ["210", "301"]
+
+    fields = {i["name"]: i["value"] for i in parser.parse_lot_fields(fixture("lot_edit_form.html"))}
+    assert fields["fields[summary][ru]"] == 'Аккаунт с почтой "под ключ"'
+    assert fields["fields[desc][ru]"] == "Строка 1\nСтрока 2 <без html>"
+    assert (fields["deleted"], fields["secrets"], fields["fields[server]"]) == ("", "", "2")
+
+    lots_info = parser.parse_user_lots_page(fixture("user_page.html"), True)
+    assert [i.id for i in lots_info["categories"]] == [210, 215, 125, 301]
+    assert lots_info["categories"][2].type == CategoryTypes.CURRENCY
+    assert len(lots_info["lots"]) == 10
+    assert len(parser.parse_user_lots_page(fixture("user_page.html"))["lots"]) == 9
+
+    bookmarks = parser.parse_chat_bookmarks(fixture("chat_bookmarks.html"))
+    assert bookmarks[1] == (50013, "Сообщение 1: </a> спасибо & до свидания", "user_01")
+    assert parser.parse_chat_node_id(fixture("chat_page.html")) == 50013
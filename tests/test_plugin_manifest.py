@@ -0,0 +1,37 @@
+import pytest
+
+from Utils.cardinal_tools import read_plugin_manifest
+
+
+def manifest(tmp_path, source: str):
+    path = tmp_path / "plugin.py"
+    path.write_text(source, encoding="utf-8")
+    return read_plugin_manifest(str(path))
+
+
+def test_literal_declarations(tmp_path):
+    source = "def h(*a): pass\nREGISTER_TO_RAISE_EVENT = [h]\nREGISTER_TO_NEW_MESSAGE_EVENT = []\n"
+    assert manifest(tmp_path, source) == {"REGISTER_TO_RAISE_EVENT"}
+
+
+def test_no_declarations(tmp_path):
+    assert manifest(tmp_path, "print(1)\n") is None
+
+
+def test_syntax_error(tmp_path):
+    assert manifest(tmp_path, "def x(:\n") is None
+
+
+@pytest.mark.parametrize("source", [
+    "REGISTER_TO_RAISE_EVENT = []\nREGISTER_TO_RAISE_EVENT.append(print)\n",
+    "REGISTER_TO_RAISE_EVENT = []\nREGISTER_TO_RAISE_EVENT.extend([print])\n",
+    "REGISTER_TO_RAISE_EVENT = []\nREGISTER_TO_RAISE_EVENT.insert(0, print)\n",
+    "REGISTER_TO_RAISE_EVENT = []\nREGISTER_TO_RAISE_EVENT += handlers()\n",
+    "REGISTER_TO_RAISE_EVENT = build()\n",
+    "REGISTER_TO_RAISE_EVENT = []\nif True:\n    REGISTER_TO_RAISE_EVENT = [print]\n",
+    "REGISTER_TO_RAISE_EVENT = []\n@register(REGISTER_TO_RAISE_EVENT)\ndef h(*a): pass\n",
+    "REGISTER_TO_RAISE_EVENT = []\nglobals()['REGISTER_TO_NEW_MESSAGE_EVENT'] = [print]\n",
+    "from helpers import *\nREGISTER_TO_RAISE_EVENT = []\n",
+])
+def test_mutated_declarations_are_unknown(tmp_path, source):
+    assert manifest(tmp_path, source) is None
@@ -0,0 +1,31 @@
+from types import SimpleNamespace
+
+import cardinal
+from FunPayAPI.enums import OrderStatuses
+from FunPayAPI.orders import Order
+from FunPayAPI.runner import OrderEvent
+
+
+class Dispatcher:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, key, func, *args, force=False):
+        self.submitted.append((key, func, args))
+
+
+def test_new_orders_are_dispatched_before_orders_updates_handlers():
+    orders = [Order(id_=f"#{i}", title="Lot", price=1.0, buyer_username=f"buyer{i}", buyer_id=i,
+                    status=OrderStatuses.OUTSTANDING) for i in (2, 1)]
+    dispatcher = Dispatcher()
+    fake = SimpleNamespace(dispatcher=dispatcher, processed_orders=SimpleNamespace(keys=set, add_many=lambda o: None),
+                           orders_updates_event_handlers=["restore"], new_order_event_handlers=["deliver"],
+                           account=SimpleNamespace(active_orders=0, get_account_orders=lambda **kwargs: orders),
+                           get_order_chat_key=lambda order: order.buyer_id, run_handlers=lambda *args: None)
+    fake.process_new_orders = lambda *args: cardinal.Cardinal.process_new_orders(fake, *args)
+    event = OrderEvent(buyer=0, seller=2)
+
+    cardinal.Cardinal.process_orders(fake, event)
+    assert event.new_orders == orders
+    assert [(key, args[0]) for key, _, args in dispatcher.submitted] == \
+        [(1, ["deliver"]), (2, ["deliver"]), ("orders_updates", ["restore"])]
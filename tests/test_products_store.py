@@ -0,0 +1,69 @@
+from Utils.products_store import ProductsStore
+
+
+def write(path, lines):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+
+def read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read().split("\n")
+
+
+def test_reservation_left_after_export_does_not_shadow_new_lines(tmp_path):
+    db, path = str(tmp_path / "products.db"), str(tmp_path / "products.txt")
+    write(path, ["a", "b"])
+    store = ProductsStore(db, export_delay=3600)
+    store.reserve(path)
+    store.flush()
+    assert read(path) == ["b"]
+    store.connection.close()
+
+    # Кардинал "упал" до commit(). Пользователь добавил в файл такую же строку.
+    store = ProductsStore(db, export_delay=3600)
+    write(path, ["b", "a"])
+    assert store.count(path) == 2
+    assert store.connection.execute("SELECT COUNT(*) FROM products WHERE state != 0").fetchone()[0] == 0
+
+
+def test_reservation_left_before_export_is_not_delivered_again(tmp_path):
+    db, path = str(tmp_path / "products.db"), str(tmp_path / "products.txt")
+    write(path, ["a", "b"])
+    store = ProductsStore(db, export_delay=3600)
+    store.reserve(path)
+    store.connection.close()
+    for timer in store.export_timers.values():
+        timer.cancel()
+
+    # Файл еще содержит зарезервированный товар.
+    store = ProductsStore(db, export_delay=3600)
+    assert store.count(path) == 1
+    assert store.reserve(path)[1] == "b"
+    store.flush()
+    assert read(path) == [""]
+    assert store.connection.execute("SELECT COUNT(*) FROM products WHERE state = 2").fetchone()[0] == 0
+
+
+def test_pending_reservation_does_not_shadow_lines_added_after_export(tmp_path):
+    db, path = str(tmp_path / "products.db"), str(tmp_path / "products.txt")
+    write(path, ["a", "b"])
+    store = ProductsStore(db, export_delay=3600)
+    reservation_id, product, _ = store.reserve(path)
+    store.flush()
+    write(path, ["b", "a"])
+    assert store.count(path) == 2
+    store.commit(reservation_id)
+    store.flush()
+    assert read(path) == ["b", "a"]
+
+
+def test_committed_exported_reservation_does_not_shadow_later_edits(tmp_path):
+    db, path = str(tmp_path / "products.db"), str(tmp_path / "products.txt")
+    write(path, ["a", "b"])
+    store = ProductsStore(db, export_delay=3600)
+    reservation_id, _, _ = store.reserve(path)
+    store.flush()
+    store.commit(reservation_id)
+    write(path, ["b", "a"])
+    assert store.count(path) == 2
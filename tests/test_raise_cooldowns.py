@@ -0,0 +1,30 @@
+import json
+
+from Utils.raise_cooldowns import RaiseCooldowns
+
+
+def test_late_success_does_not_learn_upper(tmp_path):
+    model = RaiseCooldowns(str(tmp_path / "cooldowns.json"))
+    model.on_success(1, 0)
+    # Бот не работал 10 часов: поднятие удалось, но перезарядка из этого не следует.
+    model.on_success(1, 36000)
+    assert model.games[1]["upper"] is None
+
+
+def test_on_time_success_learns_upper(tmp_path):
+    model = RaiseCooldowns(str(tmp_path / "cooldowns.json"))
+    model.on_success(1, 0)
+    next_time = model.on_wait(1, 3600, 240, 60)
+    assert next_time == 3600 + 180 + 1
+    assert model.on_success(1, next_time) == next_time + next_time
+    assert model.games[1]["upper"] == next_time
+
+
+def test_load_discards_stale_last_and_clamps(tmp_path):
+    path = tmp_path / "cooldowns.json"
+    path.write_text(json.dumps({"1": {"last": 0, "lower": 100, "upper": 36000},
+                                "2": {"last": 99000, "lower": 100, "upper": 3600}}))
+    model = RaiseCooldowns(str(path))
+    model.load(now=100000)
+    assert model.games[1] == {"last": None, "lower": 100, "upper": None}
+    assert model.games[2] == {"last": 99000, "lower": 100, "upper": 3600}
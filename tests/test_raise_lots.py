@@ -0,0 +1,85 @@
+import time
+from types import SimpleNamespace
+
+import cardinal
+from FunPayAPI.categories import Category
+from FunPayAPI.enums import CategoryTypes
+from Utils.metrics import MetricsRegistry
+from Utils.raise_scheduler import RaiseScheduler
+
+
+class Cooldowns:
+    def on_success(self, game_id, now):
+        if game_id == 2:
+            raise ValueError("broken cooldowns")
+        return now + 3600
+
+    def on_error(self, game_id, now):
+        return now + 60
+
+    def save(self):
+        pass
+
+
+def category(id_: int, game_id: int) -> Category:
+    return Category(id_, game_id, f"Категория {id_}", "", f"https://funpay.com/lots/{id_}/", CategoryTypes.LOT)
+
+
+def test_games_are_rescheduled_after_unexpected_errors():
+    scheduler = RaiseScheduler()
+    scheduler.set_categories([category(10, 1), category(20, 2), category(30, 3)])
+
+    def raise_game_categories(cat):
+        if cat.game_id == 3:
+            return {"complete": True}  # нет raised_category_names
+        return {"complete": True, "raised_category_names": [cat.title]}
+
+    fake = SimpleNamespace(raise_scheduler=scheduler, raise_cooldowns=Cooldowns(), game_ids={},
+                           metrics=MetricsRegistry(), raise_lots_handlers=[], run_handlers=lambda *args: None,
+                           account=SimpleNamespace(raise_game_categories=raise_game_categories))
+    fake._Cardinal__raise_game = lambda *args: cardinal.Cardinal._Cardinal__raise_game(fake, *args)
+
+    now = time.time()
+    cardinal.Cardinal.raise_lots(fake)
+    deadlines = dict(scheduler.deadlines)
+    assert set(deadlines) == {1, 2, 3}
+    assert abs(deadlines[1] - now - 3600) < 5
+    for game_id in (2, 3):
+        assert abs(deadlines[game_id] - now - cardinal.RAISE_FALLBACK_DELAY) < 5
+
+
+def test_unresolved_categories_are_retried_with_backoff(monkeypatch, tmp_path):
+    monkeypatch.setattr(cardinal.time, "sleep", lambda *args: None)
+    scheduler = RaiseScheduler()
+    cat, other = category(10, None), category(20, 2)
+    scheduler.set_categories([cat, other])
+    lot = SimpleNamespace(category_id=10, game_id=None)
+    responses = [RuntimeError("timeout"), 7]
+
+    def get_category_game_id(c):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    cache = cardinal.CategoriesCache(str(tmp_path / "categories.json"))
+    fake = SimpleNamespace(categories=[cat, other], lots=[lot], raise_scheduler=scheduler, categories_cache=cache,
+                           running=True, unresolved_categories={cache.key(cat): [0, cardinal.UNRESOLVED_RETRY_DELAY]},
+                           account=SimpleNamespace(get_category_game_id=get_category_game_id))
+    fake.update_category_game_id = lambda *args: cardinal.Cardinal.update_category_game_id(fake, *args)
+
+    # Первая попытка неудачна: пауза удваивается, категория остается в списке нерешенных.
+    assert cardinal.Cardinal.retry_unresolved_categories(fake) == 0
+    next_time, delay = fake.unresolved_categories[cache.key(cat)]
+    assert delay == cardinal.UNRESOLVED_RETRY_DELAY * 2
+    assert next_time > time.time()
+    # Время следующей попытки еще не настало.
+    assert cardinal.Cardinal.retry_unresolved_categories(fake) == 0
+    assert responses == [7]
+
+    fake.unresolved_categories[cache.key(cat)][0] = 0
+    assert cardinal.Cardinal.retry_unresolved_categories(fake) == 1
+    assert not fake.unresolved_categories
+    assert cat.game_id == 7 and lot.game_id == 7
+    assert cache.get(cache.key(cat)) == 7
+    assert set(scheduler.categories) == {2, 7}
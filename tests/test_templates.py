@@ -0,0 +1,34 @@
+import pytest
+
+from Utils import templates
+
+
+@pytest.fixture(autouse=True)
+def isolated_templates(monkeypatch):
+    """
+    Не дает тестам менять глобальные переменные модуля шаблонов (VARIABLES, VARIABLES_RE, кэш _compile).
+    """
+    monkeypatch.setattr(templates, "VARIABLES", dict(templates.VARIABLES))
+    monkeypatch.setattr(templates, "VARIABLES_RE", templates.VARIABLES_RE)
+    templates._compile.cache_clear()
+    yield
+    templates._compile.cache_clear()
+
+
+def test_compiled_cache_is_bounded():
+    for i in range(templates.COMPILED_LIMIT * 3):
+        templates.compile_template(f"Шаблон {i}")
+    assert templates._compile.cache_info().currsize <= templates.COMPILED_LIMIT
+
+
+def test_new_variable_recompiles_cached_templates():
+    context = templates.TemplateContext(order=None, answer="42")
+    assert templates.render("Ответ: $test_answer", context) == "Ответ: $test_answer"
+    templates.register_variable("$test_answer", lambda ctx: ctx.extra.get("answer"))
+    assert templates.render("Ответ: $test_answer", context) == "Ответ: 42"
+
+
+def test_registered_variable_does_not_leak_between_tests():
+    assert "$test_answer" not in templates.VARIABLES
+    context = templates.TemplateContext(order=None, answer="42")
+    assert templates.render("Ответ: $test_answer", context) == "Ответ: $test_answer"